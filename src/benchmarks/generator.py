@@ -0,0 +1,111 @@
+import os
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from src.models.tracOS_models import TracOSWorkorderModel, TracOSWorkOrderStatusEnum
+
+# Rough share of each status in production exports: most orders are open or
+# done, a few are on hold, cancelled or deleted.
+STATUS_WEIGHTS = {
+    TracOSWorkOrderStatusEnum.PENDING: 0.35,
+    TracOSWorkOrderStatusEnum.IN_PROGRESS: 0.15,
+    TracOSWorkOrderStatusEnum.COMPLETED: 0.35,
+    TracOSWorkOrderStatusEnum.ON_HOLD: 0.07,
+    TracOSWorkOrderStatusEnum.CANCELLED: 0.05,
+    TracOSWorkOrderStatusEnum.DELETED: 0.03,
+}
+
+BASE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _random_status(rng: random.Random) -> TracOSWorkOrderStatusEnum:
+    return rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+
+
+def customer_workorder_payload(order_no: int, rng: random.Random) -> dict:
+    """Build a customer system workorder as the ERP would export it."""
+
+    status = _random_status(rng)
+    created = BASE_DATE + timedelta(minutes=rng.randint(0, 525600))
+    updated = created + timedelta(minutes=rng.randint(1, 43200))
+
+    return {
+        "orderNo": order_no,
+        "isActive": status != TracOSWorkOrderStatusEnum.DELETED,
+        "isCanceled": status == TracOSWorkOrderStatusEnum.CANCELLED,
+        "isDeleted": status == TracOSWorkOrderStatusEnum.DELETED,
+        "isDone": status == TracOSWorkOrderStatusEnum.COMPLETED,
+        "isOnHold": status == TracOSWorkOrderStatusEnum.ON_HOLD,
+        "isPending": status == TracOSWorkOrderStatusEnum.PENDING,
+        "isSynced": False,
+        "summary": f"Synthetic workorder #{order_no} " + "x" * rng.randint(10, 120),
+        "creationDate": created.isoformat(),
+        "lastUpdateDate": updated.isoformat(),
+        "deletedDate": (
+            updated.isoformat() if status == TracOSWorkOrderStatusEnum.DELETED else None
+        ),
+    }
+
+
+def tracos_workorder(number: int, rng: random.Random) -> TracOSWorkorderModel:
+    """Build a TracOS workorder as it would be stored in MongoDB."""
+
+    status = _random_status(rng)
+    created = BASE_DATE + timedelta(minutes=rng.randint(0, 525600))
+    updated = created + timedelta(minutes=rng.randint(1, 43200))
+
+    return TracOSWorkorderModel(
+        number=number,
+        status=status,
+        title=f"Synthetic workorder #{number}",
+        description=f"Synthetic workorder #{number} " + "x" * rng.randint(10, 400),
+        createdAt=created,
+        updatedAt=updated,
+        deleted=status == TracOSWorkOrderStatusEnum.DELETED,
+        deletedAt=updated if status == TracOSWorkOrderStatusEnum.DELETED else None,
+    )
+
+
+def iter_tracos_workorders(
+    start: int, count: int, seed: int = 0
+) -> Iterator[TracOSWorkorderModel]:
+    rng = random.Random(seed)
+    for number in range(start, start + count):
+        yield tracos_workorder(number, rng)
+
+
+def _write_customer_files(directory: str, start: int, count: int, seed: int) -> int:
+    rng = random.Random(seed)
+    for order_no in range(start, start + count):
+        with open(os.path.join(directory, f"{order_no}.json"), "w") as f:
+            json.dump(customer_workorder_payload(order_no, rng), f)
+    return count
+
+
+def generate_customer_files(
+    directory: str,
+    count: int,
+    start: int = 1,
+    workers: Optional[int] = None,
+    chunk_size: int = 10000,
+    seed: int = 0,
+) -> int:
+    """Write `count` customer workorder files, spread across worker processes."""
+
+    os.makedirs(directory, exist_ok=True)
+
+    chunks = [
+        (
+            directory,
+            chunk_start,
+            min(chunk_size, start + count - chunk_start),
+            seed + chunk_start,
+        )
+        for chunk_start in range(start, start + count, chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_write_customer_files, *chunk) for chunk in chunks]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,522 @@
+"""Scale benchmark for the integration pipeline.
+
+Generates synthetic customer files and TracOS documents, then times each
+pipeline stage on its own:
+
+- read: reading an inbound file from disk
+- parse: decoding and validating it as a customer workorder
+- convert: translating it to the TracOS format
+- upsert: bulk upserting the converted workorders
+- query: streaming unsynced workorders back from the repository
+- write: converting them to the customer format and writing outbound files
+- mark_synced: flagging the written workorders as synced
+- inbound_pipeline: the real `InboundProcessor` over the same files
+- outbound_pipeline: the real `OutboundProcessor` exporting the result
+
+The two pipeline stages start from freshly seeded data and run everything
+in between the isolated stages too: the pipeline engine, coalescing,
+prefetch, concurrency and the outbound sink.
+
+Usage:
+    python -m src.benchmarks.run run --records 100000 --output bench.json
+    python -m src.benchmarks.run run --records 100000 --baseline baseline.json
+    python -m src.benchmarks.run compare bench.json baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import resource
+import shutil
+import tempfile
+from array import array
+from datetime import datetime, timezone
+from typing import Optional
+from decouple import AutoConfig
+
+from src.benchmarks.generator import generate_customer_files, iter_tracos_workorders
+from src.models.customer_models import CustomerWorkorderModel
+from src.models.tracOS_models import TracOSWorkorderModel
+from src.modules.codec import JsonCodec
+from src.modules.inbound import InboundProcessor
+from src.modules.outbound import OutboundProcessor
+from src.modules.outbound_writer import RecordFileWriter, RollingFileWriter
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+from src.repositories.workorder_repository import (
+    UpsertStatus,
+    WorkOrderRepository,
+    WorkOrderVersion,
+)
+from src.service.workorder_service import WorkOrderService
+
+config = AutoConfig(search_path=".")
+
+log = logging.getLogger(__name__)
+
+STAGES = [
+    "read",
+    "parse",
+    "convert",
+    "upsert",
+    "query",
+    "write",
+    "mark_synced",
+    "inbound_pipeline",
+    "outbound_pipeline",
+]
+BENCHMARK_COLLECTION = "workorders_benchmark"
+
+
+class StageStats:
+    """Per-record latencies of one stage.
+
+    Batched stages record one sample per batch weighted by its size, so
+    percentiles stay per record without storing a sample for each of them.
+    """
+
+    def __init__(self):
+        self.samples = array("d")
+        self.weights = array("l")
+        self.records = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    def add(self, elapsed: float, records: int = 1):
+        if records <= 0:
+            return
+        self.samples.append(elapsed / records)
+        self.weights.append(records)
+        self.records += records
+        self.total_seconds += elapsed
+
+    def percentile(self, fraction: float) -> float:
+        if not self.records:
+            return 0.0
+
+        threshold = fraction * self.records
+        seen = 0
+        for sample, weight in sorted(zip(self.samples, self.weights)):
+            seen += weight
+            if seen >= threshold:
+                return sample
+        return self.samples[-1]
+
+    def summary(self) -> dict:
+        return {
+            "records": self.records,
+            "failed": self.failed,
+            "total_seconds": round(self.total_seconds, 6),
+            "records_per_second": (
+                round(self.records / self.total_seconds, 2)
+                if self.total_seconds
+                else 0.0
+            ),
+            "p50_ms": round(self.percentile(0.50) * 1000, 6),
+            "p99_ms": round(self.percentile(0.99) * 1000, 6),
+        }
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def seed_tracos_workorders(
+    repository: WorkOrderRepository, start: int, count: int, batch_size: int
+):
+    """Insert pre-existing TracOS workorders, half of them already synced."""
+
+    batch = []
+    for workorder in iter_tracos_workorders(start, count, seed=start):
+        batch.append(workorder)
+        if len(batch) >= batch_size:
+            await seed_batch(repository, batch, batch_size)
+            batch = []
+    if batch:
+        await seed_batch(repository, batch, batch_size)
+
+
+async def seed_batch(
+    repository: WorkOrderRepository,
+    batch: list[TracOSWorkorderModel],
+    batch_size: int,
+):
+    await repository.bulk_upsert(batch, batch_size=batch_size)
+    versions = await repository.find_many_by_field(
+        "number", [workorder.number for workorder in batch[::2]]
+    )
+    await repository.mark_synced(versions, synced_at=datetime.now())
+
+
+async def run_inbound_stages(
+    repository: WorkOrderRepository,
+    inbound_dir: str,
+    codec: JsonCodec,
+    stats: dict[str, StageStats],
+    batch_size: int,
+):
+    batch = []
+
+    async def flush():
+        started = time.perf_counter()
+        results = await repository.bulk_upsert(batch, batch_size=batch_size)
+        stats["upsert"].add(time.perf_counter() - started, len(batch))
+        stats["upsert"].failed += sum(
+            result.status == UpsertStatus.FAILED for result in results
+        )
+
+    for entry in os.scandir(inbound_dir):
+        started = time.perf_counter()
+        with open(entry.path, "rb") as f:
+            content = f.read()
+        stats["read"].add(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            customer_workorder = codec.decode_model(content, CustomerWorkorderModel)
+        except Exception:
+            stats["parse"].failed += 1
+            continue
+        stats["parse"].add(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            tracos_workorder = WorkOrderService.convert_customer_to_tracos_model(
+                customer_workorder
+            )
+        except Exception:
+            stats["convert"].failed += 1
+            continue
+        stats["convert"].add(time.perf_counter() - started)
+
+        batch.append(tracos_workorder)
+        if len(batch) >= batch_size:
+            await flush()
+            batch = []
+
+    if batch:
+        await flush()
+
+
+async def run_outbound_stages(
+    repository: WorkOrderRepository,
+    writer,
+    stats: dict[str, StageStats],
+    batch_size: int,
+):
+    pending = []
+    # Versions read of the workorders waiting to be marked as synced.
+    versions: dict[int, WorkOrderVersion] = {}
+    workorders = repository.iter_is_synced_workorders(
+        is_synced=False, batch_size=batch_size
+    )
+
+    async def flush():
+        started = time.perf_counter()
+        customer_workorders = WorkOrderService.convert_tracos_to_customer_models(
+            pending
+        )
+        records = [
+            (workorder.number, customer_workorder)
+            for workorder, customer_workorder in zip(pending, customer_workorders)
+        ]
+        for workorder in pending:
+            versions[workorder.number] = WorkOrderVersion(
+                updatedAt=workorder.updatedAt, fingerprint=workorder.fingerprint
+            )
+        committed = writer.write(records)
+        stats["write"].add(time.perf_counter() - started, len(pending))
+        await mark_synced(committed)
+
+    async def mark_synced(numbers: list[int]):
+        if not numbers:
+            return
+        started = time.perf_counter()
+        await repository.mark_synced(
+            {number: versions.pop(number) for number in numbers},
+            synced_at=datetime.now(),
+        )
+        stats["mark_synced"].add(time.perf_counter() - started, len(numbers))
+
+    while True:
+        started = time.perf_counter()
+        workorder = await anext(workorders, None)
+        if workorder is None:
+            break
+        stats["query"].add(time.perf_counter() - started)
+
+        pending.append(workorder)
+        if len(pending) >= batch_size:
+            await flush()
+            pending = []
+
+    if pending:
+        await flush()
+    await mark_synced(writer.close())
+
+
+async def run_pipeline_stages(
+    repository: WorkOrderRepository,
+    inbound_dir: str,
+    outbound_dir: str,
+    layout: str,
+    stats: dict[str, StageStats],
+    batch_size: int,
+):
+    """Time the inbound and outbound processors end to end."""
+
+    settings = {
+        "DATA_INBOUND_DIR": inbound_dir,
+        "DATA_OUTBOUND_DIR": outbound_dir,
+        "INBOUND_MANIFEST_PATH": os.path.join(
+            os.path.dirname(inbound_dir), ".inbound_manifest"
+        ),
+        "INBOUND_BATCH_SIZE": str(batch_size),
+        "OUTBOUND_BATCH_SIZE": str(batch_size),
+        "OUTBOUND_LAYOUT": layout,
+        "OUTBOUND_FSYNC": "False",
+    }
+    previous = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        inbound_processor = InboundProcessor(repository)
+        started = time.perf_counter()
+        summary = await inbound_processor.process_files(full=True)
+        elapsed = time.perf_counter() - started
+        failed = summary[UpsertStatus.FAILED.value]
+        stats["inbound_pipeline"].add(
+            elapsed, sum(summary.values()) - summary["unchanged_files"] - failed
+        )
+        stats["inbound_pipeline"].failed += failed
+
+        outbound_processor = OutboundProcessor(repository)
+        started = time.perf_counter()
+        outbound_stats = await outbound_processor.process_files()
+        stats["outbound_pipeline"].add(
+            time.perf_counter() - started, outbound_stats["read"]
+        )
+        stats["outbound_pipeline"].failed += outbound_stats["failed"]
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def create_repository(backend: str) -> WorkOrderRepository:
+    if backend == "memory":
+        return MemoryWorkOrderRepository()
+
+    from src.repositories.mongo.mongo_workorder_repository import (
+        MongoWorkOrderRepository,
+    )
+    from src.repositories.repository_factory import RepositoryFactory
+
+    client = await RepositoryFactory.startup()
+    repository = MongoWorkOrderRepository(
+        collection_name=BENCHMARK_COLLECTION,
+        database_name=config("MONGO_DATABASE", default="tractian"),
+        client=client,
+    )
+    await repository.collection.drop()
+    await repository.ensure_indexes()
+    return repository
+
+
+async def run_benchmark(
+    records: int,
+    backend: str = "memory",
+    tracos_records: Optional[int] = None,
+    batch_size: int = 500,
+    layout: str = "record",
+    work_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> dict:
+    """Run every stage over `records` synthetic workorders and return the results."""
+
+    tracos_records = records if tracos_records is None else tracos_records
+    base_dir = work_dir or tempfile.mkdtemp(prefix="tracos-benchmark-")
+    inbound_dir = os.path.join(base_dir, "inbound")
+    outbound_dir = os.path.join(base_dir, "outbound")
+    os.makedirs(outbound_dir, exist_ok=True)
+
+    repository = await create_repository(backend)
+    codec = JsonCodec()
+    stats = {stage: StageStats() for stage in STAGES}
+
+    try:
+        started = time.perf_counter()
+        # Customer files are written by worker processes while the TracOS
+        # documents are seeded from this one.
+        files = asyncio.get_running_loop().run_in_executor(
+            None, generate_customer_files, inbound_dir, records, 1, workers
+        )
+        await seed_tracos_workorders(
+            repository, records + 1, tracos_records, batch_size
+        )
+        await files
+        generation_seconds = time.perf_counter() - started
+        log.info(f"Generated benchmark data in {generation_seconds:.2f}s.")
+
+        await run_inbound_stages(repository, inbound_dir, codec, stats, batch_size)
+
+        if layout == "ndjson":
+            writer = RollingFileWriter(outbound_dir, codec, fsync=False)
+        else:
+            writer = RecordFileWriter(outbound_dir, codec, fsync=False)
+        await run_outbound_stages(repository, writer, stats, batch_size)
+
+        # The real pipeline runs against the same starting point as above.
+        repository = await create_repository(backend)
+        await seed_tracos_workorders(
+            repository, records + 1, tracos_records, batch_size
+        )
+        pipeline_outbound_dir = os.path.join(base_dir, "outbound_pipeline")
+        os.makedirs(pipeline_outbound_dir, exist_ok=True)
+        await run_pipeline_stages(
+            repository, inbound_dir, pipeline_outbound_dir, layout, stats, batch_size
+        )
+    finally:
+        if backend == "mongo":
+            await repository.collection.drop()
+        if work_dir is None:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "backend": backend,
+        "records": records,
+        "tracos_records": tracos_records,
+        "batch_size": batch_size,
+        "layout": layout,
+        "generation_seconds": round(generation_seconds, 6),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "stages": {
+            stage: stage_stats.summary() for stage, stage_stats in stats.items()
+        },
+    }
+
+
+def compare_results(results: dict, baseline: dict, threshold: float = 0.1) -> list[str]:
+    """List the stages that regressed by more than `threshold` against a baseline."""
+
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not previous["records"]:
+            continue
+
+        if current["records_per_second"] < previous["records_per_second"] * (
+            1 - threshold
+        ):
+            regressions.append(
+                f"{stage}: throughput dropped from {previous['records_per_second']} "
+                f"to {current['records_per_second']} records/s"
+            )
+        if current["p99_ms"] > previous["p99_ms"] * (1 + threshold):
+            regressions.append(
+                f"{stage}: p99 grew from {previous['p99_ms']} to {current['p99_ms']} ms"
+            )
+
+    if baseline.get("peak_rss_bytes") and results["peak_rss_bytes"] > baseline[
+        "peak_rss_bytes"
+    ] * (1 + threshold):
+        regressions.append(
+            f"peak RSS grew from {baseline['peak_rss_bytes']} "
+            f"to {results['peak_rss_bytes']} bytes"
+        )
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def report_regressions(regressions: list[str]) -> int:
+    if not regressions:
+        log.info("No regressions against the baseline.")
+        return 0
+
+    for regression in regressions:
+        log.error(f"Regression: {regression}")
+    return 1
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Generate data and time stages.")
+    run_parser.add_argument("--records", type=int, default=10000)
+    run_parser.add_argument("--tracos-records", type=int, default=None)
+    run_parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    run_parser.add_argument("--batch-size", type=int, default=500)
+    run_parser.add_argument("--layout", choices=["record", "ndjson"], default="record")
+    run_parser.add_argument("--workers", type=int, default=None)
+    run_parser.add_argument("--work-dir", default=None)
+    run_parser.add_argument("--output", default=None)
+    run_parser.add_argument("--baseline", default=None)
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare stored results against a baseline."
+    )
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare_results(
+            load_results(args.results), load_results(args.baseline), args.threshold
+        )
+        return report_regressions(regressions)
+
+    try:
+        results = await run_benchmark(
+            records=args.records,
+            backend=args.backend,
+            tracos_records=args.tracos_records,
+            batch_size=args.batch_size,
+            layout=args.layout,
+            work_dir=args.work_dir,
+            workers=args.workers,
+        )
+    finally:
+        if args.backend == "mongo":
+            from src.repositories.repository_factory import RepositoryFactory
+
+            await RepositoryFactory.shutdown()
+
+    output = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        return report_regressions(
+            compare_results(results, load_results(args.baseline), args.threshold)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    sys.exit(asyncio.run(main()))
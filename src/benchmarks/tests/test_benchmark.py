@@ -0,0 +1,56 @@
+import os
+import json
+import pytest
+
+from src.benchmarks.generator import generate_customer_files
+from src.benchmarks.run import STAGES, compare_results, run_benchmark
+from src.models.customer_models import CustomerWorkorderModel
+
+
+def test_generate_customer_files(tmp_path):
+    assert generate_customer_files(str(tmp_path), 25, workers=2, chunk_size=10) == 25
+
+    filenames = sorted(os.listdir(tmp_path), key=lambda name: int(name[:-5]))
+    assert filenames == [f"{order_no}.json" for order_no in range(1, 26)]
+
+    with open(tmp_path / "7.json", "r") as f:
+        workorder = CustomerWorkorderModel.model_validate(json.load(f))
+    assert workorder.orderNo == 7
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_reports_every_stage(tmp_path):
+    results = await run_benchmark(
+        records=50, tracos_records=20, batch_size=10, work_dir=str(tmp_path)
+    )
+
+    assert list(results["stages"]) == STAGES
+    assert results["stages"]["read"]["records"] == 50
+    assert results["stages"]["query"]["records"] > 0
+    assert results["stages"]["inbound_pipeline"]["records"] == 50
+    assert results["stages"]["outbound_pipeline"]["records"] > 0
+    assert results["peak_rss_bytes"] > 0
+    for stage in results["stages"].values():
+        assert stage["p50_ms"] <= stage["p99_ms"]
+
+
+def test_compare_results_flags_regressions():
+    baseline = {
+        "peak_rss_bytes": 1000,
+        "stages": {
+            "parse": {"records": 10, "records_per_second": 1000.0, "p99_ms": 1.0},
+            "write": {"records": 10, "records_per_second": 1000.0, "p99_ms": 1.0},
+        },
+    }
+    results = {
+        "peak_rss_bytes": 1050,
+        "stages": {
+            "parse": {"records": 10, "records_per_second": 950.0, "p99_ms": 1.05},
+            "write": {"records": 10, "records_per_second": 500.0, "p99_ms": 2.0},
+        },
+    }
+
+    regressions = compare_results(results, baseline, threshold=0.1)
+
+    assert len(regressions) == 2
+    assert all(regression.startswith("write:") for regression in regressions)
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import docker
 import time
@@ -5,6 +6,15 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from src.repositories.repository_factory import RepositoryFactory
 
 
+@pytest.fixture(scope="session")
+def event_loop():
+    """Share one event loop across the session so the pooled client is reused."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(RepositoryFactory.shutdown())
+    loop.close()
+
+
 @pytest.fixture(scope="session")
 def docker_compose():
     """Raise a MongoDB container for testing."""
@@ -65,4 +75,6 @@ async def mongo_client(docker_compose):
 async def workorder_repository(mongo_client):
     """Create a repository instance using the in-memory MongoDB."""
     repository = await RepositoryFactory.get_workorder_repository()
+    # Collections are dropped between tests, so provision indexes again.
+    await repository.ensure_indexes()
     return repository
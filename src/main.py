@@ -1,12 +1,26 @@
 """Entrypoint for the application."""
 
+import os
+import json
+import signal
+import argparse
 import asyncio
 import logging
+from datetime import datetime
+from typing import Awaitable, Optional
+from decouple import AutoConfig
 
-from modules.inbound import InboundProcessor
+from modules.inbound import INBOUND_EXTENSIONS, InboundProcessor
+from src.modules.metrics import REGISTRY, MetricsServer
+from src.modules.profiling import PipelineProfiler
 from modules.outbound import OutboundProcessor
+from modules.outbound_backfill import OutboundBackfill
+from modules.sharded_inbound import ShardedInboundProcessor
+from modules.watcher import FileDebouncer, create_watcher
 from src.repositories.repository_factory import RepositoryFactory
 
+config = AutoConfig(search_path=".")
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -16,12 +30,15 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
-async def inbount_process():
+async def inbount_process(full: bool = False):
     log.info("Processing inbound files...")
     try:
-        repository = await RepositoryFactory.get_workorder_repository()
-        inbound_processor = InboundProcessor(repository)
-        await inbound_processor.process_files()
+        if config("INBOUND_PROCESSES", default=1, cast=int) > 1:
+            await ShardedInboundProcessor().process_files(full=full)
+        else:
+            repository = await RepositoryFactory.get_workorder_repository()
+            inbound_processor = InboundProcessor(repository)
+            await inbound_processor.process_files(full=full)
         log.info("Inbound files processed.")
     except Exception as e:
         log.error(
@@ -42,17 +59,335 @@ async def outbound_process():
         )
 
 
-async def main():
+async def main(full: bool = False):
     log.info("Starting integration pipeline...")
 
-    # Process inbound files (Client -> TracOS)
-    await inbount_process()
+    try:
+        if config("PIPELINE_CONCURRENT_STAGES", default=False, cast=bool):
+            # Workorders written by this run's inbound may be exported now or
+            # on the next run, depending on timing. Outbound only marks the
+            # version it read as synced, so a newer one is never lost.
+            await asyncio.gather(inbount_process(full=full), outbound_process())
+        else:
+            # Process inbound files (Client -> TracOS)
+            await inbount_process(full=full)
 
-    # process outbound files (TracOS -> Client)
-    await outbound_process()
+            # process outbound files (TracOS -> Client)
+            await outbound_process()
+    finally:
+        # Both stages share the factory's connection pool; release it once.
+        await RepositoryFactory.shutdown()
 
+    write_metrics_summary()
     log.info("Integration pipeline complete.")
 
 
+def write_metrics_summary():
+    """Log the run's metrics as JSON, and save them to `METRICS_SUMMARY_PATH`."""
+
+    summary = json.dumps(REGISTRY.snapshot())
+    log.info(f"Run metrics: {summary}")
+
+    summary_path = config("METRICS_SUMMARY_PATH", default="")
+    if summary_path:
+        try:
+            with open(summary_path, "w") as f:
+                f.write(summary)
+        except Exception as e:
+            log.error(f"Error writing metrics summary {summary_path}: {e}")
+
+
+async def profile(
+    full: bool = False,
+    stages: str = "all",
+    output_dir: str = "profiles",
+    top: int = 30,
+):
+    """Run the pipeline under the profiler, writing reports per stage.
+
+    `stages` selects "inbound", "outbound" or "all". The connection is opened
+    before profiling starts, so the reports only cover the stages themselves.
+    """
+
+    log.info(f"Starting integration pipeline with profiling of {stages}...")
+
+    profiler = PipelineProfiler(output_dir, top=top)
+    try:
+        await RepositoryFactory.get_workorder_repository()
+        if stages in ("inbound", "all"):
+            await profiler.run("inbound", inbount_process(full=full))
+        if stages in ("outbound", "all"):
+            await profiler.run("outbound", outbound_process())
+    finally:
+        await RepositoryFactory.shutdown()
+
+    write_metrics_summary()
+    log.info(f"Integration pipeline complete, profiles written to {output_dir}.")
+
+
+async def backfill(
+    field: str,
+    start: int | datetime,
+    end: int | datetime,
+    partitions: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+):
+    """Re-export the workorders with `start <= field < end`, resumably."""
+
+    log.info("Starting outbound backfill...")
+
+    try:
+        repository = await RepositoryFactory.get_workorder_repository()
+        outbound_processor = OutboundProcessor(repository)
+        await OutboundBackfill(
+            outbound_processor,
+            field,
+            start,
+            end,
+            partitions=partitions,
+            max_parallel=max_parallel,
+        ).run()
+    finally:
+        await RepositoryFactory.shutdown()
+
+    write_metrics_summary()
+    log.info("Outbound backfill complete.")
+
+
+async def wait_or_stop(awaitable: Awaitable, stop: asyncio.Event):
+    """Wait for `awaitable` unless `stop` is set first, returning None then."""
+
+    task = asyncio.ensure_future(awaitable)
+    stopped = asyncio.create_task(stop.wait())
+    await asyncio.wait({task, stopped}, return_when=asyncio.FIRST_COMPLETED)
+
+    stopped.cancel()
+    if task.done():
+        return task.result()
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return None
+
+
+async def watch_inbound(
+    inbound_processor: InboundProcessor,
+    debouncer: FileDebouncer,
+    stop: asyncio.Event,
+):
+    while not stop.is_set():
+        filenames = await wait_or_stop(debouncer.ready(), stop)
+        if not filenames:
+            continue
+
+        try:
+            await inbound_processor.process_files(filenames=filenames)
+        except Exception as e:
+            log.error(f"Error processing inbound files {filenames}: {e}")
+
+
+async def run_outbound_periodically(
+    outbound_processor: OutboundProcessor, interval: float, stop: asyncio.Event
+):
+    while not stop.is_set():
+        try:
+            await outbound_processor.process_files()
+        except Exception as e:
+            log.error(f"Error processing outbound files: {e}")
+
+        await wait_or_stop(asyncio.sleep(interval), stop)
+
+
+async def watch(full: bool = False, stop: asyncio.Event | None = None):
+    """Keep ingesting inbound files as they arrive until SIGTERM or SIGINT.
+
+    Inbound files are processed as soon as they finish being written. Outbound
+    runs every `OUTBOUND_INTERVAL_SECONDS`, or follows the change stream with
+    `OUTBOUND_MODE=change_stream`, sharing one connection. Outbound only
+    marks the version it read as synced, so updates ingested while it exports
+    are exported on its next pass.
+    Work in progress is completed before shutting down.
+    """
+
+    log.info("Starting integration pipeline in watch mode...")
+
+    if stop is None:
+        stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    signals = (signal.SIGTERM, signal.SIGINT)
+    for sig in signals:
+        loop.add_signal_handler(sig, stop.set)
+
+    watcher = None
+    metrics_server = None
+    try:
+        repository = await RepositoryFactory.get_workorder_repository()
+        inbound_processor = InboundProcessor(repository)
+        outbound_processor = OutboundProcessor(repository)
+        os.makedirs(inbound_processor.data_inbound_dir, exist_ok=True)
+
+        metrics_port = config("METRICS_PORT", default=0, cast=int)
+        if metrics_port:
+            metrics_server = MetricsServer(
+                host=config("METRICS_HOST", default="0.0.0.0"),
+                port=metrics_port,
+                collect=outbound_processor.update_backlog_metrics,
+            )
+            await metrics_server.start()
+
+        debouncer = FileDebouncer(
+            inbound_processor.data_inbound_dir,
+            delay=config("WATCH_DEBOUNCE_MS", default=200, cast=int) / 1000,
+        )
+
+        def on_change(filename: str):
+            # Hidden files are the manifest and temporary files of writers.
+            if filename.endswith(INBOUND_EXTENSIONS) and not filename.startswith("."):
+                debouncer.touch(filename)
+
+        watcher = create_watcher(inbound_processor.data_inbound_dir, on_change)
+        await watcher.start()
+
+        # Catch up on files that arrived while the process was not running.
+        await inbound_processor.process_files(full=full)
+
+        outbound_mode = config("OUTBOUND_MODE", default="poll")
+        if outbound_mode == "change_stream":
+            outbound = outbound_processor.stream_files(stop)
+        elif outbound_mode == "poll":
+            outbound = run_outbound_periodically(
+                outbound_processor,
+                config("OUTBOUND_INTERVAL_SECONDS", default=30, cast=float),
+                stop,
+            )
+        else:
+            raise EnvironmentError(f"Unsupported OUTBOUND_MODE: {outbound_mode}")
+
+        await asyncio.gather(
+            watch_inbound(inbound_processor, debouncer, stop), outbound
+        )
+    finally:
+        if watcher is not None:
+            await watcher.close()
+        if metrics_server is not None:
+            await metrics_server.close()
+        for sig in signals:
+            loop.remove_signal_handler(sig)
+        await RepositoryFactory.shutdown()
+
+    log.info("Integration pipeline stopped.")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the integration pipeline.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Reprocess every inbound file, ignoring the processed-file manifest.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running, ingesting inbound files as they arrive.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="all",
+        choices=["inbound", "outbound", "all"],
+        help="Profile CPU time and memory of the given stages (default: all).",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=config("PROFILE_DIR", default="profiles"),
+        help="Directory the profile reports are written to.",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=30,
+        help="Number of functions and allocation sites listed in the reports.",
+    )
+    backfill_group = parser.add_argument_group(
+        "backfill",
+        "Re-export a range of workorders, synced or not. Running the same "
+        "backfill again resumes from its last completed partition.",
+    )
+    backfill_group.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Run a backfill instead of the regular pipeline.",
+    )
+    backfill_group.add_argument(
+        "--from-number", type=int, help="First workorder number to export."
+    )
+    backfill_group.add_argument(
+        "--to-number", type=int, help="Last workorder number to export (inclusive)."
+    )
+    backfill_group.add_argument(
+        "--from-date",
+        type=datetime.fromisoformat,
+        help="Export workorders updated at or after this ISO date.",
+    )
+    backfill_group.add_argument(
+        "--to-date",
+        type=datetime.fromisoformat,
+        help="Export workorders updated before this ISO date.",
+    )
+    backfill_group.add_argument(
+        "--partitions",
+        type=int,
+        help="Number of partitions the range is split into (BACKFILL_PARTITIONS).",
+    )
+    backfill_group.add_argument(
+        "--max-parallel",
+        type=int,
+        help="Partitions exported at the same time (BACKFILL_MAX_PARALLEL).",
+    )
+
+    args = parser.parse_args()
+    if args.profile and args.watch:
+        parser.error("--profile cannot be combined with --watch")
+    if args.backfill:
+        if args.watch or args.profile:
+            parser.error("--backfill cannot be combined with --watch or --profile")
+        numbers = (args.from_number, args.to_number)
+        dates = (args.from_date, args.to_date)
+        if None not in numbers and dates == (None, None):
+            args.backfill_range = ("number", args.from_number, args.to_number + 1)
+        elif None not in dates and numbers == (None, None):
+            args.backfill_range = ("updatedAt", args.from_date, args.to_date)
+        else:
+            parser.error(
+                "--backfill needs either --from-number and --to-number "
+                "or --from-date and --to-date"
+            )
+    return args
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.watch:
+        asyncio.run(watch(full=args.full))
+    elif args.backfill:
+        asyncio.run(
+            backfill(
+                *args.backfill_range,
+                partitions=args.partitions,
+                max_parallel=args.max_parallel,
+            )
+        )
+    elif args.profile:
+        asyncio.run(
+            profile(
+                full=args.full,
+                stages=args.profile,
+                output_dir=args.profile_dir,
+                top=args.profile_top,
+            )
+        )
+    else:
+        asyncio.run(main(full=args.full))
@@ -24,3 +24,49 @@ class TracOSWorkorderModel(BaseModel):
     isSynced: bool = Field(default=False)
     syncedAt: Optional[datetime] = None
     deletedAt: Optional[datetime] = None
+
+
+class TracOSWorkorderExportModel(BaseModel):
+    """Subset of a TracOS workorder needed to build the customer format.
+
+    The fingerprints let outbound tell whether the content changed since the
+    last time the workorder was exported.
+    """
+
+    number: int
+    status: TracOSWorkOrderStatusEnum = Field(default=TracOSWorkOrderStatusEnum.PENDING)
+    title: str
+    createdAt: datetime
+    updatedAt: datetime
+    deleted: bool = Field(default=False)
+    deletedAt: Optional[datetime] = None
+    fingerprint: Optional[str] = None
+    syncedFingerprint: Optional[str] = None
+
+
+# Lookup by stored value, cheaper than calling the enum.
+TRACOS_STATUS_BY_VALUE = {status.value: status for status in TracOSWorkOrderStatusEnum}
+
+
+class TracOSWorkorderExportRecord:
+    """Lightweight, unvalidated counterpart of `TracOSWorkorderExportModel`.
+
+    Only built from documents this integration wrote itself, where the field
+    types are already known to be right.
+    """
+
+    __slots__ = tuple(TracOSWorkorderExportModel.model_fields)
+
+    def __init__(self, document: dict):
+        self.number = document["number"]
+        self.status = TRACOS_STATUS_BY_VALUE[document["status"]]
+        self.title = document["title"]
+        self.createdAt = document["createdAt"]
+        self.updatedAt = document["updatedAt"]
+        self.deleted = document.get("deleted", False)
+        self.deletedAt = document.get("deletedAt")
+        self.fingerprint = document.get("fingerprint")
+        self.syncedFingerprint = document.get("syncedFingerprint")
+
+
+TracOSWorkorderExport = TracOSWorkorderExportModel | TracOSWorkorderExportRecord
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from typing import Any, Optional, TypeVar
+from decouple import AutoConfig
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+config = AutoConfig(search_path=".")
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def _json_serializer(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+class JsonCodec:
+    """JSON encoding and decoding shared by the inbound and outbound processors.
+
+    Models are validated straight from bytes and serialized by pydantic-core.
+    Plain data goes through orjson when it is installed, falling back to the
+    standard library otherwise.
+    """
+
+    def __init__(self, compact: bool = False, use_orjson: bool = True):
+        self.compact = compact
+        self.use_orjson = use_orjson and orjson is not None
+
+    @classmethod
+    def from_env(cls) -> "JsonCodec":
+        return cls(
+            compact=config("JSON_COMPACT_OUTPUT", default=False, cast=bool),
+            use_orjson=config("JSON_USE_ORJSON", default=True, cast=bool),
+        )
+
+    def decode(self, content: bytes) -> Any:
+        if self.use_orjson:
+            return orjson.loads(content)
+        return json.loads(content)
+
+    def decode_model(self, content: bytes, model: type[M]) -> M:
+        return model.model_validate_json(content)
+
+    def encode(self, data: Any) -> bytes:
+        if self.use_orjson:
+            option = 0 if self.compact else orjson.OPT_INDENT_2
+            return orjson.dumps(data, default=_json_serializer, option=option)
+        if self.compact:
+            return json.dumps(
+                data, separators=(",", ":"), default=_json_serializer
+            ).encode()
+        return json.dumps(data, indent=4, default=_json_serializer).encode()
+
+    def encode_model(self, model: BaseModel) -> bytes:
+        indent: Optional[int] = None if self.compact else 4
+        return model.model_dump_json(indent=indent).encode()
+
+    def encode_model_line(self, model: BaseModel) -> bytes:
+        """Encode a model on a single line, as NDJSON needs, even if not compact."""
+
+        return model.model_dump_json().encode() + b"\n"
@@ -1,21 +1,152 @@
 import os
+import re
 import json
+import time
+import asyncio
+import hashlib
+import itertools
 import logging
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
 from decouple import AutoConfig
+from pydantic import BaseModel
 
 from src.models.customer_models import CustomerWorkorderModel
-from src.repositories.workorder_repository import WorkOrderRepository
+from src.models.tracOS_models import TracOSWorkorderModel
+from src.modules.codec import JsonCodec
+from src.modules.manifest import InboundManifest, ManifestEntry
+from src.modules.metrics import (
+    CONVERT_SECONDS,
+    DB_SECONDS,
+    DECODE_SECONDS,
+    FILE_READ_SECONDS,
+    RECORDS_TOTAL,
+    VALIDATE_SECONDS,
+)
+from src.modules.pipeline import Pipeline, Sink
+from src.repositories.workorder_repository import (
+    UpsertResult,
+    UpsertStatus,
+    WorkOrderRepository,
+    utc_naive,
+)
 from src.service.workorder_service import WorkOrderService
 
 config = AutoConfig(search_path=".")
 
 log = logging.getLogger(__name__)
 
+INBOUND_EXTENSIONS = (".json", ".jsonl", ".ndjson")
+BATCH_FILE_EXTENSIONS = (".jsonl", ".ndjson")
+JSON_ARRAY_PATTERN = re.compile(rb"\s*\[")
+# Line based files are hashed in chunks of this size, never read whole.
+HASH_CHUNK_SIZE = 1024 * 1024
+# Summary key of records dropped for a newer record of the same workorder.
+SUPERSEDED = "superseded"
+
+
+class FileProgress(BaseModel):
+    """Tracks the records of one inbound file until all of them are written."""
+
+    entry: ManifestEntry
+    pending: int = 0
+    failed: bool = False
+    loaded: bool = False
+
+
+def _recency(item: tuple[str, str, TracOSWorkorderModel]) -> tuple:
+    # Ties on updatedAt go to the later file and location, so the winner does
+    # not depend on the order the directory is listed in.
+    filename, location, tracos_workorder = item
+    return utc_naive(tracos_workorder.updatedAt), filename, location
+
+
+class InboundSink(Sink):
+    """Bulk upserts converted workorders through the inbound processor.
+
+    With `coalesce`, records are buffered until `coalesce_window` distinct
+    workorder numbers are held or the source is exhausted. Only the newest
+    record of each number in the window is kept, by `updatedAt`, and the
+    others are reported as superseded without a write. Records of the same
+    workorder in different windows are ordered by the repository's
+    `updatedAt` guard instead.
+    """
+
+    def __init__(
+        self,
+        processor: "InboundProcessor",
+        coalesce: bool = False,
+        coalesce_window: int = 10000,
+    ):
+        self.processor = processor
+        self.coalesce = coalesce
+        self.coalesce_window = coalesce_window
+        self._latest: dict[int, tuple[str, str, TracOSWorkorderModel]] = {}
+
+    async def write(self, batch: list[tuple[str, str, TracOSWorkorderModel]]):
+        if not self.coalesce:
+            await self.processor._flush_batch(batch)
+            return
+
+        for item in batch:
+            number = item[2].number
+            current = self._latest.get(number)
+            if current is None:
+                self._latest[number] = item
+                continue
+
+            if _recency(item) > _recency(current):
+                self._latest[number] = item
+                item = current
+            self.processor._record_superseded(item)
+
+        if len(self._latest) >= self.coalesce_window:
+            await self._flush_window()
+
+    async def close(self):
+        await self._flush_window()
+
+    async def _flush_window(self):
+        if not self._latest:
+            return
+
+        items = [self._latest[number] for number in sorted(self._latest)]
+        self._latest = {}
+
+        batch_size = self.processor.batch_size
+        semaphore = asyncio.Semaphore(self.processor.max_in_flight)
+
+        async def flush(batch):
+            async with semaphore:
+                await self.processor._flush_batch(batch)
+
+        await asyncio.gather(
+            *(
+                flush(items[start : start + batch_size])
+                for start in range(0, len(items), batch_size)
+            )
+        )
+
 
 class InboundProcessor:
-    def __init__(self, repository: WorkOrderRepository):
+    def __init__(
+        self, repository: WorkOrderRepository, codec: Optional[JsonCodec] = None
+    ):
         self.repository = repository
+        self.codec = codec or JsonCodec.from_env()
         self.data_inbound_dir: str = ""
+        self.batch_size: int = config("INBOUND_BATCH_SIZE", default=500, cast=int)
+        self.max_in_flight: int = config("INBOUND_MAX_IN_FLIGHT", default=8, cast=int)
+        self.transform_workers: int = config(
+            "INBOUND_TRANSFORM_WORKERS", default=2, cast=int
+        )
+        self.coalesce: bool = config("INBOUND_COALESCE", default=True, cast=bool)
+        self.coalesce_window: int = config(
+            "INBOUND_COALESCE_WINDOW", default=10000, cast=int
+        )
+        self.prefetch: bool = config("INBOUND_PREFETCH", default=True, cast=bool)
+        self.summary: Counter = Counter()
+        self._progress: dict[str, FileProgress] = {}
 
         self._validate_and_set_env_vars()
 
@@ -30,15 +161,18 @@ class InboundProcessor:
 
         self.data_inbound_dir = data_inbound_dir
 
-    def read_json_file(self, file_path: str):
-        """Read and load a JSON file."""
+        manifest_path = config(
+            "INBOUND_MANIFEST_PATH",
+            default=os.path.join(data_inbound_dir, ".inbound_manifest"),
+        )
+        self.manifest = InboundManifest(manifest_path)
+
+    def read_file(self, file_path: str) -> Optional[bytes]:
+        """Read the raw content of a file."""
 
         try:
-            with open(file_path, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
-            log.error(f"Error decoding JSON from file {file_path}: {e}")
-            return None
+            with FILE_READ_SECONDS.time(), open(file_path, "rb") as f:
+                return f.read()
         except PermissionError as e:
             log.error(f"Permission error reading file {file_path}: {e}")
             return None
@@ -46,44 +180,400 @@ class InboundProcessor:
             log.error(f"Unexpected error reading file {file_path}: {e}")
             return None
 
-    async def process_files(self):
-        """Process inbound workorder from costumer to TracOS format."""
+    def hash_file(self, file_path: str) -> Optional[str]:
+        """Return the sha256 of a file, reading it in chunks."""
+
+        digest = hashlib.sha256()
+        try:
+            with FILE_READ_SECONDS.time(), open(file_path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+        except Exception as e:
+            log.error(f"Error reading file {file_path}: {e}")
+            return None
+        return digest.hexdigest()
+
+    def read_json_file(self, file_path: str, content: Optional[bytes] = None):
+        """Read and load a JSON file, or decode its already read content."""
+
+        if content is None:
+            content = self.read_file(file_path)
+            if content is None:
+                return None
+
+        try:
+            with DECODE_SECONDS.time():
+                return self.codec.decode(content)
+        except json.JSONDecodeError as e:
+            log.error(f"Error decoding JSON from file {file_path}: {e}")
+            return None
+        except Exception as e:
+            log.error(f"Unexpected error reading file {file_path}: {e}")
+            return None
+
+    def load_workorder(
+        self, file_path: str, content: Optional[bytes] = None
+    ) -> Optional[TracOSWorkorderModel]:
+        """Read, validate and convert a customer workorder file.
+
+        This runs on a worker thread, so it must not touch the event loop.
+        """
+
+        log.info(f"Processing file: {file_path}")
+
+        if content is None:
+            content = self.read_file(file_path)
+            if content is None:
+                log.error(f"Skipping file {file_path} due to read error.")
+                return None
+
+        try:
+            return self.convert_record(content)
+        except Exception as e:
+            log.error(f"Error processing file {file_path}: {e}")
+            return None
+
+    def convert_record(self, record: Optional[bytes | dict]) -> TracOSWorkorderModel:
+        """Validate one raw customer record and convert it to the TracOS format."""
+
+        if record is None:
+            raise ValueError("Record could not be decoded.")
+
+        start = time.perf_counter()
+        if isinstance(record, bytes):
+            client_workorder = self.codec.decode_model(record, CustomerWorkorderModel)
+        else:
+            client_workorder = CustomerWorkorderModel.model_validate(record)
+        validated = time.perf_counter()
+
+        tracos_workorder = WorkOrderService.convert_customer_to_tracos_model(
+            client_workorder
+        )
+        VALIDATE_SECONDS.observe(validated - start)
+        CONVERT_SECONDS.observe(time.perf_counter() - validated)
+        return tracos_workorder
+
+    def iter_records(
+        self, file_path: str, content: Optional[bytes] = None
+    ) -> Iterator[tuple[str, Optional[bytes | dict]]]:
+        """Yield `(location, record)` for every raw record of an inbound file.
+
+        `.jsonl`/`.ndjson` files are read from disk line by line as they are
+        iterated, and `content` is not needed for them. `.json` files holding
+        a top-level array are decoded whole and split item by item, so each
+        record is validated on its own. Any other `.json` file is a single
+        workorder. A JSON array that cannot be decoded, or a line based file
+        that cannot be read, is yielded as a single None record.
+        """
+
+        filename = os.path.basename(file_path)
+
+        if filename.endswith(BATCH_FILE_EXTENSIONS):
+            log.info(f"Processing batch file: {file_path}")
+            try:
+                with open(file_path, "rb") as f:
+                    for line_number, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        yield f"file {filename} line {line_number}", line
+            except Exception as e:
+                log.error(f"Error reading file {file_path}: {e}")
+                yield f"file {filename}", None
+
+        elif JSON_ARRAY_PATTERN.match(content):
+            log.info(f"Processing batch file: {file_path}")
+            records = self.read_json_file(file_path, content)
+            if records is None:
+                yield f"file {filename}", None
+                return
+            for index, record in enumerate(records):
+                yield f"file {filename} item {index}", record
+
+        else:
+            log.info(f"Processing file: {file_path}")
+            yield f"file {filename}", content
+
+    def load_changed_file(
+        self, filename: str, full: bool = False
+    ) -> Optional[
+        tuple[
+            Optional[ManifestEntry],
+            Iterable[tuple[str, Optional[bytes | dict]]],
+        ]
+    ]:
+        """Open an inbound file unless the manifest shows it was already ingested.
+
+        Returns None for unchanged files and no manifest entry for files that
+        could not be read. Files whose size and mtime match the manifest are
+        skipped without being opened; otherwise the content hash decides.
+        Line based files are hashed in chunks and returned as a lazy iterator
+        that reads them again line by line, so they are never held in memory
+        whole. JSON files are read and decoded right away. Like
+        `load_workorder`, this runs on a worker thread.
+        """
+
+        file_path = os.path.join(self.data_inbound_dir, filename)
+
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            log.error(f"Skipping file {file_path} due to read error: {e}")
+            return None, []
+
+        if not full and self.manifest.is_unchanged(filename, stat):
+            log.debug(f"Skipping unchanged file: {file_path}")
+            return None
+
+        if filename.endswith(BATCH_FILE_EXTENSIONS):
+            content = None
+            sha256 = self.hash_file(file_path)
+        else:
+            content = self.read_file(file_path)
+            sha256 = None if content is None else hashlib.sha256(content).hexdigest()
+        if sha256 is None:
+            log.error(f"Skipping file {file_path} due to read error.")
+            return None, []
+
+        entry = ManifestEntry(size=stat.st_size, mtime=stat.st_mtime, sha256=sha256)
+        if not full and self.manifest.matches_hash(filename, entry.sha256):
+            log.debug(f"Skipping file with unchanged content: {file_path}")
+            self.manifest.record(filename, entry)
+            return None
+
+        records = self.iter_records(file_path, content)
+        if filename.endswith(BATCH_FILE_EXTENSIONS):
+            return entry, records
+        return entry, list(records)
+
+    async def process_files(
+        self,
+        full: bool = False,
+        filenames: Optional[Iterable[str]] = None,
+        save_manifest: bool = True,
+    ) -> Counter:
+        """Process inbound workorder from costumer to TracOS format.
+
+        Files recorded in the manifest as already ingested are skipped unless
+        `full` is set. `filenames` restricts the run to the given files of the
+        inbound directory instead of scanning it. With `save_manifest` unset,
+        the manifest is only updated in memory. With `INBOUND_COALESCE`, only
+        the newest record of each workorder within a window of
+        `INBOUND_COALESCE_WINDOW` workorders is written. Returns
+        the run summary, counting records by outcome.
+        """
 
         log.info("Starting inbound workorder processing...")
 
+        self.summary = Counter()
+        self._progress = {}
+
         if not os.path.exists(self.data_inbound_dir):
             log.warning(f"Inbound directory {self.data_inbound_dir} does not exist.")
-            return
+            return self.summary
 
-        for filename in os.listdir(self.data_inbound_dir):
-            if not filename.endswith(".json"):
-                continue
+        if filenames is None:
+            filenames = [
+                filename
+                for filename in os.listdir(self.data_inbound_dir)
+                if filename.endswith(INBOUND_EXTENSIONS)
+            ]
+            await asyncio.to_thread(self.manifest.load)
+            self.manifest.retain(filenames)
+        else:
+            filenames = [
+                filename
+                for filename in filenames
+                if filename.endswith(INBOUND_EXTENSIONS)
+            ]
+            # A long-running process keeps the manifest in memory between runs.
+            if not self.manifest.loaded:
+                await asyncio.to_thread(self.manifest.load)
 
-            filepath = os.path.join(self.data_inbound_dir, filename)
-            log.info(f"Processing file: {filepath}")
+        pipeline = Pipeline(
+            "inbound",
+            source=self._iter_file_records(filenames, full),
+            transform=self._convert_item,
+            sink=InboundSink(
+                self, coalesce=self.coalesce, coalesce_window=self.coalesce_window
+            ),
+            transform_workers=self.transform_workers,
+            # Bulk writes in flight share the connection pool.
+            sink_workers=self.max_in_flight,
+            batch_size=self.batch_size,
+            on_error=self._record_failure,
+        )
+        await pipeline.run()
 
-            data = self.read_json_file(filepath)
-            if data is None:
-                log.error(f"Skipping file {filepath} due to read error.")
-                continue
+        if save_manifest:
+            await asyncio.to_thread(self.manifest.save)
 
-            try:
-                client_workorder = CustomerWorkorderModel(**data)
+        for status in (*(status.value for status in UpsertStatus), SUPERSEDED):
+            if self.summary[status]:
+                RECORDS_TOTAL.labels(direction="inbound", status=status).inc(
+                    self.summary[status]
+                )
+
+        log.info(f"Inbound workorder processing completed: {dict(self.summary)}")
+        return self.summary
+
+    async def _iter_file_records(
+        self, filenames: list[str], full: bool
+    ) -> AsyncIterator[tuple[str, str, Optional[bytes | dict]]]:
+        """Yield `(filename, location, record)` for the records of changed files.
 
-                tracos_workorder = WorkOrderService.convert_customer_to_tracos_model(
-                    client_workorder
+        Up to `max_in_flight` files are read ahead on worker threads, so disk
+        latency overlaps with the rest of the pipeline. Line based files are
+        read a batch of records at a time, also on worker threads.
+        """
+
+        remaining = iter(filenames)
+        loads: deque[tuple[str, asyncio.Task]] = deque()
+
+        def load_next():
+            filename = next(remaining, None)
+            if filename is not None:
+                task = asyncio.create_task(
+                    asyncio.to_thread(self.load_changed_file, filename, full)
                 )
+                loads.append((filename, task))
+
+        for _ in range(self.max_in_flight):
+            load_next()
+
+        while loads:
+            filename, task = loads.popleft()
+            loaded = await task
+            load_next()
+
+            if loaded is None:
+                self.summary["unchanged_files"] += 1
+                continue
+
+            entry, records = loaded
+            if entry is None:
+                self.summary[UpsertStatus.FAILED.value] += 1
+                continue
+
+            progress = FileProgress(entry=entry)
+            self._progress[filename] = progress
+            async for chunk in self._read_chunks(records):
+                for location, record in chunk:
+                    progress.pending += 1
+                    yield filename, location, record
+
+            progress.loaded = True
+            self._record_if_complete(filename)
+
+    async def _read_chunks(
+        self, records: Iterable[tuple[str, Optional[bytes | dict]]]
+    ) -> AsyncIterator[list[tuple[str, Optional[bytes | dict]]]]:
+        """Yield the records of a file, pulling lazy ones on worker threads."""
 
-                await WorkOrderService.upsert_workorder(
-                    self.repository, tracos_workorder, field="number"
+        if isinstance(records, list):
+            yield records
+            return
+
+        records = iter(records)
+        while chunk := await asyncio.to_thread(
+            list, itertools.islice(records, self.batch_size)
+        ):
+            yield chunk
+
+    def _convert_item(
+        self, item: tuple[str, str, Optional[bytes | dict]]
+    ) -> tuple[str, str, TracOSWorkorderModel]:
+        filename, location, record = item
+        return filename, location, self.convert_record(record)
+
+    def _record_failure(self, item: tuple[str, str, Any], error: Exception):
+        """Count a record that could not be converted or written."""
+
+        filename, location, _ = item
+        log.error(f"Error processing {location}: {error}")
+        self.summary[UpsertStatus.FAILED.value] += 1
+
+        progress = self._progress.get(filename)
+        if progress is None:
+            # Its records were all accounted for when the file completed.
+            return
+        progress.pending -= 1
+        progress.failed = True
+        self._record_if_complete(filename)
+
+    def _record_superseded(self, item: tuple[str, str, TracOSWorkorderModel]):
+        """Count a record dropped for a newer record of the same workorder."""
+
+        filename, location, tracos_workorder = item
+        log.info(
+            f"Workorder {tracos_workorder.number} from {location} is superseded by a newer record, skipped."
+        )
+        self.summary[SUPERSEDED] += 1
+
+        progress = self._progress.get(filename)
+        if progress is None:
+            return
+        progress.pending -= 1
+        self._record_if_complete(filename)
+
+    def _record_if_complete(self, filename: str):
+        """Record a file in the manifest once all of its records were written.
+
+        Files with any record that failed are left out, so they are retried on
+        the next run.
+        """
+
+        progress = self._progress[filename]
+        if not progress.loaded or progress.pending:
+            return
+
+        if not progress.failed:
+            self.manifest.record(filename, progress.entry)
+        del self._progress[filename]
+
+    async def _flush_batch(self, batch: list[tuple[str, str, TracOSWorkorderModel]]):
+        """Write a batch of converted workorders with a single bulk upsert."""
+
+        if not batch:
+            return
+
+        try:
+            with DB_SECONDS.time():
+                results = await WorkOrderService.bulk_upsert_workorders(
+                    self.repository,
+                    [tracos_workorder for _, _, tracos_workorder in batch],
+                    field="number",
+                    batch_size=self.batch_size,
+                    prefetch=self.prefetch,
+                )
+        except Exception as e:
+            results = [
+                UpsertResult(
+                    key=tracos_workorder.number,
+                    status=UpsertStatus.FAILED,
+                    error=str(e),
                 )
+                for _, _, tracos_workorder in batch
+            ]
+
+        for (filename, location, tracos_workorder), result in zip(batch, results):
+            self.summary[result.status.value] += 1
 
+            progress = self._progress[filename]
+            progress.pending -= 1
+            if result.status == UpsertStatus.FAILED:
+                progress.failed = True
+                log.error(f"Error processing {location}: {result.error}")
+            elif result.status == UpsertStatus.SKIPPED:
                 log.info(
-                    f"Successfully processed and inserted workorder {tracos_workorder.number} from file {filename}."
+                    f"Workorder {tracos_workorder.number} from {location} is unchanged, skipped."
+                )
+            elif result.status == UpsertStatus.STALE:
+                log.info(
+                    f"Workorder {tracos_workorder.number} from {location} is older than the stored one, skipped."
+                )
+            else:
+                log.info(
+                    f"Successfully processed and inserted workorder {tracos_workorder.number} from {location}."
                 )
 
-            except Exception as e:
-                log.error(f"Error processing file {filepath}: {e}")
-                continue
-
-        log.info("Inbound workorder processing completed.")
+            self._record_if_complete(filename)
@@ -0,0 +1,85 @@
+import os
+import json
+import logging
+from typing import Iterable
+from pydantic import BaseModel
+
+log = logging.getLogger(__name__)
+
+
+class ManifestEntry(BaseModel):
+    size: int
+    mtime: float
+    sha256: str
+
+
+class InboundManifest:
+    """Persistent record of the inbound files that were already ingested."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, ManifestEntry] = {}
+        self.loaded = False
+
+    def load(self):
+        """Load the manifest from disk, starting empty if it is missing or broken."""
+
+        self.loaded = True
+        if not os.path.exists(self.path):
+            self.entries = {}
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.entries = {
+                filename: ManifestEntry.model_validate(entry)
+                for filename, entry in data.items()
+            }
+        except Exception as e:
+            log.warning(f"Ignoring unreadable inbound manifest {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(
+                    {
+                        filename: entry.model_dump()
+                        for filename, entry in self.entries.items()
+                    },
+                    f,
+                )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            log.error(f"Error writing inbound manifest {self.path}: {e}")
+
+    def is_unchanged(self, filename: str, stat: os.stat_result) -> bool:
+        """Check size and mtime, which does not require opening the file."""
+
+        entry = self.entries.get(filename)
+        return (
+            entry is not None
+            and entry.size == stat.st_size
+            and entry.mtime == stat.st_mtime
+        )
+
+    def matches_hash(self, filename: str, sha256: str) -> bool:
+        entry = self.entries.get(filename)
+        return entry is not None and entry.sha256 == sha256
+
+    def record(self, filename: str, entry: ManifestEntry):
+        self.entries[filename] = entry
+
+    def retain(self, filenames: Iterable[str]):
+        """Drop entries for files that are no longer in the inbound folder."""
+
+        keep = set(filenames)
+        self.entries = {
+            filename: entry
+            for filename, entry in self.entries.items()
+            if filename in keep
+        }
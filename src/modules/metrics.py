@@ -0,0 +1,401 @@
+import time
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+# Seconds; fine grained at the low end for per-record stages.
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+class CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+
+class GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def reset(self):
+        self.value = 0.0
+
+
+class HistogramTimer:
+    """Observes the time spent in a `with` block."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: "HistogramValue"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf bucket, not cumulative.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> HistogramTimer:
+        return HistogramTimer(self)
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+class Metric(ABC):
+    """A named metric with one value per combination of label values."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_value(self) -> CounterValue | GaugeValue | HistogramValue:
+        ...
+
+    def labels(self, **labels: Any):
+        """Return the value for the given labels, creating it on first use.
+
+        Hot paths should look the value up once and keep it.
+        """
+
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.setdefault(key, self._new_value())
+        return value
+
+    def items(self) -> list[tuple[dict[str, str], Any]]:
+        return [
+            (dict(zip(self.labelnames, key)), value)
+            for key, value in list(self._values.items())
+        ]
+
+    def reset(self):
+        # Values are reset in place, as callers may hold on to them.
+        for _, value in self.items():
+            value.reset()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_value(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new_value(self) -> GaugeValue:
+        return GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """Holds the metrics of the process and renders them for export."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = ()):
+        return self.register(Histogram(name, documentation, labelnames))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in metric.items():
+                if isinstance(value, HistogramValue):
+                    cumulative = 0
+                    for bound, count in zip(
+                        (*value.bounds, float("inf")), value.counts
+                    ):
+                        cumulative += count
+                        bucket_labels = _format_labels(
+                            {**labels, "le": _format_value(bound)}
+                        )
+                        lines.append(
+                            f"{metric.name}_bucket{bucket_labels} {cumulative}"
+                        )
+                    suffix = _format_labels(labels)
+                    lines.append(
+                        f"{metric.name}_sum{suffix} {_format_value(value.sum)}"
+                    )
+                    lines.append(f"{metric.name}_count{suffix} {value.count}")
+                else:
+                    lines.append(
+                        f"{metric.name}{_format_labels(labels)} "
+                        f"{_format_value(value.value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Return the current values as plain data, e.g. for a JSON summary."""
+
+        snapshot = {}
+        for metric in self._metrics.values():
+            samples = []
+            for labels, value in metric.items():
+                if isinstance(value, HistogramValue):
+                    samples.append(
+                        {
+                            "labels": labels,
+                            "count": value.count,
+                            "sum": value.sum,
+                            "buckets": list(value.counts),
+                        }
+                    )
+                else:
+                    samples.append({"labels": labels, "value": value.value})
+            if samples:
+                snapshot[metric.name] = samples
+        return snapshot
+
+    def merge(self, snapshot: dict[str, list[dict[str, Any]]]):
+        """Add a snapshot taken in another process to the current values.
+
+        Counters and histograms are summed, gauges take the snapshot's value.
+        """
+
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            for sample in samples:
+                value = metric.labels(**sample["labels"])
+                if isinstance(value, HistogramValue):
+                    with value._lock:
+                        value.count += sample["count"]
+                        value.sum += sample["sum"]
+                        for index, count in enumerate(sample["buckets"]):
+                            value.counts[index] += count
+                elif isinstance(value, CounterValue):
+                    value.inc(sample["value"])
+                else:
+                    value.set(sample["value"])
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "workorder_stage_seconds",
+    "Duration of one pipeline stage operation: a file read, a record "
+    "validated or converted, a batch converted, written or sent to the database.",
+    ("stage",),
+)
+RECORDS_TOTAL = REGISTRY.counter(
+    "workorder_records_total",
+    "Workorder records processed, by direction and outcome.",
+    ("direction", "status"),
+)
+OUTBOUND_BACKLOG = REGISTRY.gauge(
+    "workorder_outbound_backlog",
+    "Number of workorders waiting to be exported.",
+)
+SYNC_LAG_SECONDS = REGISTRY.gauge(
+    "workorder_sync_lag_seconds",
+    "Age of the oldest workorder waiting to be exported.",
+)
+
+FILE_READ_SECONDS = STAGE_SECONDS.labels(stage="file_read")
+# Records validated straight from bytes are decoded as part of validation.
+DECODE_SECONDS = STAGE_SECONDS.labels(stage="decode")
+VALIDATE_SECONDS = STAGE_SECONDS.labels(stage="validate")
+CONVERT_SECONDS = STAGE_SECONDS.labels(stage="convert")
+DB_SECONDS = STAGE_SECONDS.labels(stage="db")
+FILE_WRITE_SECONDS = STAGE_SECONDS.labels(stage="file_write")
+
+
+class MetricsServer:
+    """Serves the registry in the Prometheus text format over HTTP.
+
+    `collect` is awaited before each scrape, to refresh gauges that are
+    expensive to keep up to date continuously.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        host: str = "0.0.0.0",
+        port: int = 9108,
+        collect: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.collect = collect
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 binds to a free port; report the real one.
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            # Drain the headers; the request has no body we care about.
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body = "405 Method Not Allowed", b""
+            elif parts[1].split("?")[0] != "/metrics":
+                status, body = "404 Not Found", b""
+            else:
+                if self.collect is not None:
+                    try:
+                        await self.collect()
+                    except Exception as e:
+                        log.error(f"Error collecting metrics: {e}")
+                status, body = "200 OK", self.registry.render().encode()
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            log.error(f"Error serving metrics: {e}")
+        finally:
+            writer.close()
@@ -1,20 +1,117 @@
 import os
 import json
+import asyncio
 import logging
+from collections import Counter
+from typing import Optional
 from decouple import AutoConfig
-from datetime import datetime
+from datetime import datetime, timezone
 
-from src.repositories.workorder_repository import WorkOrderRepository
+from src.models.customer_models import CustomerWorkorderModel
+from src.models.tracOS_models import TracOSWorkorderExport
+from src.modules.codec import JsonCodec
+from src.modules.metrics import (
+    CONVERT_SECONDS,
+    DB_SECONDS,
+    FILE_WRITE_SECONDS,
+    OUTBOUND_BACKLOG,
+    RECORDS_TOTAL,
+    SYNC_LAG_SECONDS,
+)
+from src.modules.pipeline import Pipeline, Sink
+from src.modules.outbound_writer import (
+    OutboundWriter,
+    RecordFileWriter,
+    RollingFileWriter,
+    atomic_write,
+)
+from src.repositories.workorder_repository import (
+    ChangeStreamHistoryLost,
+    WorkOrderRepository,
+    WorkOrderVersion,
+    export_fingerprint,
+)
 from src.service.workorder_service import WorkOrderService
 
 log = logging.getLogger(__name__)
 config = AutoConfig(search_path=".")
 
 
+class OutboundSink(Sink):
+    """Writes workorders to the outbound folder and marks them as synced.
+
+    Conversion and file writes run off the event loop; only records the
+    writer reports as committed to disk are marked as synced. A workorder is
+    unchanged since its last sync when the hash of its exported fields
+    matches the one recorded then. With `force`, unchanged workorders are
+    exported again. Each workorder is marked with the version that was read,
+    so one written again meanwhile stays unsynced.
+    """
+
+    def __init__(
+        self,
+        processor: "OutboundProcessor",
+        writer: OutboundWriter,
+        force: bool = False,
+    ):
+        self.processor = processor
+        self.writer = writer
+        self.force = force
+        self.synced = 0
+        self.failed = False
+        # Versions read and export fingerprints of workorders waiting to be
+        # marked as synced.
+        self._pending: dict[int, tuple[WorkOrderVersion, str]] = {}
+
+    async def write(self, batch: list[TracOSWorkorderExport]):
+        changed = []
+        synced_numbers = []
+        for workorder in batch:
+            log.info(f"Processing workorder: {workorder.number}")
+            fingerprint = export_fingerprint(workorder)
+            self._pending[workorder.number] = (
+                WorkOrderVersion(
+                    updatedAt=workorder.updatedAt, fingerprint=workorder.fingerprint
+                ),
+                fingerprint,
+            )
+            if not self.force and fingerprint == workorder.syncedFingerprint:
+                log.info(
+                    f"Workorder {workorder.number} is unchanged since its last sync, skipping export."
+                )
+                synced_numbers.append(workorder.number)
+            else:
+                changed.append(workorder)
+
+        synced_numbers.extend(
+            await asyncio.to_thread(self.processor._write_batch, self.writer, changed)
+        )
+        await self._mark_synced(synced_numbers)
+
+    async def close(self):
+        await self._mark_synced(await asyncio.to_thread(self.writer.close))
+
+    async def _mark_synced(self, numbers: list[int]):
+        versions = {}
+        fingerprints = {}
+        for number in numbers:
+            if number in self._pending:
+                versions[number], fingerprints[number] = self._pending.pop(number)
+        if await self.processor._mark_synced(versions, fingerprints):
+            self.synced += len(numbers)
+        else:
+            self.failed = True
+
+
 class OutboundProcessor:
-    def __init__(self, repository: WorkOrderRepository):
+    def __init__(
+        self, repository: WorkOrderRepository, codec: Optional[JsonCodec] = None
+    ):
         self.repository = repository
+        self.codec = codec or JsonCodec.from_env()
         self.data_outbound_dir: str = ""
+        self.batch_size: int = config("OUTBOUND_BATCH_SIZE", default=500, cast=int)
+        self.max_in_flight: int = config("OUTBOUND_MAX_IN_FLIGHT", default=4, cast=int)
 
         self._validate_and_set_env_vars()
 
@@ -27,24 +124,44 @@ class OutboundProcessor:
                 "Missing required environment variable: DATA_OUTBOUND_DIR"
             )
         self.data_outbound_dir = data_outbound_dir
+        # Bookkeeping files are kept out of the outbound folder, whose files
+        # are picked up downstream.
+        self.data_state_dir: str = config(
+            "DATA_STATE_DIR",
+            default=os.path.dirname(os.path.normpath(data_outbound_dir)),
+        )
+        self.resume_token_path: str = config(
+            "OUTBOUND_RESUME_TOKEN_PATH",
+            default=os.path.join(self.data_state_dir, ".outbound_resume_token"),
+        )
 
-    def write_json_file(self, file_path: str, data: dict):
-        """Write data to a JSON file."""
+    def create_writer(self, run_id: Optional[str] = None) -> OutboundWriter:
+        """Build the file writer for the configured outbound layout.
 
-        def json_serializer(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Type {type(obj)} not serializable")
+        `run_id` names the files of layouts that batch records into files.
+        """
 
-        try:
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4, default=json_serializer)
-        except PermissionError as e:
-            log.error(f"Permission error writing file {file_path}: {e}")
-        except Exception as e:
-            log.error(f"Unexpected error writing file {file_path}: {e}")
+        layout = config("OUTBOUND_LAYOUT", default="record")
+        fsync = config("OUTBOUND_FSYNC", default=True, cast=bool)
+
+        if layout == "record":
+            return RecordFileWriter(self.data_outbound_dir, self.codec, fsync=fsync)
+        if layout == "ndjson":
+            return RollingFileWriter(
+                self.data_outbound_dir,
+                self.codec,
+                max_records=config(
+                    "OUTBOUND_MAX_RECORDS_PER_FILE", default=10000, cast=int
+                ),
+                max_bytes=config(
+                    "OUTBOUND_MAX_BYTES_PER_FILE", default=64 * 1024 * 1024, cast=int
+                ),
+                fsync=fsync,
+                run_id=run_id,
+            )
+        raise EnvironmentError(f"Unsupported OUTBOUND_LAYOUT: {layout}")
 
-    async def process_files(self):
+    async def process_files(self) -> Counter:
         """Process outbound workorder from TracOS to customer format."""
 
         log.info("Starting outbound workorder processing...")
@@ -52,32 +169,243 @@ class OutboundProcessor:
         # Ensure outbound directory exists
         os.makedirs(self.data_outbound_dir, exist_ok=True)
 
-        # Fetch workorders from the repository where isSynced is False
-        workorders = await self.repository.find_is_synced_workorders(is_synced=False)
+        # Stream workorders from the repository where isSynced is False
+        workorders = self.repository.iter_is_synced_workorders(
+            is_synced=False, batch_size=self.batch_size
+        )
 
-        for workorder in workorders:
-            try:
-                log.info(f"Processing workorder: {workorder.number}")
+        writer = self.create_writer()
+        pipeline = Pipeline(
+            "outbound",
+            source=workorders,
+            sink=OutboundSink(self, writer),
+            sink_workers=self.max_in_flight if writer.concurrent else 1,
+            batch_size=self.batch_size,
+        )
+        stats = await pipeline.run()
+        await self.update_backlog_metrics()
+        return stats
 
-                customer_workorder = WorkOrderService.convert_tracOS_to_customer_model(
-                    workorder
+    async def update_backlog_metrics(self):
+        """Refresh the outbound backlog and sync-lag gauges from the repository."""
+
+        try:
+            backlog = await self.repository.get_sync_backlog()
+        except Exception as e:
+            log.error(f"Error reading the outbound backlog: {e}")
+            return
+
+        lag = 0.0
+        if backlog.oldest_updated_at is not None:
+            oldest = backlog.oldest_updated_at
+            if oldest.tzinfo is None:
+                # Naive datetimes are stored and read back as UTC.
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            lag = max(0.0, (datetime.now(timezone.utc) - oldest).total_seconds())
+
+        OUTBOUND_BACKLOG.set(backlog.count)
+        SYNC_LAG_SECONDS.set(lag)
+
+    def _write_batch(
+        self, writer: OutboundWriter, workorders: list[TracOSWorkorderExport]
+    ) -> list[int]:
+        """Convert a batch of workorders to the customer format and write them."""
+
+        with CONVERT_SECONDS.time():
+            records = self._convert_batch(workorders)
+
+        with FILE_WRITE_SECONDS.time():
+            return writer.write(records)
+
+    def _convert_batch(
+        self, workorders: list[TracOSWorkorderExport]
+    ) -> list[tuple[int, CustomerWorkorderModel]]:
+        """Convert a batch in one pass, or record by record if any record fails.
+
+        Records that cannot be converted are left out, so they stay unsynced.
+        """
+
+        try:
+            customer_workorders = WorkOrderService.convert_tracos_to_customer_models(
+                workorders
+            )
+            return [
+                (workorder.number, customer_workorder)
+                for workorder, customer_workorder in zip(
+                    workorders, customer_workorders
                 )
+            ]
+        except Exception as e:
+            log.warning(
+                f"Error converting {len(workorders)} workorders, converting them one by one: {e}"
+            )
 
-                output_filepath = os.path.join(
-                    self.data_outbound_dir,
-                    f"workorder_{customer_workorder.orderNo}.json",
+        records = []
+        for workorder in workorders:
+            try:
+                records.append(
+                    (
+                        workorder.number,
+                        WorkOrderService.convert_tracOS_to_customer_model(workorder),
+                    )
                 )
-                self.write_json_file(output_filepath, customer_workorder.model_dump())
+            except Exception as e:
+                log.error(f"Error converting workorder {workorder.number}: {e}")
+        return records
+
+    async def _mark_synced(
+        self,
+        versions: dict[int, WorkOrderVersion],
+        fingerprints: Optional[dict[int, str]] = None,
+    ) -> bool:
+        """Flag a group of written workorders as synced in a single update.
+
+        Workorders written again since they were read stay unsynced, so their
+        newer version is exported by a later pass.
+        """
 
+        if not versions:
+            return True
+
+        try:
+            with DB_SECONDS.time():
+                matched = await self.repository.mark_synced(
+                    versions, synced_at=datetime.now(), fingerprints=fingerprints
+                )
+            log.info(f"Marked {matched} workorders as synced.")
+            if matched < len(versions):
                 log.info(
-                    f"Successfully processed and wrote workorder {customer_workorder.orderNo} to file."
+                    f"{len(versions) - matched} workorders changed since they were read, leaving them unsynced."
                 )
+            RECORDS_TOTAL.labels(direction="outbound", status="synced").inc(matched)
+            return True
+        except Exception as e:
+            log.error(f"Error marking workorders {list(versions)} as synced: {e}")
+            RECORDS_TOTAL.labels(direction="outbound", status="failed").inc(
+                len(versions)
+            )
+            return False
+
+    def load_resume_token(self) -> Optional[dict]:
+        if not os.path.exists(self.resume_token_path):
+            return None
+
+        try:
+            with open(self.resume_token_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning(
+                f"Ignoring unreadable resume token {self.resume_token_path}: {e}"
+            )
+            return None
+
+    def save_resume_token(self, resume_token: dict):
+        try:
+            os.makedirs(os.path.dirname(self.resume_token_path) or ".", exist_ok=True)
+            atomic_write(self.resume_token_path, json.dumps(resume_token).encode())
+        except Exception as e:
+            log.error(f"Error writing resume token {self.resume_token_path}: {e}")
+
+    def discard_resume_token(self):
+        try:
+            if os.path.exists(self.resume_token_path):
+                os.remove(self.resume_token_path)
+        except Exception as e:
+            log.error(f"Error removing resume token {self.resume_token_path}: {e}")
+
+    async def stream_files(self, stop: asyncio.Event):
+        """Export unsynced workorders as they are written, until `stop` is set.
+
+        Follows the repository's change stream from the stored resume token.
+        Without a token, the stream is opened first and the existing backlog
+        is then exported with the regular query, so no write is missed. The
+        token is saved once the workorders before it are marked as synced.
+        Errors reopen the stream from the saved token after
+        `OUTBOUND_CHANGE_STREAM_RETRY_SECONDS`; a token the stream can no
+        longer resume from is discarded, so the backlog is queried again.
+        """
 
-                # Mark workorder as synced
-                workorder.isSynced = True
-                workorder.syncedAt = datetime.now()
-                await WorkOrderService.upsert_workorder(
-                    self.repository, workorder, field="number"
+        log.info("Starting outbound change stream processing...")
+
+        os.makedirs(self.data_outbound_dir, exist_ok=True)
+        retry_delay = config(
+            "OUTBOUND_CHANGE_STREAM_RETRY_SECONDS", default=5, cast=float
+        )
+
+        while not stop.is_set():
+            try:
+                await self._follow_change_stream(stop)
+                continue
+            except ChangeStreamHistoryLost as e:
+                log.warning(
+                    f"Change stream cannot resume from {self.resume_token_path}, "
+                    f"exporting the backlog again: {e}"
                 )
+                await asyncio.to_thread(self.discard_resume_token)
             except Exception as e:
-                log.error(f"Error processing workorder {workorder.number}: {e}")
+                log.error(f"Error following the outbound change stream: {e}")
+
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=retry_delay)
+            except asyncio.TimeoutError:
+                pass
+
+        log.info("Outbound change stream processing stopped.")
+
+    async def _follow_change_stream(self, stop: asyncio.Event):
+        resume_token = await asyncio.to_thread(self.load_resume_token)
+        changes = self.repository.watch_unsynced_workorders(
+            resume_token=resume_token,
+            batch_size=self.batch_size,
+            max_await_time_ms=config(
+                "OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS", default=1000, cast=int
+            ),
+        )
+
+        writer = self.create_writer()
+        # Keyed by number, so a workorder changed twice is exported once.
+        pending: dict[int, TracOSWorkorderExport] = {}
+        saved_token = resume_token
+        failed = False
+
+        try:
+            # The first step opens the stream, so it starts before the backlog.
+            change = await anext(changes)
+            if resume_token is None:
+                await self.process_files()
+
+            while True:
+                workorder, resume_token = change
+                if workorder is not None:
+                    pending[workorder.number] = workorder
+
+                # Flush when the batch is full or the stream went idle.
+                if pending and (workorder is None or len(pending) >= self.batch_size):
+                    if not await self._export_batch(writer, list(pending.values())):
+                        # Keep the token before the failure, so a restart
+                        # exports the failed workorders again.
+                        failed = True
+                    pending = {}
+
+                if not pending and not failed and resume_token != saved_token:
+                    await asyncio.to_thread(self.save_resume_token, resume_token)
+                    saved_token = resume_token
+
+                if stop.is_set():
+                    break
+                change = await anext(changes)
+        finally:
+            await changes.aclose()
+
+    async def _export_batch(
+        self, writer: OutboundWriter, workorders: list[TracOSWorkorderExport]
+    ) -> bool:
+        """Write and mark a batch as synced, committing the writer's files.
+
+        Returns whether every workorder of the batch was exported.
+        """
+
+        sink = OutboundSink(self, writer)
+        await sink.write(workorders)
+        await sink.close()
+        return not sink.failed and sink.synced == len(workorders)
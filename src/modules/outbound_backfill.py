@@ -0,0 +1,231 @@
+import os
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from decouple import AutoConfig
+from pydantic import BaseModel
+
+from src.modules.outbound import OutboundProcessor, OutboundSink
+from src.modules.outbound_writer import atomic_write
+from src.modules.pipeline import Pipeline
+
+config = AutoConfig(search_path=".")
+
+log = logging.getLogger(__name__)
+
+BACKFILL_FIELDS = ("number", "updatedAt")
+
+
+class BackfillPartition(BaseModel):
+    """A half-open range `[start, end)` of the backfill."""
+
+    start: int | datetime
+    end: int | datetime
+    done: bool = False
+    exported: int = 0
+
+
+class BackfillCheckpoint(BaseModel):
+    """Progress of a backfill, saved after every completed partition."""
+
+    field: str
+    start: int | datetime
+    end: int | datetime
+    partitions: list[BackfillPartition]
+
+    def matches(self, field: str, start, end) -> bool:
+        return (self.field, self.start, self.end) == (field, start, end)
+
+
+def split_range(
+    start: int | datetime, end: int | datetime, partitions: int
+) -> list[BackfillPartition]:
+    """Split the half-open range `[start, end)` into contiguous partitions."""
+
+    if end <= start:
+        return []
+
+    if isinstance(start, int):
+        # Integer ranges cannot be split finer than one value per partition.
+        step = -(-(end - start) // partitions)
+    else:
+        step = (end - start) / partitions
+
+    bounds = []
+    lower = start
+    while lower < end:
+        upper = min(lower + step, end)
+        bounds.append(BackfillPartition(start=lower, end=upper))
+        lower = upper
+    return bounds
+
+
+class OutboundBackfill:
+    """Re-exports a range of workorders, whether they were synced or not.
+
+    The range of `number` or `updatedAt` is split into partitions that are
+    exported concurrently, at most `max_parallel` at a time, each through
+    its own outbound pipeline. Every completed partition is recorded in a
+    checkpoint file, so running the same backfill again after a crash only
+    exports the partitions that did not complete. Records of an interrupted
+    partition may be exported twice.
+    """
+
+    def __init__(
+        self,
+        processor: OutboundProcessor,
+        field: str,
+        start: int | datetime,
+        end: int | datetime,
+        partitions: Optional[int] = None,
+        max_parallel: Optional[int] = None,
+    ):
+        if field not in BACKFILL_FIELDS:
+            raise ValueError(f"Unsupported backfill field: {field}")
+
+        self.processor = processor
+        self.field = field
+        self.start = start
+        self.end = end
+        self.partitions = partitions or config(
+            "BACKFILL_PARTITIONS", default=16, cast=int
+        )
+        self.max_parallel = max_parallel or config(
+            "BACKFILL_MAX_PARALLEL", default=4, cast=int
+        )
+        self.checkpoint_path: str = config(
+            "BACKFILL_CHECKPOINT_PATH",
+            default=os.path.join(
+                processor.data_state_dir, ".outbound_backfill_checkpoint"
+            ),
+        )
+        self.summary: Counter = Counter()
+
+    def load_checkpoint(self) -> BackfillCheckpoint:
+        """Resume the stored checkpoint of this range, or start a new one."""
+
+        if os.path.exists(self.checkpoint_path):
+            try:
+                with open(self.checkpoint_path, "rb") as f:
+                    checkpoint = BackfillCheckpoint.model_validate_json(f.read())
+                if checkpoint.matches(self.field, self.start, self.end):
+                    return checkpoint
+                log.warning(
+                    f"Ignoring backfill checkpoint {self.checkpoint_path} of another range."
+                )
+            except Exception as e:
+                log.warning(
+                    f"Ignoring unreadable backfill checkpoint {self.checkpoint_path}: {e}"
+                )
+
+        return BackfillCheckpoint(
+            field=self.field,
+            start=self.start,
+            end=self.end,
+            partitions=split_range(self.start, self.end, self.partitions),
+        )
+
+    def save_checkpoint(self, checkpoint: BackfillCheckpoint):
+        try:
+            os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+            atomic_write(self.checkpoint_path, checkpoint.model_dump_json().encode())
+        except Exception as e:
+            log.error(f"Error writing backfill checkpoint {self.checkpoint_path}: {e}")
+
+    async def run(self) -> Counter:
+        """Export every partition that is not done yet and return the summary."""
+
+        log.info(
+            f"Starting outbound backfill of {self.field} from {self.start} to {self.end}..."
+        )
+
+        self.summary = Counter()
+        os.makedirs(self.processor.data_outbound_dir, exist_ok=True)
+
+        checkpoint = await asyncio.to_thread(self.load_checkpoint)
+        pending = [
+            (index, partition)
+            for index, partition in enumerate(checkpoint.partitions)
+            if not partition.done
+        ]
+        self.summary["resumed_partitions"] = len(checkpoint.partitions) - len(pending)
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        # Partitions complete concurrently; save one checkpoint at a time.
+        checkpoint_lock = asyncio.Lock()
+        run_id = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+        async def export(index: int, partition: BackfillPartition):
+            async with semaphore:
+                exported = await self._export_partition(
+                    partition, run_id=f"{run_id}_p{index:05}"
+                )
+
+            if exported is None:
+                self.summary["failed_partitions"] += 1
+                return
+
+            partition.done = True
+            partition.exported = exported
+            self.summary["exported"] += exported
+            self.summary["partitions"] += 1
+            async with checkpoint_lock:
+                await asyncio.to_thread(self.save_checkpoint, checkpoint)
+
+        await asyncio.gather(
+            *(export(index, partition) for index, partition in pending)
+        )
+
+        if all(partition.done for partition in checkpoint.partitions):
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+        else:
+            await asyncio.to_thread(self.save_checkpoint, checkpoint)
+            log.error(
+                f"Outbound backfill incomplete, run it again to resume from {self.checkpoint_path}."
+            )
+
+        log.info(f"Outbound backfill completed: {dict(self.summary)}")
+        return self.summary
+
+    async def _export_partition(
+        self, partition: BackfillPartition, run_id: str
+    ) -> Optional[int]:
+        """Export one partition, returning how many workorders it held.
+
+        Returns None unless every workorder was written and marked as synced.
+        A workorder written again since it was read stays unsynced, so the
+        regular outbound exports its newer version.
+        """
+
+        writer = self.processor.create_writer(run_id=run_id)
+        sink = OutboundSink(self.processor, writer, force=True)
+        pipeline = Pipeline(
+            f"backfill {partition.start}..{partition.end}",
+            source=self.processor.repository.iter_workorders_in_range(
+                self.field,
+                partition.start,
+                partition.end,
+                batch_size=self.processor.batch_size,
+            ),
+            sink=sink,
+            sink_workers=self.processor.max_in_flight if writer.concurrent else 1,
+            batch_size=self.processor.batch_size,
+        )
+        try:
+            stats = await pipeline.run()
+        except Exception as e:
+            log.error(
+                f"Error exporting backfill partition {partition.start}..{partition.end}: {e}"
+            )
+            return None
+
+        if sink.failed or stats["failed"] or sink.synced != stats["read"]:
+            log.error(
+                f"Backfill partition {partition.start}..{partition.end} exported "
+                f"{sink.synced} of {stats['read']} workorders."
+            )
+            return None
+        return sink.synced
@@ -0,0 +1,225 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import BinaryIO, Optional
+from pydantic import BaseModel
+
+from src.modules.codec import JsonCodec
+
+log = logging.getLogger(__name__)
+
+
+def fsync_directory(directory: str):
+    """Flush a directory's entries, making the renames into it durable."""
+
+    # Windows cannot open directories; NTFS journals renames itself.
+    if os.name == "nt":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(
+    file_path: str, content: bytes, fsync: bool = True, fsync_dir: bool = True
+):
+    """Write a file under a temporary name and move it into place.
+
+    Readers of the outbound folder never see a partially written file. With
+    `fsync`, the content and, unless `fsync_dir` is unset because the caller
+    syncs the directory once for several files, the rename are flushed to
+    disk before returning.
+    """
+
+    directory, filename = os.path.split(file_path)
+    temp_path = os.path.join(directory, f".{filename}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+        if fsync and fsync_dir:
+            fsync_directory(directory)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class OutboundWriter(ABC):
+    """Writes customer workorders to the outbound folder.
+
+    `write` and `close` return the keys of the records committed to disk by
+    that call, which are the only ones safe to mark as synced. Both do
+    blocking I/O and are meant to run on a worker thread. `concurrent` tells
+    whether several threads may call `write` at the same time.
+    """
+
+    concurrent: bool = False
+
+    @abstractmethod
+    def write(self, records: list[tuple[int, BaseModel]]) -> list[int]:
+        ...
+
+    @abstractmethod
+    def close(self) -> list[int]:
+        ...
+
+
+class RecordFileWriter(OutboundWriter):
+    """Writes one `workorder_<orderNo>.json` file per record.
+
+    With `fsync`, every file is flushed on its own, but the directory is
+    synced once per batch, before any record of the batch is reported.
+    """
+
+    concurrent = True
+
+    def __init__(self, directory: str, codec: JsonCodec, fsync: bool = True):
+        self.directory = directory
+        self.codec = codec
+        self.fsync = fsync
+
+    def write(self, records: list[tuple[int, BaseModel]]) -> list[int]:
+        committed = []
+        for key, record in records:
+            file_path = os.path.join(self.directory, f"workorder_{key}.json")
+            try:
+                atomic_write(
+                    file_path,
+                    self.codec.encode_model(record),
+                    self.fsync,
+                    fsync_dir=False,
+                )
+            except PermissionError as e:
+                log.error(f"Permission error writing file {file_path}: {e}")
+                continue
+            except Exception as e:
+                log.error(f"Unexpected error writing file {file_path}: {e}")
+                continue
+
+            log.info(f"Successfully processed and wrote workorder {key} to file.")
+            committed.append(key)
+
+        if committed and self.fsync:
+            try:
+                fsync_directory(self.directory)
+            except Exception as e:
+                log.error(f"Error syncing directory {self.directory}: {e}")
+                return []
+        return committed
+
+    def close(self) -> list[int]:
+        return []
+
+
+class RollingFileWriter(OutboundWriter):
+    """Appends records to NDJSON files, rolling over at a record or byte cap.
+
+    Each file is written under a temporary name and only moved into place
+    once it is complete, so its records are committed all at once.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        codec: JsonCodec,
+        max_records: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = True,
+        run_id: Optional[str] = None,
+    ):
+        self.directory = directory
+        self.codec = codec
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        # Part of the file names; writers running side by side need their own.
+        self.run_id = run_id or datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+        self._sequence = 0
+        self._file: Optional[BinaryIO] = None
+        self._file_path = ""
+        self._temp_path = ""
+        self._keys: list[int] = []
+        self._bytes = 0
+
+    def write(self, records: list[tuple[int, BaseModel]]) -> list[int]:
+        committed = []
+        for key, record in records:
+            line = self.codec.encode_model_line(record)
+
+            if self._file is not None and (
+                len(self._keys) >= self.max_records
+                or self._bytes + len(line) > self.max_bytes
+            ):
+                committed.extend(self._commit())
+
+            try:
+                if self._file is None:
+                    self._open()
+                self._file.write(line)
+            except Exception as e:
+                log.error(f"Error writing workorder {key} to {self._file_path}: {e}")
+                self._discard()
+                continue
+
+            self._keys.append(key)
+            self._bytes += len(line)
+        return committed
+
+    def close(self) -> list[int]:
+        return self._commit()
+
+    def _open(self):
+        self._sequence += 1
+        filename = f"workorders_{self.run_id}_{self._sequence:05}.ndjson"
+        self._file_path = os.path.join(self.directory, filename)
+        self._temp_path = os.path.join(self.directory, f".{filename}.tmp")
+        self._file = open(self._temp_path, "wb")
+        self._keys = []
+        self._bytes = 0
+
+    def _commit(self) -> list[int]:
+        if self._file is None:
+            return []
+
+        keys = self._keys
+        try:
+            if self.fsync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temp_path, self._file_path)
+            if self.fsync:
+                fsync_directory(self.directory)
+        except Exception as e:
+            log.error(f"Error committing file {self._file_path}: {e}")
+            self._discard()
+            return []
+
+        log.info(f"Committed {len(keys)} workorders to file {self._file_path}.")
+        self._file = None
+        self._keys = []
+        self._bytes = 0
+        return keys
+
+    def _discard(self):
+        """Drop the file being written; none of its records were committed."""
+
+        if self._file is not None:
+            self._file.close()
+        if self._temp_path and os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+        if self._keys:
+            log.error(
+                f"Discarded {len(self._keys)} workorders that were not committed."
+            )
+        self._file = None
+        self._keys = []
+        self._bytes = 0
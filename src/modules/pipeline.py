@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, AsyncIterable, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+# Marks the end of a queue; each consumer of the queue gets one.
+_DONE = object()
+
+
+class Sink(ABC):
+    """Receives the transformed items of a pipeline in batches."""
+
+    @abstractmethod
+    async def write(self, batch: list[Any]):
+        ...
+
+    async def close(self):
+        """Called once after the last batch was written."""
+
+
+class Pipeline:
+    """Streams items from a source through a transform into a sink.
+
+    The source, the transform workers, the batcher and the sink workers are
+    connected by bounded queues, so a slow sink holds back the transform and
+    the source instead of buffering the whole input in memory.
+
+    `transform` is a plain function applied to each item on worker threads,
+    a chunk of items per thread hop. It may return None to drop an item.
+    An item whose transform raises, or whose batch the sink fails to write,
+    is reported to `on_error` and does not stop the rest of the pipeline.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: AsyncIterable[Any],
+        sink: Sink,
+        transform: Optional[Callable[[Any], Any]] = None,
+        transform_workers: int = 2,
+        sink_workers: int = 1,
+        batch_size: int = 500,
+        queue_size: int = 1000,
+        flush_interval: Optional[float] = None,
+        on_error: Optional[Callable[[Any, Exception], None]] = None,
+    ):
+        self.name = name
+        self.source = source
+        self.sink = sink
+        self.transform = transform
+        self.transform_workers = transform_workers
+        self.sink_workers = sink_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        # Streaming sources may go quiet; flush a partial batch after this long.
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.stats: Counter = Counter()
+
+    def _report_error(self, item: Any, error: Exception):
+        self.stats["failed"] += 1
+        if self.on_error is not None:
+            self.on_error(item, error)
+        else:
+            log.error(f"Pipeline {self.name} failed to process an item: {error}")
+
+    async def run(self) -> Counter:
+        """Run the pipeline until the source is exhausted and return its stats."""
+
+        items: asyncio.Queue = asyncio.Queue(self.queue_size)
+        transformed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        # Each batch holds up to batch_size items, so keep only a few around.
+        batches: asyncio.Queue = asyncio.Queue(max(2, self.sink_workers))
+
+        transform_workers = self.transform_workers if self.transform else 1
+
+        tasks = [
+            asyncio.create_task(self._read_source(items, transform_workers)),
+            *(
+                asyncio.create_task(self._transform(items, transformed))
+                for _ in range(transform_workers)
+            ),
+            asyncio.create_task(self._batch(transformed, batches, transform_workers)),
+            *(
+                asyncio.create_task(self._write(batches))
+                for _ in range(self.sink_workers)
+            ),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            await self.sink.close()
+
+        log.info(f"Pipeline {self.name} completed: {dict(self.stats)}")
+        return self.stats
+
+    async def _read_source(self, items: asyncio.Queue, consumers: int):
+        async for item in self.source:
+            self.stats["read"] += 1
+            await items.put(item)
+
+        for _ in range(consumers):
+            await items.put(_DONE)
+
+    def _transform_chunk(self, chunk: list[Any]) -> list[tuple[Any, Any, bool]]:
+        results = []
+        for item in chunk:
+            try:
+                results.append((item, self.transform(item), True))
+            except Exception as e:
+                results.append((item, e, False))
+        return results
+
+    async def _transform(self, items: asyncio.Queue, transformed: asyncio.Queue):
+        done = False
+        while not done:
+            chunk = []
+            item = await items.get()
+            while item is not _DONE:
+                chunk.append(item)
+                if len(chunk) >= self.batch_size or items.empty():
+                    break
+                item = items.get_nowait()
+            done = item is _DONE
+
+            if not chunk:
+                continue
+
+            if self.transform is None:
+                results = [(item, item, True) for item in chunk]
+            else:
+                results = await asyncio.to_thread(self._transform_chunk, chunk)
+
+            for item, result, ok in results:
+                if not ok:
+                    self._report_error(item, result)
+                elif result is None:
+                    self.stats["dropped"] += 1
+                else:
+                    await transformed.put(result)
+
+        await transformed.put(_DONE)
+
+    async def _batch(
+        self, transformed: asyncio.Queue, batches: asyncio.Queue, producers: int
+    ):
+        batch = []
+        while producers:
+            try:
+                if batch and self.flush_interval is not None:
+                    item = await asyncio.wait_for(
+                        transformed.get(), timeout=self.flush_interval
+                    )
+                else:
+                    item = await transformed.get()
+            except asyncio.TimeoutError:
+                await batches.put(batch)
+                batch = []
+                continue
+
+            if item is _DONE:
+                producers -= 1
+                continue
+
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                await batches.put(batch)
+                batch = []
+
+        if batch:
+            await batches.put(batch)
+        for _ in range(self.sink_workers):
+            await batches.put(_DONE)
+
+    async def _write(self, batches: asyncio.Queue):
+        while True:
+            batch = await batches.get()
+            if batch is _DONE:
+                return
+
+            try:
+                await self.sink.write(batch)
+                self.stats["written"] += len(batch)
+            except Exception as e:
+                for item in batch:
+                    self._report_error(item, e)
@@ -0,0 +1,185 @@
+import os
+import zlib
+import asyncio
+import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from decouple import AutoConfig
+from pydantic import BaseModel
+
+from src.modules.inbound import INBOUND_EXTENSIONS, InboundProcessor
+from src.modules.manifest import InboundManifest, ManifestEntry
+from src.modules.metrics import REGISTRY
+from src.repositories.repository_factory import RepositoryFactory
+from src.repositories.workorder_repository import WorkOrderRepository
+
+config = AutoConfig(search_path=".")
+
+log = logging.getLogger(__name__)
+
+
+class InboundShard(BaseModel):
+    """The files handed to one worker process, with their manifest entries."""
+
+    filenames: list[str]
+    entries: dict[str, ManifestEntry] = {}
+    full: bool = False
+
+
+class ShardResult(BaseModel):
+    summary: dict[str, int]
+    entries: dict[str, ManifestEntry]
+    # Snapshot of the worker's metrics registry, merged by the parent.
+    metrics: dict[str, list[dict[str, Any]]] = {}
+
+
+def shard_index(filename: str, shards: int) -> int:
+    """Stable shard of a file, the same in every process and on every run."""
+
+    return zlib.crc32(filename.encode()) % shards
+
+
+def partition_files(filenames: list[str], shards: int) -> list[list[str]]:
+    partitions: list[list[str]] = [[] for _ in range(shards)]
+    for filename in filenames:
+        partitions[shard_index(filename, shards)].append(filename)
+    return partitions
+
+
+async def process_shard(
+    repository: WorkOrderRepository, shard: InboundShard
+) -> ShardResult:
+    """Run the regular inbound pipeline over the files of one shard."""
+
+    processor = InboundProcessor(repository)
+    processor.manifest.entries = dict(shard.entries)
+    processor.manifest.loaded = True
+
+    summary = await processor.process_files(
+        full=shard.full, filenames=shard.filenames, save_manifest=False
+    )
+    return ShardResult(
+        summary=dict(summary),
+        entries={
+            filename: processor.manifest.entries[filename]
+            for filename in shard.filenames
+            if filename in processor.manifest.entries
+        },
+    )
+
+
+async def _run_shard(shard: InboundShard) -> ShardResult:
+    # Each worker process opens its own connection pool.
+    try:
+        # A pooled process may run several shards; report each one's metrics.
+        REGISTRY.reset()
+        repository = await RepositoryFactory.get_workorder_repository()
+        result = await process_shard(repository, shard)
+        result.metrics = REGISTRY.snapshot()
+        return result
+    finally:
+        await RepositoryFactory.shutdown()
+
+
+def run_shard(shard: InboundShard) -> ShardResult:
+    """Entry point of a worker process."""
+
+    return asyncio.run(_run_shard(shard))
+
+
+def create_process_pool(workers: int) -> Executor:
+    # Forking would copy the parent's MongoDB client, which is not fork-safe.
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+class ShardedInboundProcessor:
+    """Spreads inbound files over worker processes.
+
+    JSON decoding and validation are CPU-bound, so a single process tops out
+    at one core. Files are partitioned by a stable hash of their name and
+    each worker runs the inbound pipeline on its share, writing through its
+    own connection. The parent only merges the counts and manifest entries.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        executor_factory: Callable[[int], Executor] = create_process_pool,
+    ):
+        self.workers = workers or config(
+            "INBOUND_PROCESSES", default=os.cpu_count() or 1, cast=int
+        )
+        self.executor_factory = executor_factory
+        self.summary: Counter = Counter()
+
+        data_inbound_dir = config("DATA_INBOUND_DIR", default=None)
+        if not data_inbound_dir or not isinstance(data_inbound_dir, str):
+            raise EnvironmentError(
+                "Missing required environment variable: DATA_INBOUND_DIR"
+            )
+        self.data_inbound_dir = data_inbound_dir
+        self.manifest = InboundManifest(
+            config(
+                "INBOUND_MANIFEST_PATH",
+                default=os.path.join(data_inbound_dir, ".inbound_manifest"),
+            )
+        )
+
+    async def process_files(self, full: bool = False) -> Counter:
+        log.info(f"Starting inbound processing with {self.workers} processes...")
+
+        self.summary = Counter()
+
+        if not os.path.exists(self.data_inbound_dir):
+            log.warning(f"Inbound directory {self.data_inbound_dir} does not exist.")
+            return self.summary
+
+        filenames = [
+            filename
+            for filename in os.listdir(self.data_inbound_dir)
+            if filename.endswith(INBOUND_EXTENSIONS)
+        ]
+        await asyncio.to_thread(self.manifest.load)
+        self.manifest.retain(filenames)
+
+        shards = [
+            InboundShard(
+                filenames=partition,
+                entries={
+                    filename: self.manifest.entries[filename]
+                    for filename in partition
+                    if filename in self.manifest.entries
+                },
+                full=full,
+            )
+            for partition in partition_files(filenames, self.workers)
+            if partition
+        ]
+
+        loop = asyncio.get_running_loop()
+        with self.executor_factory(self.workers) as executor:
+            futures = [
+                loop.run_in_executor(executor, run_shard, shard) for shard in shards
+            ]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                log.error(
+                    f"Inbound worker failed on {len(shard.filenames)} files: {result}"
+                )
+                self.summary["failed_shards"] += 1
+                continue
+
+            self.summary.update(result.summary)
+            self.manifest.entries.update(result.entries)
+            REGISTRY.merge(result.metrics)
+
+        await asyncio.to_thread(self.manifest.save)
+
+        log.info(f"Inbound workorder processing completed: {dict(self.summary)}")
+        return self.summary
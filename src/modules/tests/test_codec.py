@@ -0,0 +1,69 @@
+import json
+import pytest
+from datetime import datetime
+
+from src.models.customer_models import CustomerWorkorderModel
+from src.modules import codec as codec_module
+from src.modules.codec import JsonCodec
+
+
+@pytest.fixture
+def customer_workorder():
+    return CustomerWorkorderModel(
+        orderNo=1,
+        isCanceled=False,
+        isDeleted=False,
+        isDone=True,
+        isOnHold=False,
+        isPending=False,
+        summary="Codec workorder",
+        creationDate=datetime(2025, 12, 14, 10, 0, 0),
+        lastUpdateDate=datetime(2025, 12, 14, 12, 0, 0, 123000),
+    )
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_codec_round_trips_models(customer_workorder, use_orjson):
+    codec = JsonCodec(use_orjson=use_orjson)
+
+    content = codec.encode_model(customer_workorder)
+
+    assert codec.decode_model(content, CustomerWorkorderModel) == customer_workorder
+    assert codec.decode(content)["lastUpdateDate"] == "2025-12-14T12:00:00.123000"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_codec_encodes_plain_data(customer_workorder, use_orjson):
+    codec = JsonCodec(use_orjson=use_orjson)
+
+    content = codec.encode(customer_workorder.model_dump())
+
+    assert json.loads(content)["creationDate"] == "2025-12-14T10:00:00"
+
+
+def test_codec_compact_output(customer_workorder):
+    pretty = JsonCodec(compact=False).encode_model(customer_workorder)
+    compact = JsonCodec(compact=True).encode_model(customer_workorder)
+
+    assert b"\n" in pretty
+    assert b"\n" not in compact
+    assert json.loads(pretty) == json.loads(compact)
+
+
+def test_codec_encodes_model_lines(customer_workorder):
+    line = JsonCodec(compact=False).encode_model_line(customer_workorder)
+
+    assert line.endswith(b"\n")
+    assert line.count(b"\n") == 1
+    assert json.loads(line)["orderNo"] == 1
+
+
+def test_codec_falls_back_without_orjson(monkeypatch, customer_workorder):
+    monkeypatch.setattr(codec_module, "orjson", None)
+
+    codec = JsonCodec(use_orjson=True)
+
+    assert codec.use_orjson is False
+    assert codec.decode(b'{"orderNo": 1}') == {"orderNo": 1}
+    with pytest.raises(json.JSONDecodeError):
+        codec.decode(b"{not valid json")
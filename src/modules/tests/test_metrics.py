@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+
+from src.modules.metrics import MetricsRegistry, MetricsServer
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage duration.", ("stage",))
+    read = histogram.labels(stage="read")
+    for value in (0.0001, 0.002, 20):
+        read.observe(value)
+
+    text = registry.render()
+
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="read",le="0.0001"} 1' in text
+    assert 'stage_seconds_bucket{stage="read",le="0.005"} 2' in text
+    assert 'stage_seconds_bucket{stage="read",le="10"} 2' in text
+    assert 'stage_seconds_bucket{stage="read",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="read"} 3' in text
+
+
+def test_snapshot_merge_and_reset():
+    registry = MetricsRegistry()
+    counter = registry.counter("records_total", "Records.", ("status",))
+    gauge = registry.gauge("backlog", "Backlog.")
+    histogram = registry.histogram("seconds", "Duration.")
+    inserted = counter.labels(status="inserted")
+
+    inserted.inc(2)
+    gauge.set(5)
+    histogram.observe(0.5)
+    snapshot = registry.snapshot()
+
+    registry.merge(snapshot)
+    assert inserted.value == 4
+    assert gauge.labels().value == 5
+    assert histogram.labels().count == 2
+
+    registry.reset()
+    # Values held by callers keep reporting into the registry.
+    inserted.inc()
+    assert registry.snapshot()["records_total"] == [
+        {"labels": {"status": "inserted"}, "value": 1}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_prometheus_text():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("backlog", "Backlog.")
+
+    async def collect():
+        gauge.set(7)
+
+    server = MetricsServer(registry, host="127.0.0.1", port=0, collect=collect)
+    await server.start()
+    try:
+
+        async def get(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response
+
+        response = await get("/metrics")
+        assert response.startswith(b"HTTP/1.1 200 OK")
+        assert response.endswith(b"backlog 7\n")
+
+        assert (await get("/other")).startswith(b"HTTP/1.1 404")
+    finally:
+        await server.close()
@@ -0,0 +1,112 @@
+import json
+import os
+from datetime import datetime
+
+from src.models.customer_models import CustomerWorkorderModel
+from src.modules import outbound_writer
+from src.modules.codec import JsonCodec
+from src.modules.outbound_writer import RecordFileWriter, RollingFileWriter
+
+
+def build_record(order_no: int) -> tuple[int, CustomerWorkorderModel]:
+    return order_no, CustomerWorkorderModel(
+        orderNo=order_no,
+        isCanceled=False,
+        isDeleted=False,
+        isDone=False,
+        isOnHold=False,
+        isPending=True,
+        summary=f"Workorder {order_no}",
+        creationDate=datetime(2025, 12, 14, 10, 0, 0),
+        lastUpdateDate=datetime(2025, 12, 14, 12, 0, 0),
+    )
+
+
+def read_ndjson(path) -> list[int]:
+    with open(path, "r") as f:
+        return [json.loads(line)["orderNo"] for line in f]
+
+
+def test_record_file_writer_writes_one_file_per_record(tmp_path):
+    writer = RecordFileWriter(str(tmp_path), JsonCodec(), fsync=False)
+
+    committed = writer.write([build_record(1), build_record(2)])
+
+    assert committed == [1, 2]
+    assert writer.close() == []
+    assert sorted(os.listdir(tmp_path)) == ["workorder_1.json", "workorder_2.json"]
+    with open(tmp_path / "workorder_1.json", "r") as f:
+        assert json.load(f)["orderNo"] == 1
+
+
+def test_rolling_file_writer_rolls_by_record_count(tmp_path):
+    writer = RollingFileWriter(str(tmp_path), JsonCodec(), max_records=2)
+
+    committed = writer.write([build_record(number) for number in range(1, 6)])
+    assert committed == [1, 2, 3, 4]
+
+    # Records of the file still being written are not visible yet.
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".ndjson")]) == 2
+
+    assert writer.close() == [5]
+
+    files = sorted(name for name in os.listdir(tmp_path))
+    assert len(files) == 3
+    assert not any(name.endswith(".tmp") for name in files)
+    assert [read_ndjson(tmp_path / name) for name in files] == [[1, 2], [3, 4], [5]]
+
+
+def test_rolling_file_writer_rolls_by_size(tmp_path):
+    _, record = build_record(1)
+    codec = JsonCodec()
+    line_size = len(codec.encode_model_line(record))
+    writer = RollingFileWriter(str(tmp_path), codec, max_bytes=line_size * 2)
+
+    committed = writer.write([build_record(number) for number in range(1, 4)])
+    committed += writer.close()
+
+    assert committed == [1, 2, 3]
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_rolling_file_writer_does_not_report_failed_commits(tmp_path, monkeypatch):
+    writer = RollingFileWriter(str(tmp_path), JsonCodec(), max_records=10)
+    writer.write([build_record(1), build_record(2)])
+
+    def failing_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(outbound_writer.os, "replace", failing_replace)
+
+    assert writer.close() == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_record_file_writer_syncs_the_directory_once_per_batch(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(outbound_writer, "fsync_directory", synced.append)
+    writer = RecordFileWriter(str(tmp_path), JsonCodec(), fsync=True)
+
+    assert writer.write([build_record(1), build_record(2)]) == [1, 2]
+    assert synced == [str(tmp_path)]
+
+
+def test_record_file_writer_does_not_report_unsynced_renames(tmp_path, monkeypatch):
+    def failing_fsync_directory(directory):
+        raise OSError("I/O error")
+
+    monkeypatch.setattr(outbound_writer, "fsync_directory", failing_fsync_directory)
+    writer = RecordFileWriter(str(tmp_path), JsonCodec(), fsync=True)
+
+    assert writer.write([build_record(1)]) == []
+
+
+def test_rolling_file_writer_syncs_the_directory_on_commit(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(outbound_writer, "fsync_directory", synced.append)
+    writer = RollingFileWriter(str(tmp_path), JsonCodec(), max_records=2)
+
+    writer.write([build_record(number) for number in range(1, 4)])
+    writer.close()
+
+    assert synced == [str(tmp_path)] * 2
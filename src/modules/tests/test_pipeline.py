@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+
+from src.modules.pipeline import Pipeline, Sink
+
+
+class ListSink(Sink):
+    def __init__(self, delay: float = 0, fail_on=None):
+        self.batches = []
+        self.closed = False
+        self.delay = delay
+        self.fail_on = fail_on
+
+    async def write(self, batch):
+        await asyncio.sleep(self.delay)
+        if self.fail_on is not None and self.fail_on in batch:
+            raise RuntimeError("write failed")
+        self.batches.append(batch)
+
+    async def close(self):
+        self.closed = True
+
+
+async def numbers(count: int):
+    for number in range(count):
+        yield number
+
+
+@pytest.mark.asyncio
+async def test_pipeline_transforms_and_batches_items():
+    sink = ListSink()
+    pipeline = Pipeline(
+        "test",
+        source=numbers(10),
+        sink=sink,
+        transform=lambda number: number * 2,
+        transform_workers=3,
+        sink_workers=2,
+        batch_size=4,
+    )
+
+    stats = await pipeline.run()
+
+    assert sorted(item for batch in sink.batches for item in batch) == [
+        number * 2 for number in range(10)
+    ]
+    assert all(len(batch) <= 4 for batch in sink.batches)
+    assert sink.closed
+    assert stats["read"] == 10
+    assert stats["written"] == 10
+
+
+@pytest.mark.asyncio
+async def test_pipeline_isolates_failed_items():
+    def transform(number):
+        if number == 3:
+            raise ValueError("bad record")
+        return None if number == 4 else number
+
+    errors = []
+    sink = ListSink(fail_on=7)
+    pipeline = Pipeline(
+        "test",
+        source=numbers(10),
+        sink=sink,
+        transform=transform,
+        transform_workers=1,
+        batch_size=2,
+        on_error=lambda item, error: errors.append((item, str(error))),
+    )
+
+    stats = await pipeline.run()
+
+    written = sorted(item for batch in sink.batches for item in batch)
+    assert written == [0, 1, 2, 5, 8, 9]
+    assert (3, "bad record") in errors
+    assert {item for item, error in errors if error == "write failed"} == {6, 7}
+    assert stats["failed"] == 3
+    assert stats["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_applies_backpressure_to_the_source():
+    read = []
+
+    async def source():
+        for number in range(100):
+            read.append(number)
+            yield number
+
+    sink = ListSink(delay=0.01)
+    pipeline = Pipeline("test", source=source(), sink=sink, batch_size=5, queue_size=5)
+    task = asyncio.create_task(pipeline.run())
+
+    await asyncio.sleep(0.03)
+    in_flight = len(read) - sum(len(batch) for batch in sink.batches)
+    await task
+
+    # Two queues of 5, two queued batches and what each task holds.
+    assert in_flight <= 40
+    assert len(read) == 100
+
+
+@pytest.mark.asyncio
+async def test_pipeline_flushes_partial_batches_when_idle():
+    release = asyncio.Event()
+
+    async def source():
+        yield 1
+        await release.wait()
+        yield 2
+
+    sink = ListSink()
+    pipeline = Pipeline(
+        "test", source=source(), sink=sink, batch_size=10, flush_interval=0.01
+    )
+    task = asyncio.create_task(pipeline.run())
+
+    for _ in range(100):
+        if sink.batches:
+            break
+        await asyncio.sleep(0.01)
+    assert sink.batches == [[1]]
+
+    release.set()
+    await task
+    assert sink.batches == [[1], [2]]
@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+
+from src.modules.profiling import PipelineProfiler
+
+
+def build_records(count: int) -> list[dict]:
+    return [{"orderNo": number, "summary": "x" * 64} for number in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_profiler_reports_worker_threads_and_allocations(tmp_path):
+    async def stage():
+        return await asyncio.to_thread(build_records, 10000)
+
+    profiler = PipelineProfiler(str(tmp_path), top=10)
+    records = await profiler.run("inbound", stage())
+
+    assert len(records) == 10000
+    assert (tmp_path / "inbound.pstats").exists()
+    assert "build_records" in (tmp_path / "inbound_cumulative.txt").read_text()
+
+    memory = (tmp_path / "inbound_memory.txt").read_text()
+    assert memory.startswith("Peak traced memory:")
+    assert "test_profiling.py" in memory
+
+    # The loop keeps a working default executor after the stage.
+    assert await asyncio.to_thread(sum, [1, 2]) == 3
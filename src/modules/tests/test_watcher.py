@@ -0,0 +1,82 @@
+import os
+import asyncio
+import pytest
+
+from src.modules.watcher import FileDebouncer, InotifyWatcher, PollingWatcher
+
+
+async def wait_for_change(changes: list[str], filename: str, timeout: float = 2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while filename not in changes and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_polling_watcher_reports_new_and_modified_files(tmp_path):
+    (tmp_path / "existing.json").write_text("{}")
+    changes = []
+    watcher = PollingWatcher(str(tmp_path), changes.append, interval=0.01)
+    await watcher.start()
+
+    try:
+        (tmp_path / "new.json").write_text("{}")
+        await wait_for_change(changes, "new.json")
+        (tmp_path / "existing.json").write_text('{"changed": true}')
+        await wait_for_change(changes, "existing.json")
+    finally:
+        await watcher.close()
+
+    assert "new.json" in changes
+    assert "existing.json" in changes
+
+
+@pytest.mark.asyncio
+async def test_inotify_watcher_reports_new_files(tmp_path):
+    changes = []
+    try:
+        watcher = InotifyWatcher(str(tmp_path), changes.append)
+        await watcher.start()
+    except OSError:
+        pytest.skip("inotify is not available")
+
+    try:
+        os.makedirs(tmp_path / "subdir")
+        (tmp_path / "new.json").write_text("{}")
+        await wait_for_change(changes, "new.json")
+    finally:
+        await watcher.close()
+
+    assert "new.json" in changes
+    assert "subdir" not in changes
+
+
+@pytest.mark.asyncio
+async def test_debouncer_waits_for_files_to_settle(tmp_path):
+    debouncer = FileDebouncer(str(tmp_path), delay=0.2)
+    file_path = tmp_path / "partial.json"
+
+    file_path.write_text('{"orderNo"')
+    debouncer.touch("partial.json")
+    ready = asyncio.create_task(debouncer.ready())
+
+    # Keep writing without reporting it, like a slow writer between events.
+    await asyncio.sleep(0.05)
+    file_path.write_text('{"orderNo": 1}')
+    await asyncio.sleep(0.25)
+    assert not ready.done()
+
+    assert await asyncio.wait_for(ready, timeout=1) == ["partial.json"]
+
+
+@pytest.mark.asyncio
+async def test_debouncer_drops_removed_files(tmp_path):
+    debouncer = FileDebouncer(str(tmp_path), delay=0.01)
+    (tmp_path / "gone.json").write_text("{}")
+    (tmp_path / "kept.json").write_text("{}")
+
+    debouncer.touch("gone.json")
+    debouncer.touch("kept.json")
+    os.remove(tmp_path / "gone.json")
+
+    assert await asyncio.wait_for(debouncer.ready(), timeout=1) == ["kept.json"]
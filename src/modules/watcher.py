@@ -0,0 +1,252 @@
+import os
+import sys
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+from decouple import AutoConfig
+
+config = AutoConfig(search_path=".")
+
+log = logging.getLogger(__name__)
+
+# inotify(7) flags and event masks.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class DirectoryWatcher(ABC):
+    """Reports the names of files created or modified in a directory.
+
+    `on_change` is called on the event loop, possibly several times for the
+    same file while it is being written.
+    """
+
+    def __init__(self, directory: str, on_change: Callable[[str], None]):
+        self.directory = directory
+        self.on_change = on_change
+
+    @abstractmethod
+    async def start(self):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """Watches a directory with Linux inotify, read from the event loop."""
+
+    def __init__(self, directory: str, on_change: Callable[[str], None]):
+        super().__init__(directory, on_change)
+        self._libc = self._load_libc()
+        self._fd: Optional[int] = None
+
+    @staticmethod
+    def _load_libc() -> ctypes.CDLL:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("libc does not provide inotify")
+        return libc
+
+    async def start(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        watch = self._libc.inotify_add_watch(
+            fd, os.fsencode(self.directory), WATCH_MASK
+        )
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno), self.directory)
+
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._read_events)
+        log.info(f"Watching {self.directory} with inotify.")
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, so report every file to be safe.
+                log.warning(f"inotify queue overflowed for {self.directory}.")
+                for entry in os.scandir(self.directory):
+                    if entry.is_file():
+                        self.on_change(entry.name)
+            elif name and not mask & IN_ISDIR:
+                self.on_change(os.fsdecode(name))
+
+    async def close(self):
+        if self._fd is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+
+class PollingWatcher(DirectoryWatcher):
+    """Watches a directory by comparing the size and mtime of its files."""
+
+    def __init__(
+        self,
+        directory: str,
+        on_change: Callable[[str], None],
+        interval: float = 0.5,
+    ):
+        super().__init__(directory, on_change)
+        self.interval = interval
+        self._snapshot: dict[str, tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError as e:
+            log.error(f"Error scanning directory {self.directory}: {e}")
+        return snapshot
+
+    async def start(self):
+        # Files already present are not reported, only later changes.
+        self._snapshot = await asyncio.to_thread(self._scan)
+        self._task = asyncio.create_task(self._poll())
+        log.info(f"Watching {self.directory} by polling every {self.interval}s.")
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = await asyncio.to_thread(self._scan)
+            for filename, signature in snapshot.items():
+                if self._snapshot.get(filename) != signature:
+                    self.on_change(filename)
+            self._snapshot = snapshot
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def create_watcher(
+    directory: str, on_change: Callable[[str], None]
+) -> DirectoryWatcher:
+    """Build the configured watcher, falling back to polling without inotify."""
+
+    backend = config("WATCH_BACKEND", default="auto")
+    interval = config("WATCH_POLL_INTERVAL_MS", default=500, cast=int) / 1000
+
+    if backend not in ("auto", "inotify", "polling"):
+        raise EnvironmentError(f"Unsupported WATCH_BACKEND: {backend}")
+
+    if backend != "polling":
+        try:
+            return InotifyWatcher(directory, on_change)
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            log.info(f"inotify is not available ({e}), falling back to polling.")
+    return PollingWatcher(directory, on_change, interval=interval)
+
+
+class FileDebouncer:
+    """Holds changed files back until they stop changing.
+
+    A file is released once `delay` seconds passed since its last reported
+    change and its size and mtime did not move in the meantime, so files that
+    are still being written are not picked up half way.
+    """
+
+    def __init__(self, directory: str, delay: float = 0.2):
+        self.directory = directory
+        self.delay = delay
+        self._pending: dict[str, tuple[float, Optional[tuple[int, int]]]] = {}
+        self._changed = asyncio.Event()
+
+    def _signature(self, filename: str) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(os.path.join(self.directory, filename))
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def touch(self, filename: str):
+        loop = asyncio.get_running_loop()
+        self._pending[filename] = (
+            loop.time() + self.delay,
+            self._signature(filename),
+        )
+        self._changed.set()
+
+    async def ready(self) -> list[str]:
+        """Wait for at least one settled file and return every settled file."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            self._changed.clear()
+            now = loop.time()
+
+            settled = []
+            for filename, (deadline, signature) in list(self._pending.items()):
+                if deadline > now:
+                    continue
+
+                current = self._signature(filename)
+                del self._pending[filename]
+                if current is None:
+                    continue
+                if current != signature:
+                    self._pending[filename] = (now + self.delay, current)
+                    continue
+                settled.append(filename)
+
+            if settled:
+                return settled
+
+            timeout = None
+            if self._pending:
+                timeout = min(deadline for deadline, _ in self._pending.values()) - now
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
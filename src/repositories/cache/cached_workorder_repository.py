@@ -0,0 +1,250 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Optional, Self
+from pydantic import BaseModel
+
+from src.models.tracOS_models import TracOSWorkorderExport, TracOSWorkorderModel
+from src.repositories.workorder_repository import (
+    SyncBacklog,
+    UpsertResult,
+    WorkOrderRepository,
+    WorkOrderVersion,
+)
+
+_MISSING = object()
+
+# Cache key prefixes: full workorders from `find_by_field` and the versions
+# the inbound prefetch reads with `find_many_by_field`.
+_WORKORDER = "workorder"
+_VERSION = "version"
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """Mapping bounded to `max_size` entries that expire after `ttl` seconds.
+
+    The least recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        # Bumped by every invalidation, so a read that raced a write does not
+        # store what it read before the write.
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value, or `_MISSING` (cached values may be None)."""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return _MISSING
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any, generation: Optional[int] = None):
+        """Store a value, unless the cache was invalidated since `generation`."""
+
+        if generation is not None and generation != self.generation:
+            return
+
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, keys: list[Any]):
+        self.generation += 1
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+class CachedWorkOrderRepository(WorkOrderRepository):
+    """Read-through cache in front of another workorder repository.
+
+    Lookups by `number`, including misses, are served from an `LRUCache`
+    until they expire: single workorders from `find_by_field` and the stored
+    versions the inbound prefetch reads with `find_many_by_field`, so
+    re-ingesting known workorders skips the database read. Every write
+    through this repository invalidates the numbers it touches. Writes made
+    by other processes are only seen once the entries expire, so keep the TTL
+    short. Lookups by any other field go straight to the wrapped repository.
+    """
+
+    def __init__(self, repository: WorkOrderRepository, cache: LRUCache):
+        self.repository = repository
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped repository's attributes, e.g. its client.
+        if name == "repository":
+            raise AttributeError(name)
+        return getattr(self.repository, name)
+
+    async def connect_with_retries(self, max_retries: int = 5, delay: int = 2) -> Self:
+        await self.repository.connect_with_retries(max_retries, delay)
+        return self
+
+    async def ensure_indexes(self, include_updated_at: bool = False) -> list[str]:
+        return await self.repository.ensure_indexes(include_updated_at)
+
+    async def find_by_field(
+        self, field: str, value: str
+    ) -> Optional[TracOSWorkorderModel]:
+        if field != "number":
+            return await self.repository.find_by_field(field, value)
+
+        cached = self.cache.get((_WORKORDER, value))
+        if cached is not _MISSING:
+            return cached.model_copy() if cached is not None else None
+
+        generation = self.cache.generation
+        workorder = await self.repository.find_by_field(field, value)
+        self.cache.set(
+            (_WORKORDER, value),
+            workorder.model_copy() if workorder is not None else None,
+            generation,
+        )
+        return workorder
+
+    async def find_many_by_field(
+        self, field: str, values: list[Any]
+    ) -> dict[Any, WorkOrderVersion]:
+        if field != "number":
+            return await self.repository.find_many_by_field(field, values)
+
+        versions = {}
+        missing = []
+        for value in values:
+            cached = self.cache.get((_VERSION, value))
+            if cached is _MISSING:
+                missing.append(value)
+            elif cached is not None:
+                versions[value] = cached
+
+        if missing:
+            generation = self.cache.generation
+            fetched = await self.repository.find_many_by_field(field, missing)
+            for value in missing:
+                version = fetched.get(value)
+                self.cache.set((_VERSION, value), version, generation)
+                if version is not None:
+                    versions[value] = version
+        return versions
+
+    def _invalidate(self, numbers: list[int], versions: bool = True):
+        kinds = (_WORKORDER, _VERSION) if versions else (_WORKORDER,)
+        self.cache.invalidate([(kind, number) for number in numbers for kind in kinds])
+
+    async def insert(self, entity: TracOSWorkorderModel) -> TracOSWorkorderModel:
+        try:
+            return await self.repository.insert(entity)
+        finally:
+            self._invalidate([entity.number])
+
+    async def update(
+        self, number: int, entity: TracOSWorkorderModel
+    ) -> Optional[TracOSWorkorderModel]:
+        try:
+            return await self.repository.update(number, entity)
+        finally:
+            self._invalidate([number, entity.number])
+
+    async def upsert(
+        self, entity: TracOSWorkorderModel, key: str = "number"
+    ) -> UpsertResult:
+        try:
+            return await self.repository.upsert(entity, key)
+        finally:
+            self._invalidate([entity.number])
+
+    async def bulk_upsert(
+        self,
+        entities: list[TracOSWorkorderModel],
+        key: str = "number",
+        batch_size: int = 1000,
+    ) -> list[UpsertResult]:
+        try:
+            return await self.repository.bulk_upsert(entities, key, batch_size)
+        finally:
+            self._invalidate([entity.number for entity in entities])
+
+    async def mark_synced(
+        self,
+        versions: dict[int, WorkOrderVersion],
+        synced_at: datetime,
+        fingerprints: Optional[dict[int, str]] = None,
+    ) -> int:
+        try:
+            return await self.repository.mark_synced(versions, synced_at, fingerprints)
+        finally:
+            # Syncing leaves updatedAt and the fingerprint, so versions stay valid.
+            self._invalidate(list(versions), versions=False)
+
+    async def find_is_synced_workorders(
+        self, is_synced: bool = True
+    ) -> list[TracOSWorkorderModel]:
+        return await self.repository.find_is_synced_workorders(is_synced)
+
+    async def get_sync_backlog(self) -> SyncBacklog:
+        return await self.repository.get_sync_backlog()
+
+    def iter_is_synced_workorders(
+        self, is_synced: bool = True, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        return self.repository.iter_is_synced_workorders(is_synced, batch_size)
+
+    def iter_workorders_in_range(
+        self, field: str, start: Any, end: Any, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        return self.repository.iter_workorders_in_range(field, start, end, batch_size)
+
+    def watch_unsynced_workorders(
+        self,
+        resume_token: Optional[dict] = None,
+        batch_size: int = 500,
+        max_await_time_ms: int = 1000,
+    ) -> AsyncIterator[tuple[Optional[TracOSWorkorderExport], dict]]:
+        return self.repository.watch_unsynced_workorders(
+            resume_token, batch_size, max_await_time_ms
+        )
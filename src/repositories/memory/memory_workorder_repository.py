@@ -0,0 +1,236 @@
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Self
+
+from src.models.tracOS_models import (
+    TracOSWorkorderExport,
+    TracOSWorkorderExportModel,
+    TracOSWorkorderModel,
+)
+from src.repositories.workorder_repository import (
+    SCHEMA_VERSION,
+    SyncBacklog,
+    UpsertResult,
+    UpsertStatus,
+    WorkOrderRepository,
+    WorkOrderVersion,
+    is_stale,
+    workorder_fingerprint,
+)
+
+
+class MemoryWorkOrderRepository(WorkOrderRepository):
+    """In-process repository keeping documents in a dict keyed by number.
+
+    It mirrors the behaviour of the MongoDB repository, including fingerprint
+    based no-op skipping, and is meant for benchmarks and local experiments
+    where a MongoDB instance is not available.
+    """
+
+    def __init__(self):
+        self.documents: dict[int, dict] = {}
+        # Numbers of the written workorders in write order, standing in for
+        # the change stream; a resume token is a position in this list.
+        self.changes: list[int] = []
+        self._changed: Optional[asyncio.Event] = None
+
+    async def connect_with_retries(self, max_retries: int = 5, delay: int = 2) -> Self:
+        return self
+
+    async def ensure_indexes(self, include_updated_at: bool = False) -> list[str]:
+        return []
+
+    def _record_change(self, number: int):
+        self.changes.append(number)
+        if self._changed is not None:
+            self._changed.set()
+
+    def _to_document(self, entity: TracOSWorkorderModel) -> dict:
+        return {
+            **entity.model_dump(),
+            "fingerprint": workorder_fingerprint(entity),
+            "schemaVersion": SCHEMA_VERSION,
+        }
+
+    async def find_by_field(
+        self, field: str, value: str
+    ) -> Optional[TracOSWorkorderModel]:
+        if field == "number":
+            document = self.documents.get(value)
+        else:
+            document = next(
+                (doc for doc in self.documents.values() if doc.get(field) == value),
+                None,
+            )
+        return TracOSWorkorderModel.model_validate(document) if document else None
+
+    async def find_many_by_field(
+        self, field: str, values: list[Any]
+    ) -> dict[Any, WorkOrderVersion]:
+        wanted = set(values)
+        if field == "number":
+            documents = [
+                self.documents[value] for value in wanted if value in self.documents
+            ]
+        else:
+            documents = [
+                document
+                for document in self.documents.values()
+                if document.get(field) in wanted
+            ]
+        return {
+            document[field]: WorkOrderVersion.model_validate(document)
+            for document in documents
+        }
+
+    async def insert(self, entity: TracOSWorkorderModel) -> TracOSWorkorderModel:
+        if entity.number in self.documents:
+            raise ValueError(f"Workorder {entity.number} already exists.")
+
+        self.documents[entity.number] = self._to_document(entity)
+        self._record_change(entity.number)
+        return entity
+
+    async def update(
+        self, number: int, entity: TracOSWorkorderModel
+    ) -> Optional[TracOSWorkorderModel]:
+        document = self.documents.get(number)
+        data = self._to_document(entity)
+        if document is None or document.get("fingerprint") == data["fingerprint"]:
+            return None
+
+        document.update(data)
+        self._record_change(number)
+        return entity
+
+    async def upsert(
+        self, entity: TracOSWorkorderModel, key: str = "number"
+    ) -> UpsertResult:
+        data = self._to_document(entity)
+        document = self.documents.get(entity.number)
+
+        if document is None:
+            self.documents[entity.number] = data
+            self._record_change(entity.number)
+            status = UpsertStatus.INSERTED
+        elif document.get("fingerprint") == data["fingerprint"]:
+            status = UpsertStatus.SKIPPED
+        elif is_stale(document.get("updatedAt"), entity.updatedAt):
+            status = UpsertStatus.STALE
+        else:
+            document.update(data)
+            self._record_change(entity.number)
+            status = UpsertStatus.UPDATED
+        return UpsertResult(key=getattr(entity, key), status=status)
+
+    async def bulk_upsert(
+        self,
+        entities: list[TracOSWorkorderModel],
+        key: str = "number",
+        batch_size: int = 1000,
+    ) -> list[UpsertResult]:
+        results = []
+        for index, entity in enumerate(entities):
+            results.append(await self.upsert(entity, key))
+
+            # Yield to the event loop between batches, like a real round trip.
+            if (index + 1) % batch_size == 0:
+                await asyncio.sleep(0)
+        return results
+
+    async def mark_synced(
+        self,
+        versions: dict[int, WorkOrderVersion],
+        synced_at: datetime,
+        fingerprints: Optional[dict[int, str]] = None,
+    ) -> int:
+        fingerprints = fingerprints or {}
+        matched = 0
+        for number, version in versions.items():
+            document = self.documents.get(number)
+            if document is None or WorkOrderVersion.model_validate(document) != version:
+                continue
+            document["isSynced"] = True
+            document["syncedAt"] = synced_at
+            document["syncedFingerprint"] = fingerprints.get(number)
+            matched += 1
+        return matched
+
+    async def find_is_synced_workorders(
+        self, is_synced: bool = True
+    ) -> list[TracOSWorkorderModel]:
+        return [
+            TracOSWorkorderModel.model_validate(document)
+            for document in self.documents.values()
+            if document["isSynced"] == is_synced
+        ]
+
+    async def get_sync_backlog(self) -> SyncBacklog:
+        updated_at = [
+            document["updatedAt"]
+            for document in self.documents.values()
+            if not document["isSynced"]
+        ]
+        return SyncBacklog(
+            count=len(updated_at), oldest_updated_at=min(updated_at, default=None)
+        )
+
+    async def iter_is_synced_workorders(
+        self, is_synced: bool = True, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExportModel]:
+        numbers = sorted(
+            number
+            for number, document in self.documents.items()
+            if document["isSynced"] == is_synced
+        )
+        for index, number in enumerate(numbers):
+            yield TracOSWorkorderExportModel.model_validate(self.documents[number])
+            if (index + 1) % batch_size == 0:
+                await asyncio.sleep(0)
+
+    async def iter_workorders_in_range(
+        self, field: str, start: Any, end: Any, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExportModel]:
+        documents = sorted(
+            (
+                document
+                for document in self.documents.values()
+                if start <= document[field] < end
+            ),
+            key=lambda document: (document[field], document["number"]),
+        )
+        for index, document in enumerate(documents):
+            yield TracOSWorkorderExportModel.model_validate(document)
+            if (index + 1) % batch_size == 0:
+                await asyncio.sleep(0)
+
+    async def watch_unsynced_workorders(
+        self,
+        resume_token: Optional[dict] = None,
+        batch_size: int = 500,
+        max_await_time_ms: int = 1000,
+    ) -> AsyncIterator[tuple[Optional[TracOSWorkorderExport], dict]]:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        position = (
+            len(self.changes) if resume_token is None else resume_token["position"]
+        )
+        while True:
+            if position < len(self.changes):
+                document = self.documents[self.changes[position]]
+                position += 1
+                if not document["isSynced"]:
+                    yield (
+                        TracOSWorkorderExportModel.model_validate(document),
+                        {"position": position},
+                    )
+                continue
+
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait(), timeout=max_await_time_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                yield None, {"position": position}
@@ -1,13 +1,72 @@
 import asyncio
 import logging
-from typing import Optional, Self
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Self
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
-from src.models.tracOS_models import TracOSWorkorderModel
-from src.repositories.workorder_repository import WorkOrderRepository
+from src.models.tracOS_models import (
+    TracOSWorkorderExport,
+    TracOSWorkorderExportModel,
+    TracOSWorkorderExportRecord,
+    TracOSWorkorderModel,
+)
+from src.repositories.workorder_repository import (
+    SCHEMA_VERSION,
+    ChangeStreamHistoryLost,
+    SyncBacklog,
+    UpsertResult,
+    UpsertStatus,
+    WorkOrderRepository,
+    WorkOrderVersion,
+    is_stale,
+    workorder_fingerprint,
+)
 
 log = logging.getLogger(__name__)
 
+DUPLICATE_KEY_ERROR = 11000
+# The resume point fell off the oplog; older servers report the fatal error.
+CHANGE_STREAM_HISTORY_LOST_ERRORS = {286, 280}
+
+# Indexes that only speed up optional queries; the pipeline works without them.
+OPTIONAL_INDEXES = {"updatedAt_number"}
+
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "schemaVersion": 1,
+    **{field: 1 for field in TracOSWorkorderExportModel.model_fields},
+}
+
+# The change `_id` is the resume token and must be kept.
+CHANGE_STREAM_PROJECTION = {
+    "$project": {
+        "_id": 1,
+        **{f"fullDocument.{field}": 1 for field in EXPORT_PROJECTION if field != "_id"},
+    }
+}
+
+
+def _has_equivalent_index(existing: dict, index: IndexModel) -> bool:
+    """Whether an index with the same keys and options exists, whatever its name.
+
+    Indexes are matched by key pattern rather than by name, as creating an
+    equivalent index under another name fails.
+    """
+
+    document = index.document
+    keys = list(document["key"].items())
+    for info in existing.values():
+        if (
+            list(info["key"]) == keys
+            and info.get("unique", False) == document.get("unique", False)
+            and info.get("partialFilterExpression")
+            == document.get("partialFilterExpression")
+        ):
+            return True
+    return False
+
 
 class MongoWorkOrderRepository(WorkOrderRepository):
     def __init__(
@@ -15,9 +74,14 @@ class MongoWorkOrderRepository(WorkOrderRepository):
         collection_name: str,
         database_url: str = "mongodb://localhost:27017",
         database_name: str = "tractian",
+        client: Optional[AsyncIOMotorClient] = None,
+        trusted_reads: bool = False,
     ):
-        self.client = AsyncIOMotorClient(database_url)
+        # A shared client can be passed in so repositories reuse one pool.
+        self.client = client or AsyncIOMotorClient(database_url)
         self.collection = self.client[database_name][collection_name]
+        # Skip validation of documents written with the current schema.
+        self.trusted_reads = trusted_reads
 
     async def connect_with_retries(
         self, max_retries: int = 5, delay: int = 2
@@ -42,14 +106,101 @@ class MongoWorkOrderRepository(WorkOrderRepository):
                         "Could not connect to MongoDB after multiple attempts."
                     ) from e
 
+    async def ensure_indexes(self, include_updated_at: bool = False) -> list[str]:
+        """Create the indexes used by the pipeline queries if they are missing.
+
+        Returns the names of the indexes created by this call, so running it
+        against an already provisioned collection returns an empty list.
+        Upserts rely on the unique `number` index to detect unchanged and
+        stale records, so failing to create it raises; the optional
+        `updatedAt_number` index is only logged.
+        """
+
+        indexes = [
+            IndexModel([("number", ASCENDING)], name="number_unique", unique=True),
+            IndexModel(
+                [("isSynced", ASCENDING), ("number", ASCENDING)],
+                name="unsynced_number",
+                partialFilterExpression={"isSynced": False},
+            ),
+        ]
+        if include_updated_at:
+            # Also serves the (updatedAt, number) sort of backfill ranges.
+            indexes.append(
+                IndexModel(
+                    [("updatedAt", ASCENDING), ("number", ASCENDING)],
+                    name="updatedAt_number",
+                )
+            )
+
+        existing = await self.collection.index_information()
+
+        created = []
+        for index in indexes:
+            name = index.document["name"]
+            if name in existing or _has_equivalent_index(existing, index):
+                continue
+            try:
+                await self.collection.create_indexes([index])
+                created.append(name)
+                log.info(f"Created index {name} on {self.collection.name}.")
+            except Exception as e:
+                if name in OPTIONAL_INDEXES:
+                    log.error(f"Failed to create index {name}: {e}")
+                    continue
+                raise RuntimeError(
+                    f"Could not create required index {name} on "
+                    f"{self.collection.name}, check it for duplicate workorder "
+                    f"numbers: {e}"
+                ) from e
+        return created
+
     async def find_by_field(
         self, field: str, value: str
     ) -> Optional[TracOSWorkorderModel]:
-        document = await self.collection.find_one({field: value})
+        document = await self.collection.find_one({field: value}, {"_id": 0})
         return TracOSWorkorderModel.model_validate(document) if document else None
 
+    async def find_many_by_field(
+        self, field: str, values: list[Any]
+    ) -> dict[Any, WorkOrderVersion]:
+        """Fetch the versions of several workorders with a single `$in` query."""
+
+        if not values:
+            return {}
+
+        cursor = self.collection.find(
+            {field: {"$in": list(values)}},
+            {"_id": 0, field: 1, "updatedAt": 1, "fingerprint": 1},
+            batch_size=len(values),
+        )
+        return {
+            document[field]: WorkOrderVersion.model_validate(document)
+            async for document in cursor
+        }
+
+    def _to_document(self, entity: TracOSWorkorderModel) -> dict:
+        return {
+            **entity.model_dump(),
+            "fingerprint": workorder_fingerprint(entity),
+            "schemaVersion": SCHEMA_VERSION,
+        }
+
+    def _to_export(self, document: dict) -> TracOSWorkorderExport:
+        """Build an export record, validating unless the document is trusted.
+
+        Documents from legacy or unknown schema versions are always validated.
+        """
+
+        if self.trusted_reads and document.get("schemaVersion") == SCHEMA_VERSION:
+            try:
+                return TracOSWorkorderExportRecord(document)
+            except KeyError:
+                pass
+        return TracOSWorkorderExportModel.model_validate(document)
+
     async def insert(self, entity: TracOSWorkorderModel) -> TracOSWorkorderModel:
-        data = entity.model_dump()
+        data = self._to_document(entity)
 
         await self.collection.insert_one(data)
         return entity
@@ -57,15 +208,308 @@ class MongoWorkOrderRepository(WorkOrderRepository):
     async def update(
         self, number: int, entity: TracOSWorkorderModel
     ) -> Optional[TracOSWorkorderModel]:
-        data = entity.model_dump()
-        result = await self.collection.update_one({"number": number}, {"$set": data})
+        data = self._to_document(entity)
+        result = await self.collection.update_one(
+            {"number": number, "fingerprint": {"$ne": data["fingerprint"]}},
+            {"$set": data},
+        )
         return entity if result.modified_count > 0 else None
 
+    def _upsert_filter(self, data: dict, key: str) -> dict:
+        # Only matches a stored workorder that differs and is not newer.
+        return {
+            key: data[key],
+            "fingerprint": {"$ne": data["fingerprint"]},
+            "updatedAt": {"$lte": data["updatedAt"]},
+        }
+
+    async def _unapplied_statuses(
+        self, entities: list[TracOSWorkorderModel], key: str, retry: bool = True
+    ) -> list[UpsertStatus]:
+        """Report why the upsert of workorders hit the unique index on `key`.
+
+        Usually the stored workorder is unchanged or newer. When another
+        writer inserted the same new workorder concurrently, the stored one
+        may differ and be older instead; that write is retried once as a
+        plain conditional update rather than being reported as skipped.
+        """
+
+        cursor = self.collection.find(
+            {key: {"$in": [getattr(entity, key) for entity in entities]}},
+            {"_id": 0, key: 1, "updatedAt": 1, "fingerprint": 1},
+        )
+        stored = {document[key]: document async for document in cursor}
+
+        statuses = []
+        for entity in entities:
+            document = stored.get(getattr(entity, key), {})
+            if is_stale(document.get("updatedAt"), entity.updatedAt):
+                statuses.append(UpsertStatus.STALE)
+            elif document.get("fingerprint") == workorder_fingerprint(entity):
+                statuses.append(UpsertStatus.SKIPPED)
+            elif retry:
+                statuses.append(await self._retry_update(entity, key))
+            else:
+                statuses.append(UpsertStatus.SKIPPED)
+        return statuses
+
+    async def _retry_update(
+        self, entity: TracOSWorkorderModel, key: str
+    ) -> UpsertStatus:
+        data = self._to_document(entity)
+        result = await self.collection.update_one(
+            self._upsert_filter(data, key), {"$set": data}
+        )
+        if result.matched_count:
+            return UpsertStatus.UPDATED
+
+        # Yet another writer got there first; report what it left behind.
+        [status] = await self._unapplied_statuses([entity], key, retry=False)
+        return status
+
+    async def upsert(
+        self, entity: TracOSWorkorderModel, key: str = "number"
+    ) -> UpsertResult:
+        """Upsert a workorder in one conditional write.
+
+        A stored workorder that is unchanged or newer does not match the
+        filter, so the upsert tries to insert and hits the unique index on
+        `key`; only then is the stored version read to report why.
+        """
+
+        data = self._to_document(entity)
+        try:
+            result = await self.collection.update_one(
+                self._upsert_filter(data, key), {"$set": data}, upsert=True
+            )
+        except DuplicateKeyError:
+            [status] = await self._unapplied_statuses([entity], key)
+            return UpsertResult(key=data[key], status=status)
+
+        status = (
+            UpsertStatus.INSERTED
+            if result.upserted_id is not None
+            else UpsertStatus.UPDATED
+        )
+        return UpsertResult(key=data[key], status=status)
+
+    async def bulk_upsert(
+        self,
+        entities: list[TracOSWorkorderModel],
+        key: str = "number",
+        batch_size: int = 1000,
+    ) -> list[UpsertResult]:
+        """Upsert entities in unordered bulk writes, one per batch of records."""
+
+        results = []
+        for start in range(0, len(entities), batch_size):
+            batch = entities[start : start + batch_size]
+            results.extend(await self._bulk_upsert_batch(batch, key))
+        return results
+
+    async def _bulk_upsert_batch(
+        self, batch: list[TracOSWorkorderModel], key: str
+    ) -> list[UpsertResult]:
+        # An unchanged or stale record does not match the upsert filter, so
+        # the upsert tries to insert it and hits the unique index on `key`.
+        # That duplicate key error is how a skipped no-op write is reported.
+        operations = []
+        for entity in batch:
+            data = self._to_document(entity)
+            operations.append(
+                UpdateOne(self._upsert_filter(data, key), {"$set": data}, upsert=True)
+            )
+
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            upserted = set(result.upserted_ids)
+            errors = {}
+            unchanged = set()
+        except BulkWriteError as e:
+            # Unordered writes keep going past failures, so the error details
+            # tell us exactly which records were applied and which were not.
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+            errors = {
+                error["index"]: error.get("errmsg", "Unknown write error")
+                for error in e.details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY_ERROR
+            }
+            unchanged = {
+                error["index"]
+                for error in e.details.get("writeErrors", [])
+                if error.get("code") == DUPLICATE_KEY_ERROR
+            }
+
+        unapplied = {}
+        if unchanged:
+            indexes = sorted(unchanged)
+            statuses = await self._unapplied_statuses(
+                [batch[index] for index in indexes], key
+            )
+            unapplied = dict(zip(indexes, statuses))
+
+        results = []
+        for index, entity in enumerate(batch):
+            if index in errors:
+                status = UpsertStatus.FAILED
+            elif index in unapplied:
+                status = unapplied[index]
+            elif index in upserted:
+                status = UpsertStatus.INSERTED
+            else:
+                status = UpsertStatus.UPDATED
+            results.append(
+                UpsertResult(
+                    key=getattr(entity, key), status=status, error=errors.get(index)
+                )
+            )
+        return results
+
+    async def mark_synced(
+        self,
+        versions: dict[int, WorkOrderVersion],
+        synced_at: datetime,
+        fingerprints: Optional[dict[int, str]] = None,
+    ) -> int:
+        """Flag workorders as synced in one round trip, returning how many matched.
+
+        Each update only matches the version that was exported, so a newer
+        one written meanwhile stays unsynced.
+        """
+
+        if not versions:
+            return 0
+
+        fingerprints = fingerprints or {}
+        result = await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "number": number,
+                        "updatedAt": version.updatedAt,
+                        "fingerprint": version.fingerprint,
+                    },
+                    {
+                        "$set": {
+                            "isSynced": True,
+                            "syncedAt": synced_at,
+                            "syncedFingerprint": fingerprints.get(number),
+                        }
+                    },
+                )
+                for number, version in versions.items()
+            ],
+            ordered=False,
+        )
+        return result.matched_count
+
     async def find_is_synced_workorders(
         self, is_synced: bool = True
     ) -> list[TracOSWorkorderModel]:
-        cursor = self.collection.find({"isSynced": is_synced})
+        cursor = self.collection.find({"isSynced": is_synced}, {"_id": 0})
         workorders = []
         async for document in cursor:
             workorders.append(TracOSWorkorderModel.model_validate(document))
         return workorders
+
+    async def get_sync_backlog(self) -> SyncBacklog:
+        """Count unsynced workorders in one aggregation over the partial index."""
+
+        cursor = self.collection.aggregate(
+            [
+                {"$match": {"isSynced": False}},
+                {
+                    "$group": {
+                        "_id": None,
+                        "count": {"$sum": 1},
+                        "oldest_updated_at": {"$min": "$updatedAt"},
+                    }
+                },
+            ]
+        )
+        async for document in cursor:
+            return SyncBacklog.model_validate(document)
+        return SyncBacklog()
+
+    async def iter_is_synced_workorders(
+        self, is_synced: bool = True, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        """Stream workorders by sync status, fetching `batch_size` per round trip.
+
+        With trusted reads, current-schema documents are yielded as
+        `TracOSWorkorderExportRecord` instead of validated models.
+        """
+
+        # `number` is unique, so this sort is served by an index and the
+        # first batch returns without sorting the whole backlog.
+        cursor = self.collection.find(
+            {"isSynced": is_synced},
+            EXPORT_PROJECTION,
+            sort=[("number", 1)],
+            batch_size=batch_size,
+        )
+        async for document in cursor:
+            yield self._to_export(document)
+
+    async def iter_workorders_in_range(
+        self, field: str, start: Any, end: Any, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        """Stream a range of workorders, fetching `batch_size` per round trip.
+
+        Ranges of `number` use the unique index; ranges of `updatedAt` need
+        the optional `(updatedAt, number)` index (`MONGO_INDEX_UPDATED_AT`)
+        to stream without a blocking sort.
+        """
+
+        sort = [("number", 1)] if field == "number" else [(field, 1), ("number", 1)]
+        cursor = self.collection.find(
+            {field: {"$gte": start, "$lt": end}},
+            EXPORT_PROJECTION,
+            sort=sort,
+            batch_size=batch_size,
+            allow_disk_use=True,
+        )
+        async for document in cursor:
+            yield self._to_export(document)
+
+    async def watch_unsynced_workorders(
+        self,
+        resume_token: Optional[dict] = None,
+        batch_size: int = 500,
+        max_await_time_ms: int = 1000,
+    ) -> AsyncIterator[tuple[Optional[TracOSWorkorderExport], dict]]:
+        """Follow the collection's change stream, which needs a replica set.
+
+        The current document is looked up for every update, so changes that
+        were already synced by the time they are read are filtered out.
+        Raises `ChangeStreamHistoryLost` when the stream cannot resume from
+        `resume_token`.
+        """
+
+        pipeline = [
+            {
+                "$match": {
+                    "operationType": {"$in": ["insert", "update", "replace"]},
+                    "fullDocument.isSynced": False,
+                }
+            },
+            CHANGE_STREAM_PROJECTION,
+        ]
+        try:
+            async with self.collection.watch(
+                pipeline,
+                full_document="updateLookup",
+                resume_after=resume_token,
+                batch_size=batch_size,
+                max_await_time_ms=max_await_time_ms,
+            ) as stream:
+                while stream.alive:
+                    change = await stream.try_next()
+                    workorder = (
+                        self._to_export(change["fullDocument"]) if change else None
+                    )
+                    yield workorder, stream.resume_token
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAM_HISTORY_LOST_ERRORS:
+                raise ChangeStreamHistoryLost(str(e)) from e
+            raise
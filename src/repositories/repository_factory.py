@@ -1,22 +1,125 @@
+from .cache.cached_workorder_repository import CachedWorkOrderRepository, LRUCache
 from .mongo.mongo_workorder_repository import MongoWorkOrderRepository
+from .workorder_repository import WorkOrderRepository
+import asyncio
 import logging
+from typing import Optional
+from decouple import AutoConfig, Csv
+from motor.motor_asyncio import AsyncIOMotorClient
 
 log = logging.getLogger(__name__)
+config = AutoConfig(search_path=".")
 
 
 class RepositoryFactory:
-    """Factory class to create and return repository instances."""
+    """Factory class to create and return repository instances.
+
+    The factory owns a single MongoDB client for the whole process, so every
+    repository it hands out shares the same connection pool. The client is
+    created on first use or by `startup`, and closed by `shutdown`.
+
+    With `MONGO_CACHE_SIZE` set, repositories also share one read-through
+    cache of workorder lookups.
+    """
+
+    _client: Optional[AsyncIOMotorClient] = None
+    _cache: Optional[LRUCache] = None
+    _lock: Optional[asyncio.Lock] = None
 
     @staticmethod
-    async def get_workorder_repository() -> MongoWorkOrderRepository:
-        """Creates and returns a connected MongoWorkOrderRepository instance."""
-        try:
-            repository = MongoWorkOrderRepository(
-                collection_name="workorders",
-                database_url="mongodb://localhost:27017",
-                database_name="tractian",
+    def _client_options() -> dict:
+        """Build the MongoDB client pool options from the environment."""
+
+        options = {
+            "maxPoolSize": config("MONGO_MAX_POOL_SIZE", default=100, cast=int),
+            "minPoolSize": config("MONGO_MIN_POOL_SIZE", default=0, cast=int),
+            "connectTimeoutMS": config(
+                "MONGO_CONNECT_TIMEOUT_MS", default=20000, cast=int
+            ),
+            "serverSelectionTimeoutMS": config(
+                "MONGO_SERVER_SELECTION_TIMEOUT_MS", default=30000, cast=int
+            ),
+        }
+
+        socket_timeout_ms = config("MONGO_SOCKET_TIMEOUT_MS", default=0, cast=int)
+        if socket_timeout_ms:
+            options["socketTimeoutMS"] = socket_timeout_ms
+
+        compressors = config("MONGO_COMPRESSORS", default="", cast=Csv())
+        if compressors:
+            options["compressors"] = compressors
+
+        return options
+
+    @staticmethod
+    def _build_workorder_repository(
+        client: AsyncIOMotorClient,
+    ) -> MongoWorkOrderRepository:
+        return MongoWorkOrderRepository(
+            collection_name=config("MONGO_COLLECTION", default="workorders"),
+            database_name=config("MONGO_DATABASE", default="tractian"),
+            client=client,
+            trusted_reads=config("MONGO_TRUSTED_READS", default=False, cast=bool),
+        )
+
+    @classmethod
+    async def startup(cls) -> AsyncIOMotorClient:
+        """Create and connect the shared client, provisioning indexes once."""
+
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+
+        async with cls._lock:
+            if cls._client is not None:
+                return cls._client
+
+            client = AsyncIOMotorClient(
+                config("MONGO_URI", default="mongodb://localhost:27017"),
+                **cls._client_options(),
             )
-            await repository.connect_with_retries()
+            try:
+                repository = cls._build_workorder_repository(client)
+                await repository.connect_with_retries()
+                await repository.ensure_indexes(
+                    include_updated_at=config(
+                        "MONGO_INDEX_UPDATED_AT", default=False, cast=bool
+                    )
+                )
+            except Exception:
+                client.close()
+                raise
+
+            cache_size = config("MONGO_CACHE_SIZE", default=0, cast=int)
+            if cache_size > 0:
+                cls._cache = LRUCache(
+                    max_size=cache_size,
+                    ttl=config("MONGO_CACHE_TTL_SECONDS", default=30, cast=float),
+                )
+
+            cls._client = client
+            return client
+
+    @classmethod
+    async def shutdown(cls):
+        """Close the shared client, if one was started."""
+
+        if cls._cache is not None:
+            log.info(f"Workorder cache statistics: {cls._cache.stats.model_dump()}")
+        if cls._client is not None:
+            cls._client.close()
+            log.info("Closed MongoDB connection pool.")
+        cls._client = None
+        cls._cache = None
+        cls._lock = None
+
+    @classmethod
+    async def get_workorder_repository(cls) -> WorkOrderRepository:
+        """Returns a MongoWorkOrderRepository bound to the shared client."""
+        try:
+            client = await cls.startup()
+            repository = cls._build_workorder_repository(client)
+            if cls._cache is not None:
+                return CachedWorkOrderRepository(repository, cls._cache)
             return repository
         except Exception as e:
             log.error(f"Failed to create MongoWorkOrderRepository: {e}")
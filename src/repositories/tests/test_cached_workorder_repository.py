@@ -0,0 +1,170 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from src.models.tracOS_models import TracOSWorkorderModel, TracOSWorkOrderStatusEnum
+from src.repositories.cache.cached_workorder_repository import (
+    CachedWorkOrderRepository,
+    LRUCache,
+)
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+from src.repositories.repository_factory import RepositoryFactory
+from src.repositories.workorder_repository import (
+    UpsertStatus,
+    WorkOrderVersion,
+    workorder_fingerprint,
+)
+from src.service.workorder_service import WorkOrderService
+
+
+def build_workorder(number: int, title: str = "Workorder") -> TracOSWorkorderModel:
+    return TracOSWorkorderModel(
+        number=number,
+        status=TracOSWorkOrderStatusEnum.PENDING,
+        title=title,
+        description="Description",
+        createdAt=datetime(2025, 12, 14, 10, 0, 0),
+        updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def build_repository(max_size: int = 10, ttl: float = 30, clock=None):
+    backend = MemoryWorkOrderRepository()
+    backend.find_by_field = AsyncMock(wraps=backend.find_by_field)
+    backend.find_many_by_field = AsyncMock(wraps=backend.find_many_by_field)
+    cache = LRUCache(max_size=max_size, ttl=ttl, clock=clock or FakeClock())
+    return CachedWorkOrderRepository(backend, cache), backend
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_cached_until_they_expire():
+    clock = FakeClock()
+    repository, backend = build_repository(ttl=30, clock=clock)
+    await repository.insert(build_workorder(1))
+
+    assert (await repository.find_by_field("number", 1)).number == 1
+    assert (await repository.find_by_field("number", 1)).number == 1
+    assert await repository.find_by_field("number", 2) is None
+    assert await repository.find_by_field("number", 2) is None
+    assert backend.find_by_field.await_count == 2
+
+    clock.now = 31
+    await repository.find_by_field("number", 1)
+    assert backend.find_by_field.await_count == 3
+
+    stats = repository.cache.stats
+    assert (stats.hits, stats.misses, stats.expirations) == (2, 3, 1)
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_cached_lookups():
+    repository, backend = build_repository()
+
+    assert await repository.find_by_field("number", 1) is None
+    await repository.insert(build_workorder(1))
+    cached = await repository.find_by_field("number", 1)
+    assert cached is not None
+
+    # Returned models are copies, so callers cannot change the cache.
+    cached.title = "Changed locally"
+    assert (await repository.find_by_field("number", 1)).title == "Workorder"
+
+    await repository.bulk_upsert([build_workorder(1, "Updated")])
+    assert (await repository.find_by_field("number", 1)).title == "Updated"
+
+    updated = build_workorder(1, "Updated")
+    await repository.mark_synced(
+        {
+            1: WorkOrderVersion(
+                updatedAt=updated.updatedAt, fingerprint=workorder_fingerprint(updated)
+            )
+        },
+        synced_at=datetime.now(),
+    )
+    assert (await repository.find_by_field("number", 1)).isSynced is True
+    assert backend.find_by_field.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_prefetched_versions_are_cached_for_reingestion():
+    repository, backend = build_repository()
+    workorders = [build_workorder(1), build_workorder(2)]
+
+    for _ in range(3):
+        results = await WorkOrderService.bulk_upsert_workorders(
+            repository, workorders, field="number", prefetch=True
+        )
+
+    assert [result.status for result in results] == [UpsertStatus.SKIPPED] * 2
+    # The first run caches the misses, the second the inserted versions.
+    assert backend.find_many_by_field.await_count == 2
+    assert backend.find_many_by_field.await_args.args == ("number", [1, 2])
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_cached_versions():
+    repository, backend = build_repository()
+    await repository.insert(build_workorder(1))
+
+    versions = await repository.find_many_by_field("number", [1, 2])
+    assert set(versions) == {1}
+    await repository.mark_synced(versions, synced_at=datetime.now())
+    await repository.find_many_by_field("number", [1, 2])
+    assert backend.find_many_by_field.await_count == 1
+
+    await repository.insert(build_workorder(2))
+    assert set(await repository.find_many_by_field("number", [1, 2])) == {1, 2}
+    assert backend.find_many_by_field.await_args.args == ("number", [2])
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted():
+    repository, backend = build_repository(max_size=2)
+
+    for number in (1, 2, 1, 3):
+        await repository.find_by_field("number", number)
+    await repository.find_by_field("number", 2)
+
+    assert len(repository.cache) == 2
+    assert repository.cache.stats.evictions == 2
+    assert backend.find_by_field.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_read_racing_a_write_is_not_cached():
+    repository, backend = build_repository()
+
+    async def find_during_write(field, value):
+        await repository.insert(build_workorder(value))
+        return None
+
+    backend.find_by_field.side_effect = find_during_write
+    assert await repository.find_by_field("number", 1) is None
+    assert len(repository.cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_factory_wraps_repositories_in_shared_cache(
+    monkeypatch, workorder_repository
+):
+    await RepositoryFactory.shutdown()
+    monkeypatch.setenv("MONGO_CACHE_SIZE", "100")
+    try:
+        repository = await RepositoryFactory.get_workorder_repository()
+        other_repository = await RepositoryFactory.get_workorder_repository()
+
+        assert isinstance(repository, CachedWorkOrderRepository)
+        assert repository.cache is other_repository.cache
+        assert repository.client is other_repository.client
+    finally:
+        await RepositoryFactory.shutdown()
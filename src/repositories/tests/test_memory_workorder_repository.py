@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from src.models.tracOS_models import TracOSWorkorderModel, TracOSWorkOrderStatusEnum
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+from src.repositories.workorder_repository import UpsertStatus, WorkOrderVersion
+
+
+def build_workorder(number: int, title: str = "Workorder") -> TracOSWorkorderModel:
+    return TracOSWorkorderModel(
+        number=number,
+        status=TracOSWorkOrderStatusEnum.PENDING,
+        title=title,
+        description="Description",
+        createdAt=datetime(2025, 12, 14, 10, 0, 0),
+        updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_matches_fingerprint_semantics():
+    repository = MemoryWorkOrderRepository()
+    await repository.insert(build_workorder(1))
+    await repository.insert(build_workorder(2))
+
+    results = await repository.bulk_upsert(
+        [build_workorder(1), build_workorder(2, "Updated"), build_workorder(3)],
+        batch_size=2,
+    )
+
+    assert [result.status for result in results] == [
+        UpsertStatus.SKIPPED,
+        UpsertStatus.UPDATED,
+        UpsertStatus.INSERTED,
+    ]
+    assert (await repository.find_by_field("number", 2)).title == "Updated"
+
+
+@pytest.mark.asyncio
+async def test_mark_synced_and_stream_unsynced():
+    repository = MemoryWorkOrderRepository()
+    await repository.bulk_upsert([build_workorder(number) for number in (3, 1, 2)])
+
+    versions = await repository.find_many_by_field("number", [2])
+    versions[4] = WorkOrderVersion(updatedAt=datetime.now())
+    assert await repository.mark_synced(versions, synced_at=datetime.now()) == 1
+
+    unsynced = [
+        workorder.number
+        async for workorder in repository.iter_is_synced_workorders(is_synced=False)
+    ]
+    assert unsynced == [1, 3]
+
+    synced = await repository.find_is_synced_workorders(is_synced=True)
+    assert [workorder.number for workorder in synced] == [2]
+
+
+@pytest.mark.asyncio
+async def test_upsert_skips_stale_workorders():
+    repository = MemoryWorkOrderRepository()
+    await repository.upsert(build_workorder(1))
+
+    older = build_workorder(1, "Older")
+    # Timezone-aware timestamps are compared in UTC.
+    older.updatedAt = datetime(
+        2025, 12, 14, 13, 0, 0, tzinfo=timezone(timedelta(hours=2))
+    )
+    assert (await repository.upsert(older)).status == UpsertStatus.STALE
+
+    newer = build_workorder(1, "Newer")
+    newer.updatedAt = datetime(2025, 12, 14, 12, 0, 1)
+    assert (await repository.upsert(newer)).status == UpsertStatus.UPDATED
+    assert (await repository.find_by_field("number", 1)).title == "Newer"
@@ -0,0 +1,417 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from src.models.tracOS_models import (
+    TracOSWorkorderExportModel,
+    TracOSWorkorderExportRecord,
+    TracOSWorkorderModel,
+    TracOSWorkOrderStatusEnum,
+)
+from src.repositories.mongo.mongo_workorder_repository import (
+    MongoWorkOrderRepository,
+)
+from src.repositories.workorder_repository import (
+    ChangeStreamHistoryLost,
+    UpsertStatus,
+    workorder_fingerprint,
+)
+
+
+def build_workorder(number: int, title: str = "Workorder") -> TracOSWorkorderModel:
+    return TracOSWorkorderModel(
+        number=number,
+        status=TracOSWorkOrderStatusEnum.PENDING,
+        title=title,
+        description="Description",
+        createdAt=datetime(2025, 12, 14, 10, 0, 0),
+        updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_inserts_and_updates(workorder_repository):
+    await workorder_repository.insert(build_workorder(1))
+
+    results = await workorder_repository.bulk_upsert(
+        [build_workorder(1, "Updated"), build_workorder(2), build_workorder(3)],
+        key="number",
+        batch_size=2,
+    )
+
+    assert [result.key for result in results] == [1, 2, 3]
+    assert [result.status for result in results] == [
+        UpsertStatus.UPDATED,
+        UpsertStatus.INSERTED,
+        UpsertStatus.INSERTED,
+    ]
+
+    updated_workorder = await workorder_repository.find_by_field("number", 1)
+    assert updated_workorder.title == "Updated"
+    assert await workorder_repository.find_by_field("number", 3) is not None
+
+
+@pytest.mark.asyncio
+async def test_upsert_applies_only_newer_workorders(workorder_repository):
+    workorder = build_workorder(1)
+    assert (await workorder_repository.upsert(workorder)).status == (
+        UpsertStatus.INSERTED
+    )
+    assert (await workorder_repository.upsert(workorder)).status == (
+        UpsertStatus.SKIPPED
+    )
+
+    older = build_workorder(1, "Older")
+    older.updatedAt -= timedelta(hours=1)
+    assert (await workorder_repository.upsert(older)).status == UpsertStatus.STALE
+
+    newer = build_workorder(1, "Newer")
+    newer.updatedAt += timedelta(hours=1)
+    assert (await workorder_repository.upsert(newer)).status == UpsertStatus.UPDATED
+
+    stored = await workorder_repository.find_by_field("number", 1)
+    assert stored.title == "Newer"
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_reports_stale_records(workorder_repository):
+    await workorder_repository.insert(build_workorder(1))
+    await workorder_repository.insert(build_workorder(2))
+
+    older = build_workorder(1, "Older")
+    older.updatedAt -= timedelta(minutes=1)
+    results = await workorder_repository.bulk_upsert([older, build_workorder(2)])
+
+    assert [result.status for result in results] == [
+        UpsertStatus.STALE,
+        UpsertStatus.SKIPPED,
+    ]
+    assert (await workorder_repository.find_by_field("number", 1)).title == (
+        "Workorder"
+    )
+
+
+@pytest.mark.asyncio
+async def test_find_many_by_field_returns_stored_versions(workorder_repository):
+    for number in [1, 2]:
+        await workorder_repository.insert(build_workorder(number))
+
+    versions = await workorder_repository.find_many_by_field("number", [1, 2, 3])
+
+    assert set(versions) == {1, 2}
+    assert versions[1].updatedAt == datetime(2025, 12, 14, 12, 0, 0)
+    assert versions[1].fingerprint == workorder_fingerprint(build_workorder(1))
+    assert await workorder_repository.find_many_by_field("number", []) == {}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_reports_failed_records():
+    repository = MongoWorkOrderRepository(collection_name="workorders")
+    repository.collection = MagicMock()
+    repository.collection.bulk_write = AsyncMock(
+        side_effect=BulkWriteError(
+            {
+                "writeErrors": [{"index": 1, "errmsg": "duplicate key error"}],
+                "upserted": [{"index": 0, "_id": "abc"}],
+            }
+        )
+    )
+
+    results = await repository.bulk_upsert(
+        [build_workorder(1), build_workorder(2), build_workorder(3)]
+    )
+
+    assert [result.status for result in results] == [
+        UpsertStatus.INSERTED,
+        UpsertStatus.FAILED,
+        UpsertStatus.UPDATED,
+    ]
+    assert results[1].error == "duplicate key error"
+    assert repository.collection.bulk_write.await_args.kwargs["ordered"] is False
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_retries_records_that_lost_an_insert_race(
+    workorder_repository,
+):
+    bulk_write = workorder_repository.collection.bulk_write
+
+    async def lose_insert_race(operations, ordered):
+        # Another writer inserts an older version between our filter
+        # missing and our insert, so the upsert collides on the index.
+        await workorder_repository.insert(build_workorder(1, title="Other writer"))
+        raise BulkWriteError(
+            {
+                "writeErrors": [
+                    {"index": 0, "code": 11000, "errmsg": "duplicate key error"}
+                ],
+                "upserted": [],
+            }
+        )
+
+    workorder_repository.collection.bulk_write = lose_insert_race
+    newer = build_workorder(1, title="Ours")
+    newer.updatedAt += timedelta(hours=1)
+    try:
+        [result] = await workorder_repository.bulk_upsert([newer])
+    finally:
+        workorder_repository.collection.bulk_write = bulk_write
+
+    assert result.status == UpsertStatus.UPDATED
+    assert (await workorder_repository.find_by_field("number", 1)).title == "Ours"
+
+
+@pytest.mark.asyncio
+async def test_iter_is_synced_workorders_streams_projected_models(
+    workorder_repository,
+):
+    for number in [3, 1, 2]:
+        await workorder_repository.insert(build_workorder(number))
+
+    synced_workorder = build_workorder(4)
+    synced_workorder.isSynced = True
+    await workorder_repository.insert(synced_workorder)
+
+    workorders = [
+        workorder
+        async for workorder in workorder_repository.iter_is_synced_workorders(
+            is_synced=False, batch_size=2
+        )
+    ]
+
+    assert [workorder.number for workorder in workorders] == [1, 2, 3]
+    for workorder in workorders:
+        assert isinstance(workorder, TracOSWorkorderExportModel)
+        assert workorder.title == "Workorder"
+        assert "description" not in workorder.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_iter_workorders_in_range_includes_synced_workorders(
+    workorder_repository,
+):
+    for number in [5, 1, 3, 2, 4]:
+        workorder = build_workorder(number)
+        workorder.isSynced = number % 2 == 0
+        await workorder_repository.insert(workorder)
+
+    workorders = [
+        workorder
+        async for workorder in workorder_repository.iter_workorders_in_range(
+            "number", 2, 5, batch_size=2
+        )
+    ]
+
+    assert [workorder.number for workorder in workorders] == [2, 3, 4]
+    for workorder in workorders:
+        assert isinstance(workorder, TracOSWorkorderExportModel)
+
+
+@pytest.mark.asyncio
+async def test_trusted_reads_validate_only_legacy_documents(workorder_repository):
+    workorder_repository.trusted_reads = True
+    await workorder_repository.insert(build_workorder(1))
+    legacy_document = build_workorder(2).model_dump()
+    await workorder_repository.collection.insert_one(legacy_document)
+
+    workorders = [
+        workorder
+        async for workorder in workorder_repository.iter_is_synced_workorders(
+            is_synced=False
+        )
+    ]
+
+    assert isinstance(workorders[0], TracOSWorkorderExportRecord)
+    assert workorders[0].status is TracOSWorkOrderStatusEnum.PENDING
+    assert workorders[0].createdAt == datetime(2025, 12, 14, 10, 0, 0)
+    assert workorders[0].fingerprint == workorder_fingerprint(build_workorder(1))
+    assert isinstance(workorders[1], TracOSWorkorderExportModel)
+    assert workorders[1].number == 2
+
+
+@pytest.mark.asyncio
+async def test_mark_synced_updates_only_given_numbers(workorder_repository):
+    for number in [1, 2, 3]:
+        await workorder_repository.insert(build_workorder(number))
+
+    synced_at = datetime(2025, 12, 15, 8, 0, 0)
+    versions = await workorder_repository.find_many_by_field("number", [1, 3])
+    matched = await workorder_repository.mark_synced(versions, synced_at=synced_at)
+
+    assert matched == 2
+    for number, is_synced in [(1, True), (2, False), (3, True)]:
+        workorder = await workorder_repository.find_by_field("number", number)
+        assert workorder.isSynced is is_synced
+        assert workorder.syncedAt == (synced_at if is_synced else None)
+        assert workorder.description == "Description"
+
+
+@pytest.mark.asyncio
+async def test_mark_synced_leaves_versions_written_after_the_read_unsynced(
+    workorder_repository,
+):
+    for number in [1, 2, 3]:
+        await workorder_repository.insert(build_workorder(number))
+    versions = await workorder_repository.find_many_by_field("number", [1, 2, 3])
+
+    # Written between the outbound read and the mark: a newer update, and
+    # a change with the same updatedAt.
+    newer = build_workorder(2, "Newer")
+    newer.updatedAt = datetime(2025, 12, 14, 13, 0, 0)
+    same_time = build_workorder(3, "Same time")
+    await workorder_repository.bulk_upsert([newer, same_time])
+
+    matched = await workorder_repository.mark_synced(versions, synced_at=datetime.now())
+
+    assert matched == 1
+    for number, is_synced in [(1, True), (2, False), (3, False)]:
+        workorder = await workorder_repository.find_by_field("number", number)
+        assert workorder.isSynced is is_synced
+
+
+@pytest.mark.asyncio
+async def test_get_sync_backlog_counts_unsynced_workorders(workorder_repository):
+    assert (await workorder_repository.get_sync_backlog()).count == 0
+
+    for number in [1, 2, 3]:
+        workorder = build_workorder(number)
+        workorder.updatedAt = datetime(2025, 12, 14, 12, number, 0)
+        await workorder_repository.insert(workorder)
+    versions = await workorder_repository.find_many_by_field("number", [1])
+    await workorder_repository.mark_synced(versions, synced_at=datetime.now())
+
+    backlog = await workorder_repository.get_sync_backlog()
+    assert backlog.count == 2
+    assert backlog.oldest_updated_at == datetime(2025, 12, 14, 12, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_is_idempotent(workorder_repository):
+    # The factory already provisions the default indexes at connect time.
+    assert await workorder_repository.ensure_indexes() == []
+    assert await workorder_repository.ensure_indexes(include_updated_at=True) == [
+        "updatedAt_number"
+    ]
+    assert await workorder_repository.ensure_indexes(include_updated_at=True) == []
+
+    indexes = await workorder_repository.collection.index_information()
+    assert indexes["number_unique"]["unique"] is True
+    assert {"number_unique", "unsynced_number", "updatedAt_number"} <= set(indexes)
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_accepts_equivalent_indexes_under_other_names(
+    workorder_repository,
+):
+    await workorder_repository.collection.drop_index("number_unique")
+    await workorder_repository.collection.create_index(
+        [("number", ASCENDING)], name="number_1", unique=True
+    )
+
+    assert await workorder_repository.ensure_indexes() == []
+
+    indexes = await workorder_repository.collection.index_information()
+    assert "number_unique" not in indexes
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_raises_without_the_unique_number_index(
+    workorder_repository,
+):
+    await workorder_repository.collection.drop_index("number_unique")
+    for _ in range(2):
+        await workorder_repository.insert(build_workorder(1))
+
+    with pytest.raises(RuntimeError, match="number_unique"):
+        await workorder_repository.ensure_indexes()
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_skips_unchanged_records(workorder_repository):
+    await workorder_repository.bulk_upsert([build_workorder(1), build_workorder(2)])
+
+    results = await workorder_repository.bulk_upsert(
+        [build_workorder(1), build_workorder(2, "Changed")]
+    )
+
+    assert [result.status for result in results] == [
+        UpsertStatus.SKIPPED,
+        UpsertStatus.UPDATED,
+    ]
+    assert (await workorder_repository.find_by_field("number", 2)).title == "Changed"
+
+
+def test_workorder_fingerprint_ignores_sync_state():
+    workorder = build_workorder(1)
+    synced_workorder = build_workorder(1)
+    synced_workorder.isSynced = True
+    synced_workorder.syncedAt = datetime(2025, 12, 15, 8, 0, 0)
+
+    assert workorder_fingerprint(workorder) == workorder_fingerprint(synced_workorder)
+    assert workorder_fingerprint(workorder) != workorder_fingerprint(
+        build_workorder(1, "Changed")
+    )
+
+
+def test_workorder_fingerprint_normalizes_datetimes():
+    workorder = build_workorder(1)
+    aware_workorder = build_workorder(1)
+    aware_workorder.createdAt = datetime(
+        2025, 12, 14, 7, 0, 0, tzinfo=timezone(timedelta(hours=-3))
+    )
+    aware_workorder.updatedAt = datetime(2025, 12, 14, 12, 0, 0, 999, timezone.utc)
+
+    assert workorder_fingerprint(workorder) == workorder_fingerprint(aware_workorder)
+
+
+@pytest.mark.asyncio
+async def test_watch_unsynced_workorders_follows_change_stream():
+    document = {**build_workorder(1).model_dump(), "fingerprint": "abc"}
+    stream = MagicMock()
+    stream.alive = True
+    stream.resume_token = {"_data": "token"}
+    stream.try_next = AsyncMock(side_effect=[{"fullDocument": document}, None])
+    stream.__aenter__ = AsyncMock(return_value=stream)
+    stream.__aexit__ = AsyncMock(return_value=False)
+
+    repository = MongoWorkOrderRepository(collection_name="workorders")
+    repository.collection = MagicMock()
+    repository.collection.watch = MagicMock(return_value=stream)
+
+    changes = repository.watch_unsynced_workorders(resume_token={"_data": "start"})
+    workorder, resume_token = await anext(changes)
+    idle, _ = await anext(changes)
+    await changes.aclose()
+
+    assert workorder.number == 1
+    assert workorder.fingerprint == "abc"
+    assert resume_token == {"_data": "token"}
+    assert idle is None
+
+    pipeline = repository.collection.watch.call_args.args[0]
+    assert pipeline[0]["$match"]["fullDocument.isSynced"] is False
+    assert repository.collection.watch.call_args.kwargs["resume_after"] == {
+        "_data": "start"
+    }
+    assert (
+        repository.collection.watch.call_args.kwargs["full_document"] == "updateLookup"
+    )
+
+
+@pytest.mark.asyncio
+async def test_watch_unsynced_workorders_reports_lost_history():
+    stream = MagicMock()
+    stream.__aenter__ = AsyncMock(
+        side_effect=OperationFailure("resume point no longer in the oplog", code=286)
+    )
+    stream.__aexit__ = AsyncMock(return_value=False)
+
+    repository = MongoWorkOrderRepository(collection_name="workorders")
+    repository.collection = MagicMock()
+    repository.collection.watch = MagicMock(return_value=stream)
+
+    changes = repository.watch_unsynced_workorders(resume_token={"_data": "old"})
+    with pytest.raises(ChangeStreamHistoryLost):
+        await anext(changes)
@@ -1,7 +1,31 @@
 import pytest
+from src.repositories.repository_factory import RepositoryFactory
 
 
 @pytest.mark.asyncio
 async def test_get_worker_repository(workorder_repository):
     """Test if the repository factory creates a valid repository instance."""
     assert workorder_repository is not None
+
+
+@pytest.mark.asyncio
+async def test_repositories_share_one_client(workorder_repository):
+    """Test that the factory hands out repositories bound to the same pool."""
+    other_repository = await RepositoryFactory.get_workorder_repository()
+
+    assert other_repository is not workorder_repository
+    assert other_repository.client is workorder_repository.client
+
+
+def test_client_options_from_environment(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "2")
+    monkeypatch.setenv("MONGO_SOCKET_TIMEOUT_MS", "5000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd,zlib")
+
+    options = RepositoryFactory._client_options()
+
+    assert options["maxPoolSize"] == 20
+    assert options["minPoolSize"] == 2
+    assert options["socketTimeoutMS"] == 5000
+    assert options["compressors"] == ["zstd", "zlib"]
@@ -1,22 +1,163 @@
+import hashlib
+import json
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Optional, Self
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Generic, TypeVar, Optional, Self
 
-from src.models.tracOS_models import TracOSWorkorderModel
+from pydantic import BaseModel, ConfigDict
+
+from src.models.tracOS_models import (
+    TracOSWorkorderExport,
+    TracOSWorkorderModel,
+)
 
 T = TypeVar("T")  # Generic type for models
 
+# Version of the stored workorder document layout. Bump it whenever the
+# fields or their types change, so documents written by older versions go
+# through full validation again.
+SCHEMA_VERSION = 1
+
+# Content fields of a workorder; sync bookkeeping is left out on purpose so that
+# marking a record as synced does not change its fingerprint.
+FINGERPRINT_FIELDS = {
+    "number",
+    "status",
+    "title",
+    "description",
+    "createdAt",
+    "updatedAt",
+    "deleted",
+    "deletedAt",
+}
+# Fields written to the customer format; compared to tell whether a workorder
+# changed since it was last exported, whoever changed it.
+EXPORT_FINGERPRINT_FIELDS = FINGERPRINT_FIELDS - {"description"}
+
+
+def utc_naive(value: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC, as MongoDB returns them."""
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _normalize_fingerprint_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        value = utc_naive(value)
+        # MongoDB stores datetimes with millisecond precision.
+        return value.isoformat(timespec="milliseconds")
+    return value
+
+
+def _hash_payload(payload: dict[str, Any]) -> str:
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+def workorder_fingerprint(entity: TracOSWorkorderModel) -> str:
+    """Return a compact hash of the normalized workorder content."""
+
+    return _hash_payload(
+        {
+            field: _normalize_fingerprint_value(value)
+            for field, value in entity.model_dump(include=FINGERPRINT_FIELDS).items()
+        }
+    )
+
+
+def export_fingerprint(workorder: TracOSWorkorderExport) -> str:
+    """Return a compact hash of the workorder content that is exported.
+
+    Computed from the record as read at export time, so changes made by any
+    writer are detected, not only those that refreshed the stored
+    `fingerprint`.
+    """
+
+    return _hash_payload(
+        {
+            field: _normalize_fingerprint_value(getattr(workorder, field))
+            for field in EXPORT_FINGERPRINT_FIELDS
+        }
+    )
+
+
+def is_stale(stored_updated_at: Optional[datetime], updated_at: datetime) -> bool:
+    """Whether the stored workorder is newer than an incoming version of it.
+
+    Writes are only applied when the incoming `updatedAt` is not older than
+    the stored one, so an older export never overwrites a newer record.
+    """
+
+    if stored_updated_at is None:
+        return False
+    return utc_naive(stored_updated_at) > utc_naive(updated_at)
+
+
+class ChangeStreamHistoryLost(Exception):
+    """The change stream cannot resume from the given token any more."""
+
+
+class UpsertStatus(str, Enum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    SKIPPED = "skipped"
+    # The stored workorder is newer than the incoming one.
+    STALE = "stale"
+    FAILED = "failed"
+
+
+class UpsertResult(BaseModel):
+    key: Any
+    status: UpsertStatus
+    error: Optional[str] = None
+
+
+class WorkOrderVersion(BaseModel):
+    """The fields of a stored workorder that tell whether a write would change it."""
+
+    # Immutable, so one instance can be shared, e.g. by a cache.
+    model_config = ConfigDict(frozen=True)
+
+    updatedAt: Optional[datetime] = None
+    fingerprint: Optional[str] = None
+
+
+class SyncBacklog(BaseModel):
+    """Workorders waiting to be exported and the oldest of their updates."""
+
+    count: int = 0
+    oldest_updated_at: Optional[datetime] = None
+
 
 class WorkOrderRepository(ABC, Generic[T]):
     @abstractmethod
     async def connect_with_retries(self, max_retries: int = 5, delay: int = 2) -> Self:
         ...
 
+    @abstractmethod
+    async def ensure_indexes(self, include_updated_at: bool = False) -> list[str]:
+        ...
+
     @abstractmethod
     async def find_by_field(
         self, field: str, value: str
     ) -> Optional[TracOSWorkorderModel]:
         ...
 
+    @abstractmethod
+    async def find_many_by_field(
+        self, field: str, values: list[Any]
+    ) -> dict[Any, WorkOrderVersion]:
+        """Look up the stored versions of several workorders in one query.
+
+        Returns the version of each stored workorder keyed by its `field`
+        value; values without a stored workorder are left out.
+        """
+        ...
+
     @abstractmethod
     async def insert(self, entity: TracOSWorkorderModel) -> TracOSWorkorderModel:
         ...
@@ -27,8 +168,79 @@ class WorkOrderRepository(ABC, Generic[T]):
     ) -> Optional[TracOSWorkorderModel]:
         ...
 
+    @abstractmethod
+    async def upsert(
+        self, entity: TracOSWorkorderModel, key: str = "number"
+    ) -> UpsertResult:
+        """Insert or update a workorder unless the stored one is newer.
+
+        Applied atomically in a single write; reports inserted, updated,
+        skipped (unchanged) or stale.
+        """
+        ...
+
+    @abstractmethod
+    async def bulk_upsert(
+        self,
+        entities: list[TracOSWorkorderModel],
+        key: str = "number",
+        batch_size: int = 1000,
+    ) -> list[UpsertResult]:
+        ...
+
+    @abstractmethod
+    async def mark_synced(
+        self,
+        versions: dict[int, WorkOrderVersion],
+        synced_at: datetime,
+        fingerprints: Optional[dict[int, str]] = None,
+    ) -> int:
+        """Flag workorders as synced, returning how many matched.
+
+        `versions` maps each exported number to the version that was read and
+        exported. A workorder written again since then no longer matches and
+        stays unsynced, so its newer version is exported too. `fingerprints`
+        holds the `export_fingerprint` of each exported workorder, stored as
+        its `syncedFingerprint`.
+        """
+        ...
+
     @abstractmethod
     async def find_is_synced_workorders(
         self, is_synced: bool
     ) -> list[TracOSWorkorderModel]:
         ...
+
+    @abstractmethod
+    async def get_sync_backlog(self) -> SyncBacklog:
+        ...
+
+    @abstractmethod
+    def iter_is_synced_workorders(
+        self, is_synced: bool, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        ...
+
+    @abstractmethod
+    def iter_workorders_in_range(
+        self, field: str, start: Any, end: Any, batch_size: int = 500
+    ) -> AsyncIterator[TracOSWorkorderExport]:
+        """Yield every workorder with `start <= field < end`, synced or not.
+
+        Workorders come ordered by `field`, then by number.
+        """
+        ...
+
+    @abstractmethod
+    def watch_unsynced_workorders(
+        self,
+        resume_token: Optional[dict] = None,
+        batch_size: int = 500,
+        max_await_time_ms: int = 1000,
+    ) -> AsyncIterator[tuple[Optional[TracOSWorkorderExport], dict]]:
+        """Yield `(workorder, resume_token)` as unsynced workorders are written.
+
+        When no change arrives within `max_await_time_ms`, `(None, token)` is
+        yielded so callers can persist their position and check for shutdown.
+        """
+        ...
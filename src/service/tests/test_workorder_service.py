@@ -1,8 +1,17 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
 from src.service.workorder_service import WorkOrderService
 from src.models.customer_models import CustomerWorkorderModel
-from src.models.tracOS_models import TracOSWorkOrderStatusEnum, TracOSWorkorderModel
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+from src.repositories.workorder_repository import UpsertStatus
+from src.models.tracOS_models import (
+    TracOSWorkorderExportRecord,
+    TracOSWorkOrderStatusEnum,
+    TracOSWorkorderModel,
+)
 
 
 @pytest.fixture
@@ -107,3 +116,97 @@ async def test_update_workorder(workorder_repository, tracOS_workorder):
     )
     assert updated_workorder is not None
     assert updated_workorder.title == "Updated Workorder Title"
+
+
+def test_convert_customer_without_status_flag_is_pending(customer_workorder):
+    customer_workorder.isPending = False
+
+    tracos_workorder = WorkOrderService.convert_customer_to_tracos_model(
+        customer_workorder
+    )
+
+    assert tracos_workorder.status == TracOSWorkOrderStatusEnum.PENDING
+
+
+def test_convert_customer_to_tracos_models_accepts_dicts(customer_workorder):
+    raw_workorder = customer_workorder.model_dump(mode="json")
+    raw_workorder.update(orderNo=2003, isPending=False, isOnHold=True)
+
+    tracos_workorders = WorkOrderService.convert_customer_to_tracos_models(
+        iter([customer_workorder, raw_workorder])
+    )
+
+    assert [workorder.number for workorder in tracos_workorders] == [2002, 2003]
+    assert [workorder.status for workorder in tracos_workorders] == [
+        TracOSWorkOrderStatusEnum.PENDING,
+        TracOSWorkOrderStatusEnum.ON_HOLD,
+    ]
+    assert tracos_workorders[0] == WorkOrderService.convert_customer_to_tracos_model(
+        customer_workorder
+    )
+    assert tracos_workorders[1].createdAt == customer_workorder.creationDate
+
+
+def test_convert_tracos_to_customer_models_matches_validated_model(tracOS_workorder):
+    raw_workorder = tracOS_workorder.model_dump()
+    raw_workorder.update(number=2003, status="in_progress")
+
+    customer_workorders = WorkOrderService.convert_tracos_to_customer_models(
+        [tracOS_workorder, raw_workorder]
+    )
+
+    expected = CustomerWorkorderModel(
+        orderNo=2002,
+        isCanceled=False,
+        isDeleted=False,
+        isDone=True,
+        isOnHold=False,
+        isPending=False,
+        summary=tracOS_workorder.title,
+        creationDate=tracOS_workorder.createdAt,
+        lastUpdateDate=tracOS_workorder.updatedAt,
+    )
+    assert customer_workorders[0].model_dump_json() == expected.model_dump_json()
+
+    in_progress = customer_workorders[1]
+    assert in_progress.orderNo == 2003
+    assert not any((in_progress.isPending, in_progress.isDone, in_progress.isOnHold))
+    assert in_progress.isActive is True
+
+
+def test_convert_tracos_to_customer_models_accepts_export_records(tracOS_workorder):
+    record = TracOSWorkorderExportRecord(tracOS_workorder.model_dump(mode="json"))
+
+    customer_workorders = WorkOrderService.convert_tracos_to_customer_models([record])
+
+    assert customer_workorders[0].orderNo == tracOS_workorder.number
+    assert customer_workorders[0].isDone is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_workorders_prefetch_skips_no_op_writes(tracOS_workorder):
+    repository = MemoryWorkOrderRepository()
+    unchanged = tracOS_workorder.model_copy(update={"number": 1})
+    stale = tracOS_workorder.model_copy(update={"number": 2})
+    changed = tracOS_workorder.model_copy(update={"number": 3})
+    await repository.bulk_upsert([unchanged, stale, changed])
+    repository.bulk_upsert = AsyncMock(wraps=repository.bulk_upsert)
+
+    workorders = [
+        unchanged,
+        stale.model_copy(update={"updatedAt": stale.updatedAt - timedelta(days=1)}),
+        changed.model_copy(update={"title": "Changed"}),
+        tracOS_workorder.model_copy(update={"number": 4}),
+    ]
+    results = await WorkOrderService.bulk_upsert_workorders(
+        repository, workorders, field="number", prefetch=True
+    )
+
+    assert [result.status for result in results] == [
+        UpsertStatus.SKIPPED,
+        UpsertStatus.STALE,
+        UpsertStatus.UPDATED,
+        UpsertStatus.INSERTED,
+    ]
+    written = repository.bulk_upsert.await_args.args[0]
+    assert [workorder.number for workorder in written] == [3, 4]
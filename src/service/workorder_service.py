@@ -1,10 +1,76 @@
 import logging
+from typing import Any, Iterable
+from pydantic import TypeAdapter
 
 from src.models.customer_models import CustomerWorkorderModel
-from src.models.tracOS_models import TracOSWorkorderModel, TracOSWorkOrderStatusEnum
+from src.models.tracOS_models import (
+    TracOSWorkorderExport,
+    TracOSWorkorderExportModel,
+    TracOSWorkorderModel,
+    TracOSWorkOrderStatusEnum,
+)
+from src.repositories.workorder_repository import (
+    UpsertResult,
+    UpsertStatus,
+    is_stale,
+    workorder_fingerprint,
+)
 
 log = logging.getLogger(__name__)
 
+# Customer status flags in order of precedence. A workorder with none of
+# them set (e.g. in progress on the customer side) is pending in TracOS.
+CUSTOMER_STATUS_FLAGS = (
+    ("isPending", TracOSWorkOrderStatusEnum.PENDING),
+    ("isOnHold", TracOSWorkOrderStatusEnum.ON_HOLD),
+    ("isDone", TracOSWorkOrderStatusEnum.COMPLETED),
+    ("isCanceled", TracOSWorkOrderStatusEnum.CANCELLED),
+    ("isDeleted", TracOSWorkOrderStatusEnum.DELETED),
+)
+
+# Customer flags for each TracOS status, with every flag present.
+TRACOS_STATUS_FLAGS = {
+    status: {flag: flag_status == status for flag, flag_status in CUSTOMER_STATUS_FLAGS}
+    for status in TracOSWorkOrderStatusEnum
+}
+
+CUSTOMER_WORKORDER_ADAPTER = TypeAdapter(CustomerWorkorderModel)
+TRACOS_EXPORT_ADAPTER = TypeAdapter(TracOSWorkorderExportModel)
+CUSTOMER_WORKORDERS_ADAPTER = TypeAdapter(list[CustomerWorkorderModel])
+TRACOS_WORKORDERS_ADAPTER = TypeAdapter(list[TracOSWorkorderModel])
+
+
+def _tracos_fields(client_workorder: CustomerWorkorderModel) -> dict[str, Any]:
+    status = TracOSWorkOrderStatusEnum.PENDING
+    for flag, flag_status in CUSTOMER_STATUS_FLAGS:
+        if getattr(client_workorder, flag):
+            status = flag_status
+            break
+
+    return {
+        "number": client_workorder.orderNo,
+        "status": status,
+        "title": client_workorder.summary,
+        "description": client_workorder.summary,
+        "createdAt": client_workorder.creationDate,
+        "updatedAt": client_workorder.lastUpdateDate,
+        "deleted": client_workorder.isDeleted,
+        "deletedAt": client_workorder.deletedDate,
+    }
+
+
+def _customer_fields(
+    tracos_workorder: TracOSWorkorderModel | TracOSWorkorderExport,
+) -> dict[str, Any]:
+    return {
+        "orderNo": tracos_workorder.number,
+        "summary": tracos_workorder.title,
+        "creationDate": tracos_workorder.createdAt,
+        "lastUpdateDate": tracos_workorder.updatedAt,
+        "deletedDate": tracos_workorder.deletedAt,
+        **TRACOS_STATUS_FLAGS[tracos_workorder.status],
+    }
+
 
 class WorkOrderService:
     @staticmethod
@@ -13,83 +79,130 @@ class WorkOrderService:
     ) -> TracOSWorkorderModel:
         """Convert a costumer model from the client to the TracOS format."""
 
-        status_mapping = {
-            "isPending": TracOSWorkOrderStatusEnum.PENDING,
-            "isOnHold": TracOSWorkOrderStatusEnum.ON_HOLD,
-            "isDone": TracOSWorkOrderStatusEnum.COMPLETED,
-            "isCanceled": TracOSWorkOrderStatusEnum.CANCELLED,
-            "isDeleted": TracOSWorkOrderStatusEnum.DELETED,
-        }
-
-        for key, tracos_status in status_mapping.items():
-            if getattr(client_workorder, key, False):
-                status = tracos_status
-                break
-
-        return TracOSWorkorderModel(
-            number=client_workorder.orderNo,
-            status=status or TracOSWorkOrderStatusEnum.PENDING,
-            title=client_workorder.summary,
-            description=client_workorder.summary,
-            createdAt=client_workorder.creationDate,
-            updatedAt=client_workorder.lastUpdateDate,
-            deleted=client_workorder.isDeleted,
-            deletedAt=client_workorder.deletedDate,
+        return TracOSWorkorderModel.model_validate(_tracos_fields(client_workorder))
+
+    @staticmethod
+    def convert_customer_to_tracos_models(
+        client_workorders: Iterable[CustomerWorkorderModel | dict[str, Any]],
+    ) -> list[TracOSWorkorderModel]:
+        """Convert several customer workorders to the TracOS format.
+
+        Models are trusted as already validated; raw dicts are validated first.
+        The converted records are built in a single pass of the validator.
+        """
+
+        return TRACOS_WORKORDERS_ADAPTER.validate_python(
+            [
+                _tracos_fields(
+                    CUSTOMER_WORKORDER_ADAPTER.validate_python(client_workorder)
+                    if isinstance(client_workorder, dict)
+                    else client_workorder
+                )
+                for client_workorder in client_workorders
+            ]
         )
 
+    @staticmethod
+    def _log_upsert_result(result: UpsertResult):
+        if result.status == UpsertStatus.INSERTED:
+            log.info(f"Inserted workorder {result.key} into the database.")
+        elif result.status == UpsertStatus.UPDATED:
+            log.info(f"Updated workorder {result.key} in the database.")
+        elif result.status == UpsertStatus.SKIPPED:
+            log.info(f"Workorder {result.key} is unchanged, skipped write.")
+        elif result.status == UpsertStatus.STALE:
+            log.info(
+                f"Workorder {result.key} is older than the stored one, skipped write."
+            )
+        else:
+            log.error(f"Failed to upsert workorder {result.key}: {result.error}")
+
     @staticmethod
     async def upsert_workorder(
         repository, tracos_workorder: TracOSWorkorderModel, field: str
-    ):
-        """Upsert a workorder into the repository."""
+    ) -> UpsertResult:
+        """Upsert a workorder into the repository in a single conditional write.
 
-        existing_workorder = await repository.find_by_field(
-            field, getattr(tracos_workorder, field)
-        )
+        A stored workorder with a newer `updatedAt` is left untouched.
+        """
 
-        if existing_workorder:
-            await repository.update(existing_workorder.number, tracos_workorder)
-            log.info(
-                f"Updated workorder {getattr(tracos_workorder, field)} in the database."
-            )
+        result = await repository.upsert(tracos_workorder, key=field)
+        WorkOrderService._log_upsert_result(result)
+        return result
 
-        else:
-            await repository.insert(tracos_workorder)
-            log.info(
-                f"Inserted workorder {getattr(tracos_workorder, field)} into the database."
+    @staticmethod
+    async def bulk_upsert_workorders(
+        repository,
+        tracos_workorders: list[TracOSWorkorderModel],
+        field: str,
+        batch_size: int = 1000,
+        prefetch: bool = False,
+    ) -> list[UpsertResult]:
+        """Upsert several workorders into the repository using bulk writes.
+
+        With `prefetch`, the stored versions of the workorders are looked up
+        in one query first. Workorders that are unchanged or older than the
+        stored ones are reported without being sent to the bulk write.
+        """
+
+        results: list[UpsertResult | None] = [None] * len(tracos_workorders)
+        pending = list(enumerate(tracos_workorders))
+
+        if prefetch and tracos_workorders:
+            versions = await repository.find_many_by_field(
+                field, [getattr(workorder, field) for workorder in tracos_workorders]
             )
+            pending = []
+            for index, workorder in enumerate(tracos_workorders):
+                key = getattr(workorder, field)
+                version = versions.get(key)
+                if version is None:
+                    pending.append((index, workorder))
+                elif version.fingerprint == workorder_fingerprint(workorder):
+                    results[index] = UpsertResult(key=key, status=UpsertStatus.SKIPPED)
+                elif is_stale(version.updatedAt, workorder.updatedAt):
+                    results[index] = UpsertResult(key=key, status=UpsertStatus.STALE)
+                else:
+                    pending.append((index, workorder))
+
+        written = await repository.bulk_upsert(
+            [workorder for _, workorder in pending], key=field, batch_size=batch_size
+        )
+        for (index, _), result in zip(pending, written):
+            results[index] = result
+
+        for result in results:
+            WorkOrderService._log_upsert_result(result)
+
+        return results
 
     @staticmethod
     def convert_tracOS_to_customer_model(
-        tracos_workorder: TracOSWorkorderModel,
+        tracos_workorder: TracOSWorkorderModel | TracOSWorkorderExport,
     ) -> CustomerWorkorderModel:
         """Convert a TracOS workorder model to the customer format."""
 
-        status_flags = {
-            "isPending": False,
-            "isOnHold": False,
-            "isDone": False,
-            "isCanceled": False,
-            "isDeleted": False,
-        }
-
-        status_mapping = {
-            TracOSWorkOrderStatusEnum.PENDING: "isPending",
-            TracOSWorkOrderStatusEnum.ON_HOLD: "isOnHold",
-            TracOSWorkOrderStatusEnum.COMPLETED: "isDone",
-            TracOSWorkOrderStatusEnum.CANCELLED: "isCanceled",
-            TracOSWorkOrderStatusEnum.DELETED: "isDeleted",
-        }
-
-        flag_key = status_mapping.get(tracos_workorder.status)
-        if flag_key:
-            status_flags[flag_key] = True
-
-        return CustomerWorkorderModel(
-            orderNo=tracos_workorder.number,
-            summary=tracos_workorder.title,
-            creationDate=tracos_workorder.createdAt,
-            lastUpdateDate=tracos_workorder.updatedAt,
-            deletedDate=tracos_workorder.deletedAt,
-            **status_flags,
+        return CustomerWorkorderModel.model_validate(_customer_fields(tracos_workorder))
+
+    @staticmethod
+    def convert_tracos_to_customer_models(
+        tracos_workorders: Iterable[
+            TracOSWorkorderModel | TracOSWorkorderExport | dict[str, Any]
+        ],
+    ) -> list[CustomerWorkorderModel]:
+        """Convert several TracOS workorders to the customer format.
+
+        Models are trusted as already validated; raw dicts are validated first.
+        The converted records are built in a single pass of the validator.
+        """
+
+        return CUSTOMER_WORKORDERS_ADAPTER.validate_python(
+            [
+                _customer_fields(
+                    TRACOS_EXPORT_ADAPTER.validate_python(tracos_workorder)
+                    if isinstance(tracos_workorder, dict)
+                    else tracos_workorder
+                )
+                for tracos_workorder in tracos_workorders
+            ]
         )
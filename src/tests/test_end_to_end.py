@@ -1,4 +1,6 @@
-from datetime import datetime
+import asyncio
+import threading
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, patch
 import pytest
 import os
@@ -6,7 +8,7 @@ import json
 from src.modules.inbound import InboundProcessor
 from src.modules.outbound import OutboundProcessor
 from src.models.tracOS_models import TracOSWorkOrderStatusEnum
-from src.main import main
+from src.main import main, profile
 
 
 @pytest.fixture
@@ -77,6 +79,63 @@ async def test_end_to_end_pipeline(tmp_path, workorder_repository, customer_data
             assert data["deletedDate"] == customer_data["deletedDate"]
 
 
+@pytest.mark.asyncio
+async def test_concurrent_stages_export_the_last_inbound_version(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    outbound_dir = tmp_path / "outbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    inbound_processor = InboundProcessor(repository=workorder_repository)
+    outbound_processor = OutboundProcessor(repository=workorder_repository)
+
+    with open(inbound_dir / "workorder_001.json", "w") as f:
+        json.dump(customer_data, f)
+    await inbound_processor.process_files()
+
+    # Outbound writes the version it read only once inbound stored a newer
+    # one, as the stages may interleave when they run concurrently.
+    inbound_done = threading.Event()
+    write_batch = outbound_processor._write_batch
+
+    def write_after_inbound(writer, workorders):
+        inbound_done.wait(timeout=5)
+        return write_batch(writer, workorders)
+
+    outbound_processor._write_batch = write_after_inbound
+    updated = {
+        **customer_data,
+        "summary": "Updated summary",
+        "lastUpdateDate": (
+            datetime.fromisoformat(customer_data["lastUpdateDate"])
+            + timedelta(minutes=1)
+        ).isoformat(),
+    }
+    with open(inbound_dir / "workorder_001.json", "w") as f:
+        json.dump(updated, f)
+
+    async def inbound():
+        try:
+            await inbound_processor.process_files()
+        finally:
+            inbound_done.set()
+
+    await asyncio.gather(inbound(), outbound_processor.process_files())
+
+    stored = await workorder_repository.find_by_field("number", 1)
+    assert stored.title == "Updated summary"
+    assert stored.isSynced is False
+
+    # The next run exports the version inbound wrote last.
+    await outbound_processor.process_files()
+
+    with open(outbound_dir / "workorder_1.json") as f:
+        assert json.load(f)["summary"] == "Updated summary"
+    assert (await workorder_repository.find_by_field("number", 1)).isSynced is True
+
+
 @pytest.mark.asyncio
 async def test_main_execution():
     with patch("src.main.InboundProcessor") as MockInboundProcessor, patch(
@@ -99,3 +158,24 @@ async def test_main_execution():
         MockOutboundProcessor.assert_called_once_with(mock_repository)
         mock_inbound_processor.process_files.assert_awaited_once()
         mock_outbound_processor.process_files.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_profile_writes_reports_for_selected_stages(tmp_path):
+    with patch("src.main.InboundProcessor") as MockInboundProcessor, patch(
+        "src.main.OutboundProcessor"
+    ) as MockOutboundProcessor, patch(
+        "src.main.RepositoryFactory.get_workorder_repository", new_callable=AsyncMock
+    ):
+        MockInboundProcessor.return_value = AsyncMock()
+        MockOutboundProcessor.return_value = AsyncMock()
+
+        await profile(stages="inbound", output_dir=str(tmp_path))
+
+        MockInboundProcessor.return_value.process_files.assert_awaited_once()
+        MockOutboundProcessor.assert_not_called()
+        assert sorted(os.listdir(tmp_path)) == [
+            "inbound.pstats",
+            "inbound_cumulative.txt",
+            "inbound_memory.txt",
+        ]
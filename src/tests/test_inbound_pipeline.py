@@ -2,6 +2,7 @@ from datetime import datetime
 import pytest
 import os
 import json
+import hashlib
 from modules.inbound import InboundProcessor
 from src.models.tracOS_models import TracOSWorkOrderStatusEnum
 
@@ -55,3 +56,344 @@ async def test_inbound_pipeline(tmp_path, workorder_repository, customer_data):
     assert stored_workorder.updatedAt.isoformat() == customer_data["lastUpdateDate"]
     assert stored_workorder.deleted == customer_data["isDeleted"]
     assert stored_workorder.status == TracOSWorkOrderStatusEnum.PENDING
+
+
+@pytest.mark.asyncio
+async def test_inbound_pipeline_in_batches(
+    tmp_path, workorder_repository, customer_data
+):
+    """Test that invalid files do not prevent the rest of a batch from being written."""
+
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["INBOUND_BATCH_SIZE"] = "2"
+
+    for order_no in range(1, 6):
+        with open(inbound_dir / f"workorder_{order_no:03}.json", "w") as f:
+            json.dump({**customer_data, "orderNo": order_no}, f)
+
+    with open(inbound_dir / "workorder_invalid.json", "w") as f:
+        json.dump({**customer_data, "orderNo": "not_an_integer"}, f)
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+        assert inbound_processor.batch_size == 2
+
+        await inbound_processor.process_files()
+    finally:
+        del os.environ["INBOUND_BATCH_SIZE"]
+
+    for order_no in range(1, 6):
+        stored_workorder = await workorder_repository.find_by_field("number", order_no)
+        assert stored_workorder is not None
+        assert stored_workorder.title == customer_data["summary"]
+
+
+@pytest.mark.asyncio
+async def test_inbound_pipeline_concurrent(
+    tmp_path, workorder_repository, customer_data
+):
+    """Test that files are loaded and written concurrently with a bounded pool."""
+
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["INBOUND_BATCH_SIZE"] = "3"
+    os.environ["INBOUND_MAX_IN_FLIGHT"] = "4"
+
+    for order_no in range(1, 11):
+        with open(inbound_dir / f"workorder_{order_no:03}.json", "w") as f:
+            json.dump({**customer_data, "orderNo": order_no}, f)
+
+    with open(inbound_dir / "workorder_corrupted.json", "w") as f:
+        f.write("{not valid json")
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+        assert inbound_processor.max_in_flight == 4
+
+        await inbound_processor.process_files()
+    finally:
+        del os.environ["INBOUND_BATCH_SIZE"]
+        del os.environ["INBOUND_MAX_IN_FLIGHT"]
+
+    for order_no in range(1, 11):
+        assert await workorder_repository.find_by_field("number", order_no) is not None
+
+
+def test_load_workorder_skips_invalid_files(tmp_path, customer_data):
+    os.environ["DATA_INBOUND_DIR"] = str(tmp_path)
+    inbound_processor = InboundProcessor(repository=None)
+
+    valid_file = tmp_path / "valid.json"
+    valid_file.write_text(json.dumps(customer_data))
+    corrupted_file = tmp_path / "corrupted.json"
+    corrupted_file.write_text("{not valid json")
+    invalid_file = tmp_path / "invalid.json"
+    invalid_file.write_text(json.dumps({**customer_data, "orderNo": "not_an_integer"}))
+
+    tracos_workorder = inbound_processor.load_workorder(str(valid_file))
+    assert tracos_workorder.number == customer_data["orderNo"]
+    assert inbound_processor.load_workorder(str(corrupted_file)) is None
+    assert inbound_processor.load_workorder(str(invalid_file)) is None
+
+
+@pytest.mark.asyncio
+async def test_inbound_pipeline_skips_ingested_files(
+    tmp_path, workorder_repository, customer_data
+):
+    """Test that files recorded in the manifest are only reprocessed when asked."""
+
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+
+    test_file_path = inbound_dir / "workorder_001.json"
+    with open(test_file_path, "w") as f:
+        json.dump(customer_data, f)
+
+    inbound_processor = InboundProcessor(repository=workorder_repository)
+    await inbound_processor.process_files()
+    assert "workorder_001.json" in inbound_processor.manifest.entries
+
+    stored_workorder = await workorder_repository.find_by_field(
+        "number", customer_data["orderNo"]
+    )
+    stored_workorder.title = "Changed in TracOS"
+    await workorder_repository.update(stored_workorder.number, stored_workorder)
+
+    # Touching the file changes its mtime but not its content.
+    os.utime(test_file_path, (0, 0))
+    await InboundProcessor(repository=workorder_repository).process_files()
+    stored_workorder = await workorder_repository.find_by_field(
+        "number", customer_data["orderNo"]
+    )
+    assert stored_workorder.title == "Changed in TracOS"
+
+    await InboundProcessor(repository=workorder_repository).process_files(full=True)
+    stored_workorder = await workorder_repository.find_by_field(
+        "number", customer_data["orderNo"]
+    )
+    assert stored_workorder.title == customer_data["summary"]
+
+
+@pytest.mark.asyncio
+async def test_inbound_pipeline_batch_files(
+    tmp_path, workorder_repository, customer_data, caplog
+):
+    """Test NDJSON and JSON array files alongside single workorder files."""
+
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["INBOUND_BATCH_SIZE"] = "2"
+
+    with open(inbound_dir / "export.ndjson", "w") as f:
+        for order_no in range(1, 4):
+            f.write(json.dumps({**customer_data, "orderNo": order_no}) + "\n")
+        f.write("\n")
+        f.write('{"orderNo": "not_an_integer"}\n')
+
+    with open(inbound_dir / "export.json", "w") as f:
+        json.dump([{**customer_data, "orderNo": order_no} for order_no in [4, 5]], f)
+
+    with open(inbound_dir / "workorder_006.json", "w") as f:
+        json.dump({**customer_data, "orderNo": 6}, f)
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+        summary = await inbound_processor.process_files()
+    finally:
+        del os.environ["INBOUND_BATCH_SIZE"]
+
+    assert summary["inserted"] == 6
+    assert summary["failed"] == 1
+    assert "Error processing file export.ndjson line 5" in caplog.text
+
+    for order_no in range(1, 7):
+        assert await workorder_repository.find_by_field("number", order_no) is not None
+
+    # Files with a failed record are retried on the next run.
+    assert set(inbound_processor.manifest.entries) == {
+        "export.json",
+        "workorder_006.json",
+    }
+
+
+@pytest.mark.asyncio
+async def test_inbound_streams_line_based_files(
+    tmp_path, workorder_repository, customer_data
+):
+    """Test that NDJSON files are hashed and parsed without reading them whole."""
+
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["INBOUND_BATCH_SIZE"] = "2"
+
+    with open(inbound_dir / "export.ndjson", "w") as f:
+        for order_no in range(1, 6):
+            f.write(json.dumps({**customer_data, "orderNo": order_no}) + "\n")
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+    finally:
+        del os.environ["INBOUND_BATCH_SIZE"]
+
+    def read_file(file_path):
+        raise AssertionError(f"{file_path} was read whole")
+
+    chunk_sizes = []
+    read_chunks = inbound_processor._read_chunks
+
+    async def record_chunks(records):
+        async for chunk in read_chunks(records):
+            chunk_sizes.append(len(chunk))
+            yield chunk
+
+    inbound_processor.read_file = read_file
+    inbound_processor._read_chunks = record_chunks
+    summary = await inbound_processor.process_files()
+
+    assert summary["inserted"] == 5
+    assert chunk_sizes == [2, 2, 1]
+    with open(inbound_dir / "export.ndjson", "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    assert inbound_processor.manifest.entries["export.ndjson"].sha256 == sha256
+
+
+@pytest.mark.asyncio
+async def test_inbound_processes_only_given_files(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+
+    for order_no in (1, 2):
+        with open(inbound_dir / f"workorder_{order_no}.json", "w") as f:
+            json.dump({**customer_data, "orderNo": order_no}, f)
+
+    inbound_processor = InboundProcessor(repository=workorder_repository)
+    summary = await inbound_processor.process_files(filenames=["workorder_2.json"])
+
+    assert summary["inserted"] == 1
+    assert await workorder_repository.find_by_field("number", 1) is None
+    assert await workorder_repository.find_by_field("number", 2) is not None
+    assert set(inbound_processor.manifest.entries) == {"workorder_2.json"}
+
+
+@pytest.mark.asyncio
+async def test_inbound_coalesces_duplicate_workorders(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+
+    exports = {
+        "a_newest.json": ("2025-12-14T15:00:00", "Newest"),
+        "b_oldest.json": ("2025-12-14T09:00:00", "Oldest"),
+        "c_middle.json": ("2025-12-14T12:00:00", "Middle"),
+    }
+    for filename, (last_update, summary) in exports.items():
+        with open(inbound_dir / filename, "w") as f:
+            json.dump(
+                {**customer_data, "lastUpdateDate": last_update, "summary": summary}, f
+            )
+    with open(inbound_dir / "workorder_2.json", "w") as f:
+        json.dump({**customer_data, "orderNo": 2}, f)
+
+    inbound_processor = InboundProcessor(repository=workorder_repository)
+    summary = await inbound_processor.process_files()
+
+    assert summary["inserted"] == 2
+    assert summary["superseded"] == 2
+    assert (await workorder_repository.find_by_field("number", 1)).title == "Newest"
+    assert set(inbound_processor.manifest.entries) == {*exports, "workorder_2.json"}
+
+
+@pytest.mark.asyncio
+async def test_inbound_without_coalescing_writes_every_record(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["INBOUND_COALESCE"] = "False"
+
+    with open(inbound_dir / "export.ndjson", "w") as f:
+        for summary in ("First", "Second"):
+            f.write(json.dumps({**customer_data, "summary": summary}) + "\n")
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+        summary = await inbound_processor.process_files()
+    finally:
+        del os.environ["INBOUND_COALESCE"]
+
+    assert summary["superseded"] == 0
+    assert summary["inserted"] + summary["updated"] == 2
+
+
+@pytest.mark.asyncio
+async def test_inbound_coalesces_mixed_timezone_updates(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+
+    exports = {
+        "a.json": ("2025-12-14T12:00:00", "Naive"),
+        "b.json": ("2025-12-14T13:00:00Z", "Aware"),
+    }
+    for filename, (last_update, summary) in exports.items():
+        with open(inbound_dir / filename, "w") as f:
+            json.dump(
+                {**customer_data, "lastUpdateDate": last_update, "summary": summary}, f
+            )
+
+    inbound_processor = InboundProcessor(repository=workorder_repository)
+    summary = await inbound_processor.process_files()
+
+    assert summary["failed"] == 0
+    assert summary["superseded"] == 1
+    assert (await workorder_repository.find_by_field("number", 1)).title == "Aware"
+    assert set(inbound_processor.manifest.entries) == set(exports)
+
+
+@pytest.mark.asyncio
+async def test_inbound_coalescing_flushes_full_windows(
+    tmp_path, workorder_repository, customer_data
+):
+    inbound_dir = tmp_path / "inbound"
+    os.makedirs(inbound_dir, exist_ok=True)
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    settings = {
+        "INBOUND_COALESCE_WINDOW": "1",
+        "INBOUND_BATCH_SIZE": "1",
+        "INBOUND_MAX_IN_FLIGHT": "1",
+    }
+    os.environ.update(settings)
+
+    with open(inbound_dir / "export.ndjson", "w") as f:
+        for last_update, summary in (
+            ("2025-12-14T15:00:00", "Newest"),
+            ("2025-12-14T09:00:00", "Oldest"),
+        ):
+            record = {**customer_data, "lastUpdateDate": last_update}
+            f.write(json.dumps({**record, "summary": summary}) + "\n")
+
+    try:
+        inbound_processor = InboundProcessor(repository=workorder_repository)
+        summary = await inbound_processor.process_files()
+    finally:
+        for name in settings:
+            del os.environ[name]
+
+    # Each window was written on its own; the upsert guard kept the newest.
+    assert summary["inserted"] == 1
+    assert summary["stale"] == 1
+    assert (await workorder_repository.find_by_field("number", 1)).title == "Newest"
@@ -0,0 +1,184 @@
+import pytest
+import os
+import json
+from datetime import datetime, timedelta
+
+from src.modules.outbound import OutboundProcessor
+from src.modules.outbound_backfill import (
+    BackfillCheckpoint,
+    OutboundBackfill,
+    split_range,
+)
+from src.models.tracOS_models import TracOSWorkorderModel
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+
+
+def build_workorder(number: int) -> TracOSWorkorderModel:
+    return TracOSWorkorderModel(
+        number=number,
+        title=f"Workorder {number}",
+        description="Description",
+        createdAt=datetime(2025, 12, 14, 10, 0, 0),
+        updatedAt=datetime(2025, 12, 14, 12, 0, 0) + timedelta(hours=number),
+    )
+
+
+@pytest.fixture
+async def backfill_repository(tmp_path):
+    os.environ["DATA_OUTBOUND_DIR"] = str(tmp_path / "outbound")
+    repository = MemoryWorkOrderRepository()
+    for number in range(1, 11):
+        await repository.insert(build_workorder(number))
+    versions = await repository.find_many_by_field("number", [2, 4, 6])
+    await repository.mark_synced(versions, synced_at=datetime(2025, 12, 15))
+    return repository
+
+
+def test_split_range_covers_numbers_without_gaps():
+    partitions = split_range(1, 11, 4)
+
+    assert [(p.start, p.end) for p in partitions] == [(1, 4), (4, 7), (7, 10), (10, 11)]
+    assert split_range(1, 3, 4)[-1].end == 3
+    assert split_range(5, 5, 4) == []
+
+
+def test_split_range_divides_dates_evenly():
+    start, end = datetime(2025, 1, 1), datetime(2025, 1, 5)
+
+    partitions = split_range(start, end, 2)
+
+    assert [(p.start, p.end) for p in partitions] == [
+        (start, datetime(2025, 1, 3)),
+        (datetime(2025, 1, 3), end),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_exports_synced_and_unsynced_workorders(
+    tmp_path, backfill_repository
+):
+    processor = OutboundProcessor(backfill_repository)
+    backfill = OutboundBackfill(processor, "number", 2, 9, partitions=3, max_parallel=2)
+
+    summary = await backfill.run()
+
+    assert summary["exported"] == 7
+    assert summary["partitions"] == 3
+    outbound_dir = tmp_path / "outbound"
+    assert sorted(file.name for file in outbound_dir.iterdir()) == [
+        f"workorder_{number}.json" for number in sorted(range(2, 9), key=str)
+    ]
+    with open(outbound_dir / "workorder_4.json") as f:
+        assert json.load(f)["orderNo"] == 4
+    for number in range(2, 9):
+        workorder = await backfill_repository.find_by_field("number", number)
+        assert workorder.isSynced is True
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+@pytest.mark.asyncio
+async def test_backfill_leaves_workorders_updated_during_the_export_unsynced(
+    tmp_path, backfill_repository
+):
+    processor = OutboundProcessor(backfill_repository)
+    mark_synced = processor._mark_synced
+    newer = build_workorder(3)
+    newer.title = "Newer"
+    newer.updatedAt += timedelta(minutes=1)
+
+    async def update_before_marking(versions, fingerprints=None):
+        await backfill_repository.upsert(newer)
+        return await mark_synced(versions, fingerprints)
+
+    processor._mark_synced = update_before_marking
+    backfill = OutboundBackfill(processor, "number", 2, 5, partitions=1)
+
+    summary = await backfill.run()
+
+    assert summary["exported"] == 3
+    assert (await backfill_repository.find_by_field("number", 3)).isSynced is False
+    assert (await backfill_repository.find_by_field("number", 4)).isSynced is True
+    assert os.path.dirname(backfill.checkpoint_path) == str(tmp_path)
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+@pytest.mark.asyncio
+async def test_backfill_by_date_range(tmp_path, backfill_repository):
+    processor = OutboundProcessor(backfill_repository)
+    backfill = OutboundBackfill(
+        processor,
+        "updatedAt",
+        datetime(2025, 12, 14, 20, 0, 0),
+        datetime(2025, 12, 14, 23, 0, 0),
+        partitions=2,
+    )
+
+    summary = await backfill.run()
+
+    assert summary["exported"] == 3
+    assert sorted(file.name for file in (tmp_path / "outbound").iterdir()) == [
+        "workorder_10.json",
+        "workorder_8.json",
+        "workorder_9.json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_the_failed_partition(
+    tmp_path, backfill_repository
+):
+    processor = OutboundProcessor(backfill_repository)
+    mark_synced = processor._mark_synced
+
+    async def fail_on_seven(versions, fingerprints=None):
+        if 7 in versions:
+            return False
+        return await mark_synced(versions, fingerprints)
+
+    processor._mark_synced = fail_on_seven
+    backfill = OutboundBackfill(processor, "number", 1, 11, partitions=5)
+
+    summary = await backfill.run()
+
+    assert summary["failed_partitions"] == 1
+    assert summary["partitions"] == 4
+    with open(backfill.checkpoint_path, "rb") as f:
+        checkpoint = BackfillCheckpoint.model_validate_json(f.read())
+    assert [partition.done for partition in checkpoint.partitions] == [
+        True,
+        True,
+        True,
+        False,
+        True,
+    ]
+
+    for file in (tmp_path / "outbound").glob("*.json"):
+        file.unlink()
+    processor._mark_synced = mark_synced
+
+    summary = await backfill.run()
+
+    assert summary["resumed_partitions"] == 4
+    assert summary["exported"] == 2
+    assert sorted(file.name for file in (tmp_path / "outbound").glob("*.json")) == [
+        "workorder_7.json",
+        "workorder_8.json",
+    ]
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+@pytest.mark.asyncio
+async def test_backfill_ignores_checkpoint_of_another_range(backfill_repository):
+    processor = OutboundProcessor(backfill_repository)
+    os.makedirs(processor.data_outbound_dir, exist_ok=True)
+    stale = OutboundBackfill(processor, "number", 1, 3, partitions=2)
+    stale.save_checkpoint(stale.load_checkpoint())
+    assert os.path.exists(stale.checkpoint_path)
+
+    backfill = OutboundBackfill(processor, "number", 1, 11, partitions=2)
+    checkpoint = backfill.load_checkpoint()
+
+    assert (checkpoint.start, checkpoint.end) == (1, 11)
+    assert not any(partition.done for partition in checkpoint.partitions)
@@ -1,10 +1,22 @@
 import pytest
 import os
 import json
+import asyncio
+import threading
 from datetime import datetime
+from unittest.mock import AsyncMock
 
+from src.modules.metrics import OUTBOUND_BACKLOG, SYNC_LAG_SECONDS
 from src.modules.outbound import OutboundProcessor
-from src.models.tracOS_models import TracOSWorkorderModel, TracOSWorkOrderStatusEnum
+from src.models.tracOS_models import (
+    TracOSWorkorderExportRecord,
+    TracOSWorkorderModel,
+    TracOSWorkOrderStatusEnum,
+)
+from src.repositories.memory.memory_workorder_repository import (
+    MemoryWorkOrderRepository,
+)
+from src.repositories.workorder_repository import ChangeStreamHistoryLost
 
 
 @pytest.fixture
@@ -74,3 +86,301 @@ async def test_outbound_pipeline(tmp_path, workorder_repository, outbound_data):
         )
         assert stored_workorder.isSynced is True
         assert stored_workorder.syncedAt is not None
+
+
+@pytest.mark.asyncio
+async def test_outbound_pipeline_updates_backlog_metrics(tmp_path):
+    os.environ["DATA_OUTBOUND_DIR"] = str(tmp_path)
+    repository = MemoryWorkOrderRepository()
+    await repository.bulk_upsert(
+        [
+            TracOSWorkorderModel(
+                number=1,
+                status=TracOSWorkOrderStatusEnum.PENDING,
+                title="Workorder 1",
+                description="Description 1",
+                createdAt=datetime(2025, 12, 14, 10, 0, 0),
+                updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+            )
+        ]
+    )
+    outbound_processor = OutboundProcessor(repository=repository)
+
+    await outbound_processor.update_backlog_metrics()
+    assert OUTBOUND_BACKLOG.labels().value == 1
+    assert SYNC_LAG_SECONDS.labels().value > 0
+
+    await outbound_processor.process_files()
+    assert OUTBOUND_BACKLOG.labels().value == 0
+    assert SYNC_LAG_SECONDS.labels().value == 0
+
+
+@pytest.mark.asyncio
+async def test_outbound_pipeline_skips_unchanged_exports(
+    tmp_path, workorder_repository, outbound_data
+):
+    outbound_dir = tmp_path / "outbound"
+    os.makedirs(outbound_dir, exist_ok=True)
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+
+    outbound_processor = OutboundProcessor(repository=workorder_repository)
+    await outbound_processor.process_files()
+    assert len(list(outbound_dir.iterdir())) == 2
+
+    for file in outbound_dir.iterdir():
+        file.unlink()
+
+    # Another writer flags both workorders again, but only one really changed.
+    await workorder_repository.collection.update_many({}, {"$set": {"isSynced": False}})
+    outbound_data[1].title = "Workorder 2 updated"
+    await workorder_repository.update(outbound_data[1].number, outbound_data[1])
+
+    await outbound_processor.process_files()
+
+    assert [file.name for file in outbound_dir.iterdir()] == ["workorder_2.json"]
+    for workorder in outbound_data:
+        stored_workorder = await workorder_repository.find_by_field(
+            "number", workorder.number
+        )
+        assert stored_workorder.isSynced is True
+
+
+@pytest.mark.asyncio
+async def test_outbound_pipeline_exports_changes_from_other_writers(
+    tmp_path, workorder_repository, outbound_data
+):
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+
+    outbound_processor = OutboundProcessor(repository=workorder_repository)
+    await outbound_processor.process_files()
+    for file in outbound_dir.iterdir():
+        file.unlink()
+
+    # Edited in TracOS: the stored fingerprint is left as this integration wrote it.
+    await workorder_repository.collection.update_one(
+        {"number": 1}, {"$set": {"title": "Edited in TracOS", "isSynced": False}}
+    )
+
+    await outbound_processor.process_files()
+
+    assert [file.name for file in outbound_dir.iterdir()] == ["workorder_1.json"]
+    with open(outbound_dir / "workorder_1.json") as f:
+        assert json.load(f)["summary"] == "Edited in TracOS"
+
+
+def test_outbound_conversion_errors_drop_only_the_failing_record(tmp_path):
+    os.environ["DATA_OUTBOUND_DIR"] = str(tmp_path)
+    outbound_processor = OutboundProcessor(repository=MemoryWorkOrderRepository())
+    document = {
+        "number": 1,
+        "status": "pending",
+        "title": "Workorder 1",
+        "createdAt": datetime(2025, 12, 14, 10, 0, 0),
+        "updatedAt": datetime(2025, 12, 14, 12, 0, 0),
+    }
+    # Trusted records skip validation, so a bad stored value fails conversion.
+    workorders = [
+        TracOSWorkorderExportRecord(document),
+        TracOSWorkorderExportRecord({**document, "number": 2, "title": None}),
+        TracOSWorkorderExportRecord({**document, "number": 3}),
+    ]
+
+    committed = outbound_processor._write_batch(
+        outbound_processor.create_writer(), workorders
+    )
+
+    assert committed == [1, 3]
+    assert sorted(file.name for file in tmp_path.iterdir()) == [
+        "workorder_1.json",
+        "workorder_3.json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_outbound_pipeline_ndjson_layout(
+    tmp_path, workorder_repository, outbound_data
+):
+    outbound_dir = tmp_path / "outbound"
+    os.makedirs(outbound_dir, exist_ok=True)
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["OUTBOUND_LAYOUT"] = "ndjson"
+
+    try:
+        outbound_processor = OutboundProcessor(repository=workorder_repository)
+        await outbound_processor.process_files()
+    finally:
+        del os.environ["OUTBOUND_LAYOUT"]
+
+    output_files = list(outbound_dir.iterdir())
+    assert len(output_files) == 1
+    assert output_files[0].suffix == ".ndjson"
+
+    with open(output_files[0], "r") as f:
+        assert [json.loads(line)["orderNo"] for line in f] == [1, 2]
+
+    for workorder in outbound_data:
+        stored_workorder = await workorder_repository.find_by_field(
+            "number", workorder.number
+        )
+        assert stored_workorder.isSynced is True
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_outbound_change_stream_exports_backlog_then_changes(tmp_path):
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"] = "20"
+
+    repository = MemoryWorkOrderRepository()
+    backlog, live, missed = (
+        TracOSWorkorderModel(
+            number=number,
+            title=f"Workorder {number}",
+            description="Description",
+            createdAt=datetime(2025, 12, 14, 10, 0, 0),
+            updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+        )
+        for number in (1, 2, 3)
+    )
+    await repository.insert(backlog)
+
+    outbound_processor = OutboundProcessor(repository)
+    stop = asyncio.Event()
+    task = asyncio.create_task(outbound_processor.stream_files(stop))
+    await wait_until(lambda: (outbound_dir / "workorder_1.json").exists())
+
+    await repository.insert(live)
+    await wait_until(lambda: os.path.exists(outbound_processor.resume_token_path))
+    await wait_until(lambda: repository.documents[2]["isSynced"])
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+
+    assert (outbound_dir / "workorder_2.json").exists()
+    assert outbound_processor.load_resume_token() == {"position": 2}
+
+    # A restart resumes from the token instead of querying the backlog.
+    await repository.insert(missed)
+    stop = asyncio.Event()
+    outbound_processor.process_files = AsyncMock()
+    task = asyncio.create_task(outbound_processor.stream_files(stop))
+    await wait_until(lambda: repository.documents[3]["isSynced"])
+    stop.set()
+    await asyncio.wait_for(task, timeout=5)
+
+    del os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"]
+
+    assert (outbound_dir / "workorder_3.json").exists()
+    outbound_processor.process_files.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_outbound_change_stream_exports_updates_made_during_an_export(
+    tmp_path,
+):
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"] = "20"
+
+    repository = MemoryWorkOrderRepository()
+    outbound_processor = OutboundProcessor(repository)
+    os.makedirs(outbound_dir, exist_ok=True)
+
+    # Hold the export of the first version until a newer one is stored.
+    writing = threading.Event()
+    updated = threading.Event()
+    write_batch = outbound_processor._write_batch
+
+    def write_after_update(writer, workorders):
+        writing.set()
+        updated.wait(timeout=5)
+        return write_batch(writer, workorders)
+
+    outbound_processor._write_batch = write_after_update
+    first, second = (
+        TracOSWorkorderModel(
+            number=1,
+            title=title,
+            description="Description",
+            createdAt=datetime(2025, 12, 14, 10, 0, 0),
+            updatedAt=updated_at,
+        )
+        for title, updated_at in (
+            ("First", datetime(2025, 12, 14, 12, 0, 0)),
+            ("Second", datetime(2025, 12, 14, 13, 0, 0)),
+        )
+    )
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(outbound_processor.stream_files(stop))
+    try:
+        await wait_until(lambda: outbound_processor.load_resume_token() is not None)
+        await repository.insert(first)
+        await asyncio.to_thread(writing.wait, 5)
+        await repository.upsert(second)
+        updated.set()
+
+        await wait_until(lambda: repository.documents[1]["isSynced"])
+    finally:
+        updated.set()
+        stop.set()
+        await asyncio.wait_for(task, timeout=5)
+        del os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"]
+
+    assert repository.documents[1]["isSynced"] is True
+    with open(outbound_dir / "workorder_1.json") as f:
+        assert json.load(f)["summary"] == "Second"
+
+
+@pytest.mark.asyncio
+async def test_outbound_change_stream_recovers_from_errors(tmp_path):
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"] = "20"
+    os.environ["OUTBOUND_CHANGE_STREAM_RETRY_SECONDS"] = "0"
+
+    repository = MemoryWorkOrderRepository()
+    await repository.insert(
+        TracOSWorkorderModel(
+            number=1,
+            title="Workorder 1",
+            description="Description",
+            createdAt=datetime(2025, 12, 14, 10, 0, 0),
+            updatedAt=datetime(2025, 12, 14, 12, 0, 0),
+        )
+    )
+    outbound_processor = OutboundProcessor(repository)
+    os.makedirs(outbound_dir, exist_ok=True)
+    outbound_processor.save_resume_token({"position": 99})
+
+    watch = repository.watch_unsynced_workorders
+    failures = [ConnectionError("network down"), ChangeStreamHistoryLost("gone")]
+
+    async def flaky_watch(resume_token=None, **kwargs):
+        if failures:
+            raise failures.pop(0)
+        async for change in watch(resume_token=resume_token, **kwargs):
+            yield change
+
+    repository.watch_unsynced_workorders = flaky_watch
+    stop = asyncio.Event()
+    task = asyncio.create_task(outbound_processor.stream_files(stop))
+    try:
+        # The lost token is discarded, so the backlog is exported again.
+        await wait_until(lambda: repository.documents[1]["isSynced"])
+    finally:
+        stop.set()
+        await asyncio.wait_for(task, timeout=5)
+        del os.environ["OUTBOUND_CHANGE_STREAM_MAX_AWAIT_MS"]
+        del os.environ["OUTBOUND_CHANGE_STREAM_RETRY_SECONDS"]
+
+    assert failures == []
+    assert (outbound_dir / "workorder_1.json").exists()
+    assert outbound_processor.load_resume_token() != {"position": 99}
@@ -0,0 +1,98 @@
+import os
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from src.modules.manifest import ManifestEntry
+from src.modules.sharded_inbound import (
+    InboundShard,
+    ShardedInboundProcessor,
+    ShardResult,
+    partition_files,
+    process_shard,
+    shard_index,
+)
+
+
+@pytest.fixture
+def customer_data():
+    return {
+        "orderNo": 1,
+        "isCanceled": False,
+        "isDeleted": False,
+        "isDone": False,
+        "isOnHold": False,
+        "isPending": True,
+        "summary": "Test workorder summary",
+        "creationDate": "2025-12-14T10:00:00",
+        "lastUpdateDate": "2025-12-14T12:00:00",
+    }
+
+
+def test_partition_files_is_stable():
+    filenames = [f"workorder_{order_no}.json" for order_no in range(100)]
+
+    partitions = partition_files(filenames, 4)
+
+    assert sorted(sum(partitions, [])) == sorted(filenames)
+    assert all(partitions)
+    for index, partition in enumerate(partitions):
+        assert all(shard_index(filename, 4) == index for filename in partition)
+    assert partition_files(list(reversed(filenames)), 4) == [
+        list(reversed(partition)) for partition in partitions
+    ]
+
+
+@pytest.mark.asyncio
+async def test_process_shard_writes_its_files(
+    tmp_path, workorder_repository, customer_data
+):
+    os.environ["DATA_INBOUND_DIR"] = str(tmp_path)
+    for order_no in (1, 2, 3):
+        with open(tmp_path / f"workorder_{order_no}.json", "w") as f:
+            json.dump({**customer_data, "orderNo": order_no}, f)
+
+    result = await process_shard(
+        workorder_repository,
+        InboundShard(filenames=["workorder_1.json", "workorder_2.json"]),
+    )
+
+    assert result.summary == {"inserted": 2}
+    assert set(result.entries) == {"workorder_1.json", "workorder_2.json"}
+    assert await workorder_repository.find_by_field("number", 3) is None
+    assert not os.path.exists(tmp_path / ".inbound_manifest")
+
+
+@pytest.mark.asyncio
+async def test_sharded_inbound_aggregates_worker_results(tmp_path):
+    os.environ["DATA_INBOUND_DIR"] = str(tmp_path)
+    for order_no in range(6):
+        (tmp_path / f"workorder_{order_no}.json").write_text("{}")
+
+    def run_shard(shard: InboundShard) -> ShardResult:
+        if "workorder_0.json" in shard.filenames:
+            raise RuntimeError("worker crashed")
+        return ShardResult(
+            summary={"inserted": len(shard.filenames)},
+            entries={
+                filename: ManifestEntry(size=2, mtime=0, sha256="hash")
+                for filename in shard.filenames
+            },
+        )
+
+    processor = ShardedInboundProcessor(
+        workers=3, executor_factory=lambda workers: ThreadPoolExecutor(workers)
+    )
+    with patch("src.modules.sharded_inbound.run_shard", run_shard):
+        summary = await processor.process_files()
+
+    failed = partition_files([f"workorder_{n}.json" for n in range(6)], 3)[
+        shard_index("workorder_0.json", 3)
+    ]
+    assert summary["failed_shards"] == 1
+    assert summary["inserted"] == 6 - len(failed)
+    assert set(processor.manifest.entries) == {
+        f"workorder_{n}.json" for n in range(6)
+    } - set(failed)
+    assert os.path.exists(tmp_path / ".inbound_manifest")
@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import pytest
+import threading
+from datetime import datetime
+from unittest.mock import patch
+
+from src.main import OutboundProcessor, watch
+
+
+def customer_workorder(summary: str, updated_at: datetime) -> dict:
+    return {
+        "orderNo": 7,
+        "isCanceled": False,
+        "isDeleted": False,
+        "isDone": False,
+        "isOnHold": False,
+        "isPending": True,
+        "summary": summary,
+        "creationDate": datetime(2025, 12, 14, 10, 0, 0).isoformat(),
+        "lastUpdateDate": updated_at.isoformat(),
+    }
+
+
+@pytest.mark.asyncio
+async def test_watch_ingests_new_files_and_exports_them(tmp_path, workorder_repository):
+    inbound_dir = tmp_path / "inbound"
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["WATCH_DEBOUNCE_MS"] = "20"
+    os.environ["WATCH_POLL_INTERVAL_MS"] = "20"
+    os.environ["OUTBOUND_INTERVAL_SECONDS"] = "0.05"
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(watch(stop=stop))
+    try:
+        while not os.path.isdir(inbound_dir):
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+
+        now = datetime(2025, 12, 14, 10, 0, 0).isoformat()
+        with open(inbound_dir / "workorder_7.json", "w") as f:
+            json.dump(
+                {
+                    "orderNo": 7,
+                    "isCanceled": False,
+                    "isDeleted": False,
+                    "isDone": False,
+                    "isOnHold": False,
+                    "isPending": True,
+                    "summary": "Watched workorder",
+                    "creationDate": now,
+                    "lastUpdateDate": now,
+                },
+                f,
+            )
+
+        exported = outbound_dir / "workorder_7.json"
+        for _ in range(200):
+            stored_workorder = await workorder_repository.find_by_field("number", 7)
+            if stored_workorder is not None and stored_workorder.isSynced:
+                break
+            await asyncio.sleep(0.01)
+
+        assert exported.exists()
+        assert stored_workorder.isSynced is True
+    finally:
+        stop.set()
+        await asyncio.wait_for(task, timeout=5)
+        for name in (
+            "WATCH_DEBOUNCE_MS",
+            "WATCH_POLL_INTERVAL_MS",
+            "OUTBOUND_INTERVAL_SECONDS",
+        ):
+            del os.environ[name]
+
+
+@pytest.mark.asyncio
+async def test_watch_exports_updates_ingested_during_an_export(
+    tmp_path, workorder_repository
+):
+    inbound_dir = tmp_path / "inbound"
+    outbound_dir = tmp_path / "outbound"
+    os.environ["DATA_INBOUND_DIR"] = str(inbound_dir)
+    os.environ["DATA_OUTBOUND_DIR"] = str(outbound_dir)
+    os.environ["WATCH_DEBOUNCE_MS"] = "20"
+    os.environ["WATCH_POLL_INTERVAL_MS"] = "20"
+    os.environ["OUTBOUND_INTERVAL_SECONDS"] = "0.05"
+
+    # Hold the first export until inbound stored a newer version.
+    writing = threading.Event()
+    updated = threading.Event()
+    write_batch = OutboundProcessor._write_batch
+
+    def write_after_update(self, writer, workorders):
+        writing.set()
+        updated.wait(timeout=5)
+        return write_batch(self, writer, workorders)
+
+    stop = asyncio.Event()
+    with patch.object(OutboundProcessor, "_write_batch", write_after_update):
+        task = asyncio.create_task(watch(stop=stop))
+        try:
+            while not os.path.isdir(inbound_dir):
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+
+            with open(inbound_dir / "workorder_7.json", "w") as f:
+                json.dump(
+                    customer_workorder("First", datetime(2025, 12, 14, 10, 0, 0)), f
+                )
+            await asyncio.to_thread(writing.wait, 5)
+
+            with open(inbound_dir / "workorder_7.json", "w") as f:
+                json.dump(
+                    customer_workorder("Second", datetime(2025, 12, 14, 11, 0, 0)), f
+                )
+            for _ in range(200):
+                stored_workorder = await workorder_repository.find_by_field("number", 7)
+                if stored_workorder.title == "Second":
+                    break
+                await asyncio.sleep(0.01)
+            updated.set()
+
+            exported = outbound_dir / "workorder_7.json"
+            for _ in range(200):
+                stored_workorder = await workorder_repository.find_by_field("number", 7)
+                if stored_workorder.isSynced:
+                    break
+                await asyncio.sleep(0.01)
+
+            assert stored_workorder.isSynced is True
+            with open(exported) as f:
+                assert json.load(f)["summary"] == "Second"
+        finally:
+            updated.set()
+            stop.set()
+            await asyncio.wait_for(task, timeout=5)
+            for name in (
+                "WATCH_DEBOUNCE_MS",
+                "WATCH_POLL_INTERVAL_MS",
+                "OUTBOUND_INTERVAL_SECONDS",
+            ):
+                del os.environ[name]